@@ -12,6 +12,7 @@ from glm import *
 from rlm import *
 from discretemod import *
 from tools import add_constant, chain_dot
+from parallel import fit_many
 import model, tools, datasets, families, stattools, iolib
 # robust is imported somewhere else?
 __all__ = filter(lambda s:not s.startswith('_'),dir())
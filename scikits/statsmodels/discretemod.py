@@ -18,14 +18,20 @@ W. Greene. `Econometric Analysis`. Prentice Hall, 5th. edition. 2003.
 
 __all__ = ["Poisson","Logit","Probit","MNLogit"]
 
+import copy
 import numpy as np
-from model import LikelihoodModel, LikelihoodModelResults
+from model import LikelihoodModel, LikelihoodModelResults, _check_order
 import tools
+from tools import spdot, sptdot, spxtwx, spwx
 from decorators import *
 from regression import OLS
-from scipy import stats, factorial, special, optimize # opt just for nbin
+from scipy import stats, factorial, special, optimize, sparse # opt just for nbin
+from scipy.linalg.blas import dsyrk
 #import numdifftools as nd #This will be removed when all have analytic hessians
 
+# the number of elements of the temporary arrays used in MNLogit.hessian
+_CHUNK_ELEMENTS = 2**20
+
 #TODO: add options for the parameter covariance/variance
 # ie., OIM, EIM, and BHHH see Green 21.4
 
@@ -97,8 +103,52 @@ class DiscreteModel(LikelihoodModel):
         scikits.statsmodels.model.LikelihoodModel.__init__
         and should contain any preprocessing that needs to be done for a model.
         """
-        self.df_model = float(tools.rank(self.exog) - 1) # assumes constant
-        self.df_resid = float(self.exog.shape[0] - tools.rank(self.exog))
+        rank = tools.rank(self.exog)
+        self.df_model = float(rank - 1) # assumes constant
+        self.df_resid = float(self.exog.shape[0] - rank)
+        self._evals = []
+
+    # the number of parameter points kept by _cached
+    _cache_size = 3
+
+    _data_attr = ['endog', 'exog', '_evals']
+
+    def _cached(self, name, params, func):
+        """
+        Returns func(params), reusing the value from a previous call.
+
+        The values are kept for the last few distinct `params` so that
+        loglike, score and hessian evaluated at the same point share the
+        linear predictor and the cdf and pdf.  The values are also keyed on
+        the identity of endog and exog, so assigning new data does not
+        return stale values.  The returned arrays and the data must not be
+        changed in place.
+        """
+        params = np.asarray(params, dtype=float)
+        key = (params.shape, params.tostring())
+        data = (self.endog, self.exog)
+        evals = self.__dict__.setdefault('_evals', [])
+        for i, (evalkey, evaldata, values) in enumerate(evals):
+            # the data are compared by identity, keeping references to them
+            # avoids matching new arrays that reuse the id of freed ones
+            if (evalkey == key and evaldata[0] is data[0] and
+                    evaldata[1] is data[1]):
+                if i:
+                    evals.insert(0, evals.pop(i))
+                break
+        else:
+            values = {}
+            evals.insert(0, (key, data, values))
+            del evals[self._cache_size:]
+        if name not in values:
+            values[name] = func(params)
+        return values[name]
+
+    def _linpred(self, params):
+        """
+        Returns the linear predictor XB, cached on `params`.
+        """
+        return self._cached('XB', params, lambda b: spdot(self.exog, b))
 
     def cdf(self, X):
         """
@@ -123,15 +173,162 @@ class DiscreteModel(LikelihoodModel):
         if start_params is None and isinstance(self, MNLogit):
             start_params = np.zeros((self.exog.shape[1]*\
                     (self.wendog.shape[1]-1)))
-        mlefit = super(DiscreteModel, self).fit(start_params=start_params,
-                method=method, maxiter=maxiter, full_output=full_output,
-                disp=disp, callback=callback, **kwargs)
+        if method.lower() in ['sgd', 'adam', 'svrg']:
+            mlefit = self._fit_stochastic(start_params=start_params,
+                    method=method.lower(), maxiter=maxiter,
+                    full_output=full_output, disp=disp, callback=callback,
+                    **kwargs)
+        else:
+            mlefit = super(DiscreteModel, self).fit(start_params=start_params,
+                    method=method, maxiter=maxiter, full_output=full_output,
+                    disp=disp, callback=callback, **kwargs)
         if isinstance(self, MNLogit):
             mlefit.params = mlefit.params.reshape(-1, self.exog.shape[1])
         discretefit = DiscreteResults(self, mlefit)
         return discretefit
+    fit.__doc__ += """
+        Stochastic methods
+        ------------------
+        `method` can also be 'sgd', 'adam' or 'svrg' for stochastic gradient
+        ascent, Adam or stochastic variance reduced gradient.  These iterate
+        over batches of consecutive rows, so that `exog` can be a large
+        memory-mapped array.  `maxiter` is the number of passes over the
+        data.  They take the optional arguments
+
+            batch_size : int
+                The number of rows in each batch.  The default is 1000.
+            learning_rate : float
+                The step size for the average score of a batch.  The default
+                is .1 for 'sgd' and 'svrg' and .01 for 'adam'.  For 'sgd' it
+                is divided by the square root of the pass number.
+            tol : float
+                The fit has converged when no parameter changes by more than
+                `tol` in a pass.  The default is 1e-6.
+            seed : int or None
+                Seed for the random order of the batches.
+
+        `fargs` are not supported.  The values computed for a batch are not
+        kept after its score is evaluated, so that only one batch is in
+        memory at a time.  The covariance of the parameters is the inverse of the negative
+        Hessian, which is summed over the batches in a final pass.
+        """
     fit.__doc__ += LikelihoodModel.fit.__doc__
 
+    def _subset(self, rows):
+        """
+        Returns a shallow copy of the model restricted to `rows` of the data.
+        """
+        sub = copy.copy(self)
+        sub.endog = self.endog[rows]
+        sub.exog = self.exog[rows]
+        if hasattr(self, 'wendog'):
+            sub.wendog = self.wendog[rows]
+        sub.nobs = float(sub.exog.shape[0])
+        sub._evals = []
+        return sub
+
+    def _batches(self, batch_size):
+        nobs = int(self.nobs)
+        return [slice(start, min(start+batch_size, nobs)) for start in
+                range(0, nobs, batch_size)]
+
+    def _fit_stochastic(self, start_params, method, maxiter, full_output,
+            disp, callback, fargs=(), retall=0, batch_size=1000,
+            learning_rate=None, tol=1e-6, seed=None, beta1=.9, beta2=.999,
+            epsilon=1e-8):
+        """
+        Fits the model with 'sgd', 'adam' or 'svrg'.  See fit.
+        """
+        if fargs:
+            raise ValueError, "fargs are not supported by %s" % method
+        def evaluate(sub, func, *args):
+            # drop the cached n-length arrays of the batch
+            values = func(*args)
+            del sub._evals[:]
+            return values
+        if start_params is None:
+            start_params = np.zeros(self.exog.shape[1])
+        if learning_rate is None:
+            learning_rate = {'sgd' : .1, 'adam' : .01, 'svrg' : .1}[method]
+        params = np.array(start_params, dtype=float)
+        batches = self._batches(batch_size)
+        batch_models = [self._subset(rows) for rows in batches]
+        # gradients are scaled by the batch size, not the number of rows
+        # in the last batch, so that all rows have the same weight
+        scale = 1. / batch_size
+        random_state = np.random.RandomState(seed)
+        if method == 'adam':
+            m = np.zeros_like(params)
+            v = np.zeros_like(params)
+        t = 0
+        converged = False
+        iterations = 0
+        if retall:
+            history = [params.copy()]
+        while iterations < maxiter:
+            oldparams = params.copy()
+            if method == 'svrg':
+                snapshot = params.copy()
+                mu = sum([evaluate(sub, sub.score, snapshot) for sub in
+                    batch_models]) * (1. / self.nobs)
+            for i in random_state.permutation(len(batches)):
+                sub = batch_models[i]
+                grad = evaluate(sub, sub.score, params) * scale
+                t += 1
+                if method == 'sgd':
+                    params += learning_rate / np.sqrt(iterations + 1) * grad
+                elif method == 'adam':
+                    m = beta1 * m + (1 - beta1) * grad
+                    v = beta2 * v + (1 - beta2) * grad**2
+                    mhat = m / (1 - beta1**t)
+                    vhat = v / (1 - beta2**t)
+                    params += learning_rate * mhat / (np.sqrt(vhat) + epsilon)
+                else:
+                    grad -= evaluate(sub, sub.score, snapshot) * scale
+                    params += learning_rate * (grad + mu)
+            iterations += 1
+            if retall:
+                history.append(params.copy())
+            if callback is not None:
+                callback(params)
+            if np.all(np.abs(params - oldparams) <= tol):
+                converged = True
+                break
+        # final pass for the loglikelihood, score and Hessian
+        llf, score, hessian = 0., 0., 0.
+        for sub in batch_models:
+            values = evaluate(sub, sub.loglike_and_derivatives, params, 2)
+            llf += values[0]
+            score += values[1]
+            hessian += values[2]
+        try:
+            Hinv = np.linalg.inv(-hessian)
+        except np.linalg.LinAlgError:
+            Hinv = None
+        warnflag = int(not converged)
+        if disp:
+            if converged:
+                print "Optimization terminated successfully."
+            else:
+                print "Warning: Maximum number of iterations has been \
+exceeded."
+            print "         Current function value: %f" % -llf
+            print "         Iterations: %d" % iterations
+        mlefit = LikelihoodModelResults(self, params, Hinv, scale=1.)
+        if full_output:
+            mlefit.mle_retvals = {'fopt' : -llf, 'iterations' : iterations,
+                    'score' : score, 'Hessian' : hessian,
+                    'warnflag' : warnflag, 'converged' : converged}
+            if retall:
+                mlefit.mle_retvals['allvecs'] = history
+        mlefit.mle_settings = {'optimizer' : method,
+                'start_params' : start_params, 'maxiter' : maxiter,
+                'full_output' : full_output, 'disp' : disp, 'fargs' : fargs,
+                'callback' : callback, 'retall' : retall,
+                'batch_size' : batch_size, 'learning_rate' : learning_rate,
+                'tol' : tol, 'seed' : seed}
+        return mlefit
+
 class Poisson(DiscreteModel):
     """
     Poisson model for count data
@@ -225,6 +422,13 @@ class Poisson(DiscreteModel):
 #        xb = np.dot(self.exog,params)
         return stats.poisson.pmf(y, np.exp(X))
 
+    def _lambda(self, params):
+        """
+        Returns the conditional mean exp(XB), cached on `params`.
+        """
+        return self._cached('lambda', params,
+                lambda b: np.exp(self._linpred(b)))
+
     def loglike(self, params):
         """
         Loglikelihood of Poisson model
@@ -242,9 +446,10 @@ class Poisson(DiscreteModel):
         --------
         .. math :: \\ln L=\\sum_{i=1}^{n}\\left[-\\lambda_{i}+y_{i}x_{i}^{\\prime}\\beta-\\ln y_{i}!\\right]
         """
-        XB = np.dot(self.exog, params)
+        XB = self._linpred(params)
         endog = self.endog
-        return np.sum(-np.exp(XB) +  endog*XB - np.log(factorial(endog)))
+        return np.sum(-self._lambda(params) +  endog*XB -
+                np.log(factorial(endog)))
 
     def score(self, params):
         """
@@ -269,8 +474,8 @@ class Poisson(DiscreteModel):
         """
 
         X = self.exog
-        L = np.exp(np.dot(X,params))
-        return np.dot(self.endog - L,X)
+        L = self._lambda(params)
+        return sptdot(X, self.endog - L)
 
     def hessian(self, params):
         """
@@ -295,8 +500,45 @@ class Poisson(DiscreteModel):
 
         """
         X = self.exog
-        L = np.exp(np.dot(X,params))
-        return -np.dot(L*X.T, X)
+        L = self._lambda(params)
+        return -spxtwx(X, L)
+
+    def loglikeobs(self, params):
+        """
+        Loglikelihood of each observation of the Poisson model.
+
+        See Poisson.loglike.
+        """
+        y = self.endog
+        return -self._lambda(params) + y*self._linpred(params) - \
+                np.log(factorial(y))
+
+    def score_obs(self, params):
+        """
+        Poisson model score of each observation.
+
+        Returns the nobs x k array (y_i - lambda_i) x_i.
+        """
+        return spwx(self.endog - self._lambda(params), self.exog)
+
+    def loglike_and_derivatives(self, params, order=2):
+        """
+        Poisson loglikelihood, score and Hessian evaluated at `params`.
+
+        See LikelihoodModel.loglike_and_derivatives.  XB and exp(XB) are
+        computed once.
+        """
+        _check_order(order)
+        X = self.exog
+        y = self.endog
+        XB = self._linpred(params)
+        L = self._lambda(params)
+        values = (np.sum(-L + y*XB - np.log(factorial(y))),)
+        if order > 0:
+            values += (sptdot(X, y - L),)
+        if order > 1:
+            values += (-spxtwx(X, L),)
+        return values
 
 #    def fit(self, start_params=None, maxiter=35, method='newton',
 #            tol=1e-08):
@@ -435,8 +677,8 @@ class Logit(DiscreteModel):
         logistic distribution is symmetric.
         """
         q = 2*self.endog - 1
-        X = self.exog
-        return np.sum(np.log(self.cdf(q*np.dot(X,params))))
+        return np.sum(np.log(self._cached('qcdf', params,
+            lambda b: self.cdf(q*self._linpred(b)))))
 
     def score(self, params):
         """
@@ -458,8 +700,8 @@ class Logit(DiscreteModel):
 
         y = self.endog
         X = self.exog
-        L = self.cdf(np.dot(X,params))
-        return np.dot(y - L,X)
+        L = self._cached('cdf', params, lambda b: self.cdf(self._linpred(b)))
+        return sptdot(X, y - L)
 
     def hessian(self, params):
         """
@@ -479,8 +721,48 @@ class Logit(DiscreteModel):
         .. math:: \\frac{\\partial^{2}\\ln L}{\\partial\\beta\\partial\\beta^{\\prime}}=-\\sum_{i}\\Lambda_{i}\\left(1-\\Lambda_{i}\\right)x_{i}x_{i}^{\\prime}
         """
         X = self.exog
-        L = self.cdf(np.dot(X,params))
-        return -np.dot(L*(1-L)*X.T,X)
+        L = self._cached('cdf', params, lambda b: self.cdf(self._linpred(b)))
+        return -spxtwx(X, L*(1-L))
+
+    def loglikeobs(self, params):
+        """
+        Loglikelihood of each observation of the logit model.
+
+        See Logit.loglike.
+        """
+        q = 2*self.endog - 1
+        return np.log(self._cached('qcdf', params,
+            lambda b: self.cdf(q*self._linpred(b))))
+
+    def score_obs(self, params):
+        """
+        Logit model score of each observation.
+
+        Returns the nobs x k array (y_i - Lambda_i) x_i.
+        """
+        L = self._cached('cdf', params, lambda b: self.cdf(self._linpred(b)))
+        return spwx(self.endog - L, self.exog)
+
+    def loglike_and_derivatives(self, params, order=2):
+        """
+        Logit loglikelihood, score and Hessian evaluated at `params`.
+
+        See LikelihoodModel.loglike_and_derivatives.  XB and the cdf are
+        computed once.
+        """
+        _check_order(order)
+        X = self.exog
+        y = self.endog
+        q = 2*y - 1
+        XB = self._linpred(params)
+        values = (np.sum(np.log(self._cached('qcdf', params,
+            lambda b: self.cdf(q*XB)))),)
+        if order > 0:
+            L = self._cached('cdf', params, lambda b: self.cdf(XB))
+            values += (sptdot(X, y - L),)
+        if order > 1:
+            values += (-spxtwx(X, L*(1-L)),)
+        return values
 
 #    def fit(self, start_params=None, maxiter=35, method='newton',
 #            tol=1e-08):
@@ -591,6 +873,22 @@ class Probit(DiscreteModel):
         X = np.asarray(X)
         return stats.norm.pdf(X)
 
+    def _qcdf(self, params):
+        """
+        Returns cdf(q*XB) with q = 2*y - 1, cached on `params`.
+        """
+        q = 2*self.endog - 1
+        return self._cached('qcdf', params,
+                lambda b: self.cdf(q*self._linpred(b)))
+
+    def _qpdf(self, params):
+        """
+        Returns pdf(q*XB) with q = 2*y - 1, cached on `params`.
+        """
+        q = 2*self.endog - 1
+        return self._cached('qpdf', params,
+                lambda b: self.pdf(q*self._linpred(b)))
+
 
     def loglike(self, params):
         """
@@ -613,10 +911,7 @@ class Probit(DiscreteModel):
         normal distribution is symmetric.
         """
 
-        q = 2*self.endog - 1
-        X = self.exog
-        return np.sum(np.log(np.clip(self.cdf(q*np.dot(X,params)),1e-20,
-            1)))
+        return np.sum(np.log(np.clip(self._qcdf(params),1e-20,1)))
 
     def score(self, params):
         """
@@ -640,11 +935,10 @@ class Probit(DiscreteModel):
         """
         y = self.endog
         X = self.exog
-        XB = np.dot(X,params)
         q = 2*y - 1
         # clip to get rid of invalid divide complaint
-        L = q*self.pdf(q*XB)/np.clip(self.cdf(q*XB), 1e-20, 1-1e-20)
-        return np.dot(L,X)
+        L = q*self._qpdf(params)/np.clip(self._qcdf(params), 1e-20, 1-1e-20)
+        return sptdot(X, L)
 
     def hessian(self, params):
         """
@@ -667,10 +961,49 @@ class Probit(DiscreteModel):
         and :math:`q=2y-1`
         """
         X = self.exog
-        XB = np.dot(X,params)
+        XB = self._linpred(params)
+        q = 2*self.endog - 1
+        L = q*self._qpdf(params)/self._qcdf(params)
+        return spxtwx(X, -L*(L+XB))
+
+    def loglikeobs(self, params):
+        """
+        Loglikelihood of each observation of the probit model.
+
+        See Probit.loglike.
+        """
+        return np.log(np.clip(self._qcdf(params), 1e-20, 1))
+
+    def score_obs(self, params):
+        """
+        Probit model score of each observation.
+
+        Returns the nobs x k array of the terms of Probit.score.
+        """
+        q = 2*self.endog - 1
+        L = q*self._qpdf(params)/np.clip(self._qcdf(params), 1e-20, 1-1e-20)
+        return spwx(L, self.exog)
+
+    def loglike_and_derivatives(self, params, order=2):
+        """
+        Probit loglikelihood, score and Hessian evaluated at `params`.
+
+        See LikelihoodModel.loglike_and_derivatives.  XB and the cdf and
+        pdf are computed once.
+        """
+        _check_order(order)
+        X = self.exog
         q = 2*self.endog - 1
-        L = q*self.pdf(q*XB)/self.cdf(q*XB)
-        return np.dot(-L*(L+XB)*X.T,X)
+        cdf = self._qcdf(params)
+        values = (np.sum(np.log(np.clip(cdf, 1e-20, 1))),)
+        if order > 0:
+            qpdf = q*self._qpdf(params)
+            # clip to get rid of invalid divide complaint
+            values += (sptdot(X, qpdf/np.clip(cdf, 1e-20, 1-1e-20)),)
+        if order > 1:
+            L = qpdf/cdf
+            values += (spxtwx(X, -L*(L+self._linpred(params))),)
+        return values
 
 #    def fit(self, start_params=None, maxiter=35, method='newton',
 #            tol=1e-08):
@@ -761,6 +1094,7 @@ class MNLogit(DiscreteModel):
     -----
     See developer notes for further information on `MNLogit` internals.
     """
+    _data_attr = DiscreteModel._data_attr + ['wendog']
 
     def initialize(self):
         """
@@ -769,6 +1103,9 @@ class MNLogit(DiscreteModel):
         Turns the endogenous variable into an array of dummies and assigns
         J and K.
         """
+        if sparse.issparse(self.exog):
+            raise ValueError, "MNLogit does not support a scipy.sparse " \
+                    "exog, use exog.toarray()"
         super(MNLogit, self).initialize()
         #This is also a "whiten" method as used in other models (eg regression)
         wendog, self.names = tools.categorical(self.endog, drop=True,
@@ -800,6 +1137,13 @@ class MNLogit(DiscreteModel):
         eXB = np.vstack((np.ones((1, self.nobs)), eXB))
         return eXB
 
+    def _prob(self, params):
+        """
+        Returns the probabilities cdf(exp(XB)), cached on `params`.
+        """
+        return self._cached('prob', params,
+                lambda b: self.cdf(self._eXB(b)))
+
     def pdf(self, eXB):
         """
         NotImplemented
@@ -848,8 +1192,7 @@ class MNLogit(DiscreteModel):
         if not.
         """
         d = self.wendog
-        eXB = self._eXB(params)
-        logprob = np.log(self.cdf(eXB))
+        logprob = np.log(self._prob(params))
         return (d.T * logprob).sum()
 
     def score(self, params):
@@ -875,11 +1218,10 @@ class MNLogit(DiscreteModel):
         In the multinomial model ths score matrix is K x J-1 but is returned
         as a flattened array to work with the solvers.
         """
-        eXB = self._eXB(params)
-        firstterm = self.wendog[:,1:].T - self.cdf(eXB)[1:,:]
+        firstterm = self.wendog[:,1:].T - self._prob(params)[1:,:]
         return np.dot(firstterm, self.exog).flatten()
 
-    def hessian(self, params):
+    def hessian(self, params, blocks=False):
         """
         Multinomial logit Hessian matrix of the log-likelihood
 
@@ -887,6 +1229,8 @@ class MNLogit(DiscreteModel):
         -----------
         params : array-like
             The parameters of the model
+        blocks : bool
+            If True, the Hessian is returned in block form.  See notes.
 
         Returns
         -------
@@ -902,28 +1246,81 @@ class MNLogit(DiscreteModel):
 
         The actual Hessian matrix has J**2 * K x K elements. Our Hessian
         is reshaped to be square (J*K, J*K) so that the solvers can use it.
+        If `blocks` is True, it is returned as a (J, J, K, K) array, where
+        H[j,l] is the K x K block for the parameters of equations j and l.
+
+        With :math:`z_{i}=p_{i}\\otimes x_{i}`, the Hessian is
+        :math:`\\sum_{i}z_{i}z_{i}^{\\prime}` minus the block diagonal
+        matrix with blocks :math:`\\sum_{i}p_{ij}x_{i}x_{i}^{\\prime}`.
+        Only the upper triangle of the first term is computed, in chunks of
+        rows, and it is mirrored.
+        """
+        return self._hessian_prob(self._prob(params), blocks)
 
-        This implementation does not take advantage of the symmetry of
-        the Hessian and could probably be refactored for speed.
+    def _hessian_prob(self, pr, blocks=False):
+        """
+        Returns the Hessian given the probabilities `pr`.
         """
         X = self.exog
-        eXB = self._eXB(params)
-        pr = self.cdf(eXB)
-        partials = []
-        J = self.wendog.shape[1] - 1
-        K = self.exog.shape[1]
-        for i in range(J):
-            for j in range(J): # this loop assumes we drop the first col.
-                if i == j:
-                    partials.append(\
-                        -np.dot((pr[i+1,:]*(1-pr[j+1,:]))[None,:]*X.T,X))
-                else:
-                    partials.append(-np.dot(pr[i+1,:]*-pr[j+1,:][None,:]*X.T,X))
-        H = np.array(partials)
-        # the developer's notes on multinomial should clear this math up
-        H = np.transpose(H.reshape(J,J,K,K), (0,2,1,3)).reshape(J*K,J*K)
+        nobs, K = X.shape
+        J = self.wendog.shape[1] - 1 # we drop the first col.
+        JK = J*K
+        pr = pr[1:]
+        H = np.zeros((JK, JK), order='F')
+        diag = np.zeros((K, JK))
+        chunksize = max(1, _CHUNK_ELEMENTS // JK)
+        for start in range(0, nobs, chunksize):
+            Xc = X[start:start+chunksize]
+            Z = (pr[:,start:start+chunksize].T[:,:,None] *\
+                    Xc[:,None,:]).reshape(-1, JK)
+            diag += np.dot(Xc.T, Z)
+            # Z.T is Fortran contiguous, so it is not copied
+            H = dsyrk(1., Z.T, beta=1., c=H, overwrite_c=1)
+        for j in range(J):
+            H[j*K:(j+1)*K,j*K:(j+1)*K] -= diag[:,j*K:(j+1)*K]
+        H = np.triu(H) + np.triu(H, 1).T
+        if blocks:
+            return H.reshape(J,K,J,K).transpose(0,2,1,3)
         return H
 
+    def loglikeobs(self, params):
+        """
+        Loglikelihood of each observation of the multinomial logit model.
+
+        See MNLogit.loglike.
+        """
+        return (self.wendog.T * np.log(self._prob(params))).sum(0)
+
+    def score_obs(self, params):
+        """
+        Multinomial logit score of each observation.
+
+        Returns the nobs x (J-1)*K array.  Row i is the flattened (J-1) x K
+        matrix of the terms of MNLogit.score, in the same order as score,
+        ie., row i reshaped to (J-1, K) has the equations in rows and the
+        regressors in columns.
+        """
+        firstterm = self.wendog[:,1:] - self._prob(params)[1:,:].T
+        X = self.exog
+        return (firstterm[:,:,None] * X[:,None,:]).reshape(X.shape[0], -1)
+
+    def loglike_and_derivatives(self, params, order=2):
+        """
+        Multinomial logit loglikelihood, score and Hessian at `params`.
+
+        See LikelihoodModel.loglike_and_derivatives.  The probabilities
+        are computed once.
+        """
+        _check_order(order)
+        pr = self._prob(params)
+        values = ((self.wendog.T * np.log(pr)).sum(),)
+        if order > 0:
+            firstterm = self.wendog[:,1:].T - pr[1:,:]
+            values += (np.dot(firstterm, self.exog).flatten(),)
+        if order > 1:
+            values += (self._hessian_prob(pr),)
+        return values
+
 #    def fit(self, start_params=None, maxiter=35, method='newton',
 #            tol=1e-08):
 #        """
@@ -1048,52 +1445,101 @@ class NegBinTwo(DiscreteModel):
 # See Cameron and Trivedi 1998 for a simplification of the above
 # writing a convenience function using the log summation, *might*
 # be more accurate
-        XB = np.dot(self.exog,params)
+        XB = spdot(self.exog,params)
         return np.sum(J - np.log(factorial(y)) - \
                 (y+a1)*np.log(1+alpha*np.exp(XB))+y*np.log(alpha)+y*XB)
 
     def score(self, params):
         """
         Score vector for NB2 model
+
+        The last element is the derivative with respect to alpha.
         """
-        import numdifftools as nd
-        y = self.endog
-        X = self.exog
-        jfun = nd.Jacobian(self.loglike)
-        return jfun(params)[-1]
-        dLda2 = jfun(params)[-1]
+        return self.loglike_and_derivatives(params, order=1)[1]
+
+    def hessian(self, params):
+        """
+        Hessian of NB2 model.
+
+        The last row and column are the derivatives with respect to alpha.
+        """
+        return self.loglike_and_derivatives(params, order=2)[2]
+
+    def loglikeobs(self, params):
+        """
+        Loglikelihood of each observation of the NB2 model.
+        """
+        params = np.asarray(params)
         alpha = params[-1]
-        params = params[:-1]
-        XB = np.dot(X,params)
-        mu = np.exp(XB)
         a1 = alpha**-1
-        f1 = lambda x: 1./((x-1)*x/2. + x*a1)
-        cond = y>0
-        dJ = np.piecewise(y, cond, [f1,1./a1])
-# if y_i < 1, this equals zero!  Not noted in C &T
-        dLdB = np.dot((y-mu)/(1+alpha*mu),X)
-        return dLdB
-#
-#        dLda = np.sum(1/alpha**2 * (np.log(1+alpha*mu) - dJ) + \
-#                (y-mu)/(alpha*(1+alpha*mu)))
-#        scorevec = np.zeros((len(dLdB)+1))
-#        scorevec[:-1] = dLdB
-#        scorevec[-1] = dLda
-#        scorevec[-1] = dLda2[-1]
-#        return scorevec
+        y = self.endog
+        XB = spdot(self.exog, params[:-1])
+        return special.gammaln(y+a1) - special.gammaln(a1) - \
+                np.log(factorial(y)) - (y+a1)*np.log(1+alpha*np.exp(XB)) + \
+                y*np.log(alpha) + y*XB
 
-    def hessian(self, params):
+    def score_obs(self, params):
         """
-        Hessian of NB2 model.  Currently uses numdifftools
+        Score of each observation of the NB2 model.
+
+        Returns the nobs x (k+1) array, the last column is the derivative
+        with respect to alpha.  See loglike_and_derivatives.
         """
-#        d2dBdB =
-#        d2da2 =
-        import numdifftools as nd
-        Hfun = nd.Jacobian(self.score)
-        return Hfun(params)[-1]
-# is the numerical hessian block diagonal?  or is it block diagonal by assumption?
+        params = np.asarray(params)
+        alpha = params[-1]
+        a1 = alpha**-1
+        y = self.endog
+        X = self.exog
+        mu = np.exp(spdot(X, params[:-1]))
+        amu = 1 + alpha*mu
+        dA = special.digamma(y+a1) - special.digamma(a1) - np.log(amu)
+        dLda = -a1**2*dA + (y-mu)/(alpha*amu)
+        return np.column_stack((spwx((y-mu)/amu, X), dLda))
+
+    def loglike_and_derivatives(self, params, order=2):
+        """
+        NB2 loglikelihood, score and Hessian evaluated at `params`.
+
+        See LikelihoodModel.loglike_and_derivatives.  The ancillary
+        parameter alpha is assumed to be the last element of `params`.
+
+        Notes
+        -----
+        With :math:`\\mu_{i}=\\exp\\left(x_{i}^{\\prime}\\beta\\right)`
 
-    def fit(self, start_params=None, maxiter=35, method='bfgs', tol=1e-08):
+        .. math:: \\frac{\\partial\\ln L}{\\partial\\beta}=\\sum_{i}\\frac{y_{i}-\\mu_{i}}{1+\\alpha\\mu_{i}}x_{i}
+
+        .. math:: \\frac{\\partial\\ln L}{\\partial\\alpha}=\\sum_{i}\\left[-\\frac{1}{\\alpha^{2}}\\left(\\psi\\left(y_{i}+\\alpha^{-1}\\right)-\\psi\\left(\\alpha^{-1}\\right)-\\ln\\left(1+\\alpha\\mu_{i}\\right)\\right)+\\frac{y_{i}-\\mu_{i}}{\\alpha\\left(1+\\alpha\\mu_{i}\\right)}\\right]
+        """
+        _check_order(order)
+        params = np.asarray(params)
+        alpha = params[-1]
+        a1 = alpha**-1
+        y = self.endog
+        X = self.exog
+        XB = spdot(X, params[:-1])
+        mu = np.exp(XB)
+        amu = 1 + alpha*mu
+        values = (np.sum(special.gammaln(y+a1) - special.gammaln(a1) -
+            np.log(factorial(y)) - (y+a1)*np.log(amu) + y*np.log(alpha) +
+            y*XB),)
+        if order > 0:
+            dA = special.digamma(y+a1) - special.digamma(a1) - np.log(amu)
+            dLdB = sptdot(X, (y-mu)/amu)
+            dLda = np.sum(-a1**2*dA + (y-mu)/(alpha*amu))
+            values += (np.r_[dLdB, dLda],)
+        if order > 1:
+            k = len(params)
+            H = np.empty((k,k))
+            H[:-1,:-1] = -spxtwx(X, mu*(1+alpha*y)/amu**2)
+            H[:-1,-1] = H[-1,:-1] = -sptdot(X, (y-mu)*mu/amu**2)
+            H[-1,-1] = np.sum(2*a1**3*dA + a1**4*(special.polygamma(1,y+a1) -
+                special.polygamma(1,a1)) + a1**2*mu/amu -
+                (y-mu)*(1+2*alpha*mu)/(alpha*amu)**2)
+            values += (H,)
+        return values
+
+    def fit(self, start_params=None, maxiter=35, method='newton', tol=1e-08):
 #        start_params = [0]*(self.exog.shape[1])+[1]
 # Use poisson fit as first guess.
         start_params = Poisson(self.endog, self.exog).fit().params
@@ -1171,6 +1617,10 @@ class DiscreteResults(LikelihoodModelResults):
         self._cache = resettable_cache()
         self.__dict__.update(mlefit.__dict__)
 
+    _data_attr = ['fittedvalues']
+    _keep_attr = ['bse', 'llf', 'llnull', 'llr', 'llr_pvalue', 'prsquared',
+            'aic', 'bic']
+
     @cache_readonly
     def bse(self):
         bse = np.sqrt(np.diag(self.cov_params()))
@@ -1205,7 +1655,7 @@ class DiscreteResults(LikelihoodModelResults):
 
     @cache_readonly
     def fittedvalues(self):
-        return np.dot(self.model.exog, self.params)
+        return spdot(self.model.exog, self.params)
 
     @cache_readonly
     def aic(self):
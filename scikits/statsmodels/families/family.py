@@ -260,6 +260,24 @@ class Family(object):
         """
         raise NotImplementedError
 
+    def loglikeobs(self, Y, mu, scale=1.):
+        """
+        The loglikelihood of each observation.
+
+        Parameters
+        ----------
+        `Y` : array
+            Usually the endogenous response variable.
+        `mu` : array
+            Usually but not always the fitted mean response variable.
+
+        Returns
+        -------
+        llf : array
+            The terms of `loglike` for each observation.  See loglike.
+        """
+        raise NotImplementedError
+
     def resid_anscombe(self, Y, mu):
         """
         The Anscome residuals.
@@ -365,9 +383,10 @@ class Poisson(Family):
 
         Notes
         -----
-        If a constant term is included it is defined as
+        `deviance` = 2*sum_i(Y*log(Y/mu) - (Y - mu))
 
-        `deviance` = 2*sum_i(Y*log(Y/mu))
+        If a constant term is included and the link is canonical, then
+        sum_i(Y - mu) is zero at the maximum likelihood estimate.
         '''
         if np.any(Y==0):
             retarr = np.zeros(Y.shape)
@@ -376,9 +395,9 @@ class Poisson(Family):
             YmuMasked = Ymu[mask]
             Ymasked = Y[mask]
             np.putmask(retarr, mask, Ymasked*np.log(YmuMasked)/scale)
-            return 2*np.sum(retarr)
+            return 2*np.sum(retarr - (Y-mu)/scale)
         else:
-            return 2*np.sum(Y*np.log(Y/mu))/scale
+            return 2*np.sum(Y*np.log(Y/mu) - (Y-mu))/scale
 
     def loglike(self, Y, mu, scale=1.):
         """
@@ -404,7 +423,15 @@ class Poisson(Family):
         llf = scale * sum(-mu + Y*log(mu) - gammaln(Y+1))
         where gammaln is the log gamma function
         """
-        return scale * np.sum(-mu + Y*np.log(mu)-special.gammaln(Y+1))
+        return np.sum(self.loglikeobs(Y, mu, scale))
+
+    def loglikeobs(self, Y, mu, scale=1.):
+        """
+        The loglikelihood of each observation for the Poisson family.
+
+        See loglike.
+        """
+        return scale * (-mu + Y*np.log(mu)-special.gammaln(Y+1))
 
     def resid_anscombe(self, Y, mu):
         """
@@ -559,8 +586,35 @@ class Gaussian(Family):
             return llf
         else:
         # Return the loglikelihood for Gaussian GLM
-            return np.sum((Y*mu-mu**2/2)/scale-Y**2/(2*scale)-\
-                    .5*np.log(2*np.pi*scale))
+            return np.sum(self.loglikeobs(Y, mu, scale))
+
+    def loglikeobs(self, Y, mu, scale=1.):
+        """
+        The loglikelihood of each observation for the Gaussian family.
+
+        Parameters
+        ----------
+        Y : array
+            Endogenous response variable
+        mu : array
+            Fitted mean response variable
+        scale : float, optional
+            The variance.  The default is 1.
+
+        Returns
+        -------
+        llf : array
+            The loglikelihood of each observation, for every link
+
+            `llf` = -(1/2.)*(log(2*pi*`scale`) + (`Y`-`mu`)**2/`scale`)
+
+        Notes
+        -----
+        Unlike loglike with the identity link, the variance is not
+        concentrated out.  With `scale` = SSR/nobs the terms sum to the
+        loglikelihood of OLS.
+        """
+        return -.5*(np.log(2*np.pi*scale) + (Y-mu)**2/scale)
 
     def resid_anscombe(self, Y, mu):
         """
@@ -714,7 +768,15 @@ class Gamma(Family):
             scale*gammaln(1/scale))
         where gammaln is the log gamma function.
         """
-        return - 1/scale * np.sum(Y/mu+np.log(mu)+(scale-1)*np.log(Y)\
+        return np.sum(self.loglikeobs(Y, mu, scale))
+
+    def loglikeobs(self, Y, mu, scale=1.):
+        """
+        The loglikelihood of each observation for the Gamma family.
+
+        See loglike.
+        """
+        return - 1/scale * (Y/mu+np.log(mu)+(scale-1)*np.log(Y)\
                 +np.log(scale)+scale*special.gammaln(1/scale))
 # in Stata scale is set to equal 1 for reporting llf
 # in R it's the dispersion, though there is a loss of precision vs. our
@@ -948,11 +1010,19 @@ class Binomial(Family):
         number of successes.
         """
 
+        return np.sum(self.loglikeobs(Y, mu, scale))
+
+    def loglikeobs(self, Y, mu, scale=1.):
+        """
+        The loglikelihood of each observation for the Binomial family.
+
+        See loglike.
+        """
         if np.shape(self.n) == () and self.n == 1:
-            return scale*np.sum(Y*np.log(mu/(1-mu))+np.log(1-mu))
+            return scale*(Y*np.log(mu/(1-mu))+np.log(1-mu))
         else:
             y=Y*self.n  #convert back to successes
-            return scale * np.sum(special.gammaln(self.n+1)-\
+            return scale * (special.gammaln(self.n+1)-\
                 special.gammaln(y+1)-special.gammaln(self.n-y+1)\
                 +y*np.log(mu/(1-mu))+self.n*np.log(1-mu))
 
@@ -1126,7 +1196,16 @@ class InverseGaussian(Family):
         `llf` = -(1/2.)*sum((Y-mu)**2/(Y*mu**2*scale) + log(scale*Y**3)\
                  + log(2*pi))
         """
-        return -.5 * np.sum((Y-mu)**2/(Y*mu**2*scale)\
+        return np.sum(self.loglikeobs(Y, mu, scale))
+
+    def loglikeobs(self, Y, mu, scale=1.):
+        """
+        The loglikelihood of each observation for the inverse Gaussian
+        family.
+
+        See loglike.
+        """
+        return -.5 * ((Y-mu)**2/(Y*mu**2*scale)\
                 + np.log(scale*Y**3) + np.log(2*np.pi))
 
     def resid_anscombe(self, Y, mu):
@@ -1321,15 +1400,24 @@ class NegativeBinomial(Family):
         where constant is defined as
         constant = gammaln(Y + 1/alpha) - gammaln(Y + 1) - gammaln(1/alpha)
         """
+        return np.sum(self.loglikeobs(Y, fittedvalues=fittedvalues))
+
+    def loglikeobs(self, Y, fittedvalues=None):
+        """
+        The loglikelihood of each observation for the negative binomial
+        family.
+
+        See loglike.
+        """
         # don't need to specify mu
         if fittedvalues is None:
             raise AttributeError, '''The loglikelihood for the negative binomial requires that the fitted values be provided via the `fittedvalues` keyword argument.'''
         constant = special.gammaln(Y + 1/self.alpha) - special.gammaln(Y+1)\
                     -special.gammaln(1/self.alpha)
-        return np.sum(Y*np.log(self.alpha*np.exp(fittedvalues)/\
+        return Y*np.log(self.alpha*np.exp(fittedvalues)/\
             (1 + self.alpha*np.exp(fittedvalues))) - \
             np.log(1+self.alpha*np.exp(fittedvalues))/self.alpha\
-            + constant)
+            + constant
 
     def resid_anscombe(self, Y, mu):
         """
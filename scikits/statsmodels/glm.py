@@ -19,8 +19,10 @@ McCullagh, P. and Nelder, J.A.  1989.  "Generalized Linear Models." 2nd ed.
 """
 
 import numpy as np
+from scipy import sparse
 import families, tools
-from regression import WLS#,GLS #might need for mlogit
+from tools import spdot, sptdot, spwx
+from regression import WLS, _ls_solve, _ls_solve_inplace#,GLS #might need for mlogit
 from model import LikelihoodModel, LikelihoodModelResults
 from decorators import *
 
@@ -38,7 +40,8 @@ class GLM(LikelihoodModel):
         1d array of endogenous response variable.  This array can be
         1d or 2d for Binomial family models.
     exog : array-like
-        n x p design / exogenous data array
+        n x p design / exogenous data array.  It can also be a scipy.sparse
+        matrix.
     family : family class instance
         The default is Gaussian.  To specify the binomial distribution
         family = sm.family.Binomial()
@@ -57,7 +60,9 @@ class GLM(LikelihoodModel):
     exog : array
         See Parameters.
     history : dict
-        Contains information about the iterations.
+        Contains information about the iterations.  The deviance is always
+        recorded, params and fittedvalues only if fit is called with
+        keep_history=True.
     iteration : int
         The number of iterations that fit has run.  Initialized at 0.
     family : family class instance
@@ -68,6 +73,7 @@ class GLM(LikelihoodModel):
         `p` x `p` normalized covariance of the design / exogenous data.
     pinv_wexog : array
         For GLM this is just the pseudo inverse of the original design.
+        It is only computed when it is first accessed.
     scale : float
         The estimate of the scale / dispersion.  Available after fit is called.
     scaletype : str
@@ -195,13 +201,19 @@ class GLM(LikelihoodModel):
         the specific distribution weighting functions.
 
     '''
+    _data_attr = ['endog', 'exog', 'mu', 'weights', 'data_weights', 'history',
+            '_pinv_wexog']
+    _init_keys = ['family']
 
     def __init__(self, endog, exog, family=families.Gaussian()):
         endog = np.asarray(endog)
-        exog = np.asarray(exog)
-        if endog.shape[0] != len(exog):
+        if sparse.issparse(exog):
+            exog = exog.tocsr()
+        else:
+            exog = np.asarray(exog)
+        if endog.shape[0] != exog.shape[0]:
             msg = "Size of endog (%s) does not match the shape of exog (%s)"
-            raise ValueError(msg % (endog.size, len(exog)))
+            raise ValueError(msg % (endog.size, exog.shape[0]))
         self.endog = endog
         self.exog = exog
         self.family = family
@@ -216,17 +228,61 @@ class GLM(LikelihoodModel):
         self.history = { 'fittedvalues' : [], 'params' : [np.inf],
                          'deviance' : [np.inf]}
         self.iteration = 0
-        self.pinv_wexog = np.linalg.pinv(self.exog)
-        self.normalized_cov_params = np.dot(self.pinv_wexog,
-                                        np.transpose(self.pinv_wexog))
-        self.df_model = tools.rank(self.exog)-1
-        self.df_resid = self.exog.shape[0] - tools.rank(self.exog)
+        self._pinv_wexog = None
+        self.data_weights = 1.
+        rank = tools.rank(self.exog)
+        self.df_model = rank - 1
+        self.df_resid = self.exog.shape[0] - rank
+
+    @property
+    def pinv_wexog(self):
+        if self._pinv_wexog is None:
+            exog = self.exog
+            if sparse.issparse(exog):
+                exog = exog.toarray()
+            self._pinv_wexog = np.linalg.pinv(exog)
+        return self._pinv_wexog
+
+    def _score_factor(self, params, scale):
+        """
+        Returns (endog - mu)/(link'(mu) * variance(mu) * scale) times the
+        data weights, the factor of x_i in the score of observation i.
+        """
+        family = self.family
+        mu = family.fitted(spdot(self.exog, params))
+        return self.data_weights * family.weights(mu) * \
+                family.link.deriv(mu) * (self.endog - mu) / scale
 
-    def score(self, params):
+    def score(self, params, scale=1.):
         """
-        Score matrix.  Not yet implemeneted
+        Score vector of the model evaluated at `params`.
+
+        This is the quasi-score sum_i (y_i - mu_i)/(link'(mu_i) *
+        variance(mu_i) * scale) x_i.  For the Binomial family with counts,
+        it is only correct after fit has transformed endog.
         """
-        raise NotImplementedError
+        return sptdot(self.exog, self._score_factor(params, scale))
+
+    def score_obs(self, params, scale=1.):
+        """
+        Score of each observation evaluated at `params`.
+
+        Returns the nobs x k array whose column sums are score(params).
+        """
+        return spwx(self._score_factor(params, scale), self.exog)
+
+    def loglikeobs(self, params, scale=1.):
+        """
+        Loglikelihood of each observation evaluated at `params`.
+
+        Unlike loglike, this takes the parameters and not the fitted mean.
+        See the `loglikeobs` method of the families.
+        """
+        family = self.family
+        eta = spdot(self.exog, params)
+        if isinstance(family, families.NegativeBinomial):
+            return family.loglikeobs(self.endog, fittedvalues=eta)
+        return family.loglikeobs(self.endog, family.fitted(eta), scale=scale)
 
     def loglike(self, *args):
         """
@@ -243,13 +299,14 @@ class GLM(LikelihoodModel):
         """
         raise NotImplementedError
 
-    def _update_history(self, tmp_result, mu):
+    def _update_history(self, params, eta, dev, keep_history):
         """
         Helper method to update history during iterative fit.
         """
-        self.history['params'].append(tmp_result.params)
-        self.history['fittedvalues'].append(tmp_result.fittedvalues)
-        self.history['deviance'].append(self.family.deviance(self.endog, mu))
+        if keep_history:
+            self.history['params'].append(params)
+            self.history['fittedvalues'].append(eta.copy())
+        self.history['deviance'].append(dev)
 
     def estimate_scale(self, mu):
         """
@@ -330,17 +387,23 @@ specify the params argument."
         if self._results is not None:
             params = self.results.params
         if linear:
-            return np.dot(exog, params)
+            return spdot(exog, params)
         else:
-            return self.family.fitted(np.dot(exog, params))
+            return self.family.fitted(spdot(exog, params))
 
     def fit(self, maxiter=100, method='IRLS', tol=1e-8, data_weights=1.,
-            scale=None):
+            scale=None, keep_history=False, start_params=None, start_mu=None,
+            conv='dev', keep_data=True):
         '''
         Fits a generalized linear model for a given family.
 
         parameters
         ----------
+        conv : string, optional
+            The convergence criterion.  "dev" is the absolute change in the
+            deviance, "rel_dev" the change in the deviance relative to
+            abs(deviance) + 0.1 as in R's glm, and "coefs" the largest
+            absolute change in the parameters.  The default is "dev".
          data_weights : array-like or scalar, only used with Binomial
             Number of trials for each observation. Used for only for
             binomial data when `endog` is specified as a 2d array of
@@ -360,7 +423,41 @@ specify the params argument."
             `dev` is the deviance divided by df_resid
         tol : float
             Convergence tolerance.  Default is 1e-8.
+        keep_history : bool, optional
+            If True, the params and fittedvalues of each iteration are kept
+            in `history`.  Default is False, only the deviance is kept.
+        start_params : array-like, optional
+            Starting values for the parameters, ie., the params of a previous
+            fit on similar data.  The default is to start from
+            `family.starting_mu`.
+        start_mu : array-like, optional
+            Starting values for the mean response.  Ignored if `start_params`
+            is given.
+        keep_data : bool
+            If False, remove_data is called on the results, so that they do
+            not hold a reference to the data or the history.
+
+        Returns
+        -------
+        A GLMResults class instance.  Its attribute `converged` is True if the
+        convergence criterion was met before `maxiter` iterations.
+
+        Notes
+        -----
+        Each IRLS step solves the weighted least squares problem directly.
+        The weighted design and response are written into a work array that
+        is allocated once, and they are overwritten in place by their QR
+        factorization.  See regression._ls_solve_inplace.  If `exog` is a
+        scipy.sparse matrix, the weighted design is kept sparse and each step
+        solves the sparse normal equations instead.
+
+        If the deviance increases or is not finite after a step, the step is
+        halved up to 10 times.  This is only done once there are previous
+        parameters, ie., after the first iteration or with `start_params`.
         '''
+        conv = conv.lower()
+        if not conv in ["dev", "rel_dev", "coefs"]:
+            raise ValueError, "Convergence argument %s not understood" % conv
         if np.shape(data_weights) != () and not isinstance(self.family,
                 families.Binomial):
             raise ValueError, "Data weights are only to be supplied for\
@@ -374,9 +471,21 @@ the Binomial family"
 # thisc checks what kind of data is given for Binomial.  family will need a reference to
 # endog if this is to be removed from the preprocessing
             self.endog = self.family.initialize(self.endog)
-        mu = self.family.starting_mu(self.endog)
-        wlsexog = self.exog
-        eta = self.family.predict(mu)
+        self.history = { 'fittedvalues' : [], 'params' : [np.inf],
+                         'deviance' : [np.inf]}
+        self.iteration = 0
+        exog = self.exog
+        params = None
+        if start_params is not None:
+            params = np.asarray(start_params, dtype=np.float64)
+            eta = spdot(exog, params)
+            mu = self.family.fitted(eta)
+        elif start_mu is not None:
+            mu = np.asarray(start_mu, dtype=np.float64)
+            eta = self.family.predict(mu)
+        else:
+            mu = self.family.starting_mu(self.endog)
+            eta = self.family.predict(mu)
         self.iteration += 1
         dev = self.family.deviance(self.endog, mu)
         if np.isnan(dev):
@@ -385,23 +494,68 @@ returned a nan.  This could be a boundary problem and should be reported."
         else:
             self.history['deviance'].append(dev)
             # first guess on the deviance is assumed to be scaled by 1.
-        while((np.fabs(self.history['deviance'][self.iteration]-\
-                    self.history['deviance'][self.iteration-1])) > tol and \
-                    self.iteration < maxiter):
+        nobs, k = exog.shape
+        if sparse.issparse(exog):
+            aug = None
+            wendog = np.empty(nobs, np.float64)
+        else:
+            # work array for the weighted design and response
+            aug = np.empty((nobs, k+1), np.float64, order='F')
+            wexog = aug[:,:k]
+            wendog = aug[:,k]
+        # The IRLS steps only decrease the deviance if the data weights are
+        # the numbers of trials used in the deviance.  Otherwise steps are
+        # only halved if the deviance is not finite.
+        monotone = not isinstance(self.family, families.Binomial) or \
+                np.all(self.family.n == data_weights)
+        converged = False
+        while self.iteration < maxiter:
             self.weights = data_weights*self.family.weights(mu)
-            wlsendog = eta + self.family.link.deriv(mu) * (self.endog-mu)
-                # - offset
-            wls_results = WLS(wlsendog, wlsexog, self.weights).fit()
-            eta = np.dot(self.exog, wls_results.params) # + offset
+            sqrt_weights = np.sqrt(self.weights)
+            # wendog = sqrt(weights) * (eta + link'(mu) * (endog - mu))
+            np.subtract(self.endog, mu, wendog)
+            wendog *= self.family.link.deriv(mu)
+            wendog += eta # - offset
+            wendog *= sqrt_weights
+            if aug is None:
+                wexog = sparse.spdiags(sqrt_weights, 0, nobs, nobs) * exog
+                new_params, normalized_cov_params, _ = _ls_solve(wexog,
+                        wendog)
+            else:
+                np.multiply(exog, sqrt_weights[:,None], wexog)
+                new_params, normalized_cov_params = _ls_solve_inplace(aug)
+            eta = spdot(exog, new_params) # + offset
             mu = self.family.fitted(eta)
-            self._update_history(wls_results, mu)
+            olddev = dev
+            dev = self.family.deviance(self.endog, mu)
+            if params is not None:
+                n_halving = 0
+                while (not np.isfinite(dev) or (monotone and
+                        dev - olddev > tol)) and n_halving < 10:
+                    new_params = (new_params + params) / 2.
+                    eta = spdot(exog, new_params)
+                    mu = self.family.fitted(eta)
+                    dev = self.family.deviance(self.endog, mu)
+                    n_halving += 1
+            self._update_history(new_params, eta, dev, keep_history)
             self.scale = self.estimate_scale(mu)
             self.iteration += 1
+            if conv == 'dev':
+                converged = np.fabs(dev - olddev) <= tol
+            elif conv == 'rel_dev':
+                converged = np.fabs(dev - olddev) / (np.fabs(dev) + .1) <= tol
+            elif params is not None:
+                converged = np.all(np.fabs(new_params - params) <= tol)
+            params = new_params
+            if converged:
+                break
         self.mu = mu
-        glm_results = GLMResults(self, wls_results.params,
-                wls_results.normalized_cov_params, self.scale)
-        glm_results.bse = np.sqrt(np.diag(wls_results.cov_params(\
-                scale=self.scale)))
+        self.normalized_cov_params = normalized_cov_params
+        glm_results = GLMResults(self, params, normalized_cov_params,
+                self.scale)
+        glm_results.converged = converged
+        if not keep_data:
+            glm_results.remove_data()
         return glm_results
 
 # doesn't make sense really if there are arguments to fit
@@ -544,10 +698,41 @@ class GLMResults(LikelihoodModelResults):
         self._data_weights = model.data_weights
         self.df_resid = model.df_resid
         self.df_model = model.df_model
-        self.pinv_wexog = model.pinv_wexog
         self._cache = resettable_cache()
 # are these intermediate results needed or can we just call the model's attributes?
 
+    _data_attr = ['_endog', 'mu', '_data_weights', 'resid_response',
+            'resid_pearson', 'resid_working', 'resid_anscombe',
+            'resid_deviance', 'fittedvalues', 'null', 'pinv_wexog']
+    _keep_attr = ['bse', 'deviance', 'null_deviance', 'pearson_chi2', 'llf',
+            'aic', 'bic']
+
+    def attach_data(self, endog, exog=None, data_weights=None, **kwds):
+        """
+        Attaches the data to results after remove_data.
+
+        `data_weights` are the data_weights given to fit, if they are not a
+        scalar.  See LikelihoodModelResults.attach_data.
+        """
+        super(GLMResults, self).attach_data(endog, exog, **kwds)
+        if data_weights is not None:
+            self.model.data_weights = self._data_weights = data_weights
+
+    def _attach_data(self):
+        model = self.model
+        model.mu = model.family.fitted(spdot(model.exog, self.params))
+        self._endog = model.endog
+        self.mu = model.mu
+        self._data_weights = model.data_weights
+
+    @cache_readonly
+    def pinv_wexog(self):
+        return self.model.pinv_wexog
+
+    @cache_readonly
+    def bse(self):
+        return np.sqrt(np.diag(self.cov_params()))
+
     @cache_readonly
     def resid_response(self):
         return self._data_weights * (self._endog-self.mu)
@@ -602,7 +787,7 @@ class GLMResults(LikelihoodModelResults):
         _modelfamily = self.family
         if isinstance(_modelfamily, families.NegativeBinomial):
             val = _modelfamily.loglike(self.model.endog,
-                        fittedvalues = np.dot(self.model.exog,self.params))
+                        fittedvalues = spdot(self.model.exog,self.params))
         else:
             val = _modelfamily.loglike(self._endog, self.mu,
                                     scale=self.scale)
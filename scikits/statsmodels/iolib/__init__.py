@@ -1,2 +1,3 @@
 from foreign import StataReader, genfromdta
 from table import SimpleTable, csv2st
+from resultsio import load
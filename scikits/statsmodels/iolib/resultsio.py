@@ -0,0 +1,315 @@
+"""
+Compact binary files for fitted results.
+
+save writes the estimates and the summary statistics of a results instance
+into a small binary file.  load restores a results instance without the
+data, which can be used for predict, t_test, f_test and conf_int.
+
+Only numbers, strings and the family of a GLM are written.  The data, the
+optimizer settings and any callbacks are not, so that the files are small
+and load quickly.  The family is written as the class names of the family
+and its link with their numeric parameters, and nothing is unpickled, so
+loading a file does not execute code from it.  Only classes of
+scikits.statsmodels are restored.
+
+The file starts with the 8 byte MAGIC and the length of the header as a
+little-endian uint64.  The header has one line per attribute with the
+tab-separated name, type, shape and value.  All numbers are stored as
+float64 in one block after the header that starts at a multiple of 8 bytes,
+the value in the header is the offset into the block.  Strings are stored
+in the header.  The block can be memory mapped.
+"""
+
+import inspect
+import struct
+import numpy as np
+from scipy import stats
+from scikits.statsmodels.decorators import resettable_cache, CachedAttribute
+from scikits.statsmodels.families import family as F, links as L
+
+__all__ = ['save', 'load']
+
+MAGIC = '\x93SMRES\x01\x00'
+
+# the prefix of the names that are attributes of the model
+_MODEL_PREFIX = 'model_'
+# the names of the family and its link and the prefixes of their parameters
+_FAMILY = 'family'
+_LINK = 'family.link'
+
+def _is_plain(value):
+    """
+    True if value is a number or a string, which are written by save.
+    """
+    return isinstance(value, (bool, int, long, float, str, np.number,
+        np.bool_))
+
+def _class_path(obj):
+    cls = obj.__class__
+    return '%s.%s' % (cls.__module__, cls.__name__)
+
+def _import_class(path):
+    module, name = path.rsplit('.', 1)
+    if not module.startswith('scikits.statsmodels.'):
+        raise ValueError, "%s is not a class of scikits.statsmodels" % path
+    cls = getattr(__import__(module, {}, {}, [name]), name, None)
+    if not isinstance(cls, type):
+        raise ValueError, "%s is not a class" % path
+    return cls
+
+def _params(obj):
+    """
+    Returns the numeric parameters of a family or link as (name, value).
+
+    The distribution of a CDFLink is written as its name in scipy.stats.
+    Array parameters, ie., n of a fitted Binomial, depend on the data and
+    are not written.
+    """
+    items = []
+    for name, value in sorted(obj.__dict__.iteritems()):
+        if isinstance(value, stats.rv_continuous):
+            items.append((name, value.name))
+        elif _is_plain(value) and not isinstance(value, str):
+            items.append((name, value))
+    return items
+
+def _family_items(family):
+    link = family.link
+    items = [(_FAMILY, family.__class__.__name__),
+             (_LINK, link.__class__.__name__)]
+    items += [(_FAMILY + '.' + name, value) for name, value in
+            _params(family)]
+    items += [(_LINK + '.' + name, value) for name, value in _params(link)]
+    return items
+
+def _init_kwds(cls, params):
+    """
+    Returns the parameters that are arguments of cls.__init__.
+    """
+    try:
+        args = inspect.getargspec(cls.__init__)[0]
+    except TypeError: # object.__init__
+        args = []
+    return dict([(name, value) for name, value in params.iteritems()
+        if name in args])
+
+def _restore_family(values):
+    """
+    Creates the family from the class names and parameters in values.
+
+    The names are looked up in families.family and families.links only.
+    """
+    family_class = getattr(F, values.pop(_FAMILY), None)
+    link_class = getattr(L, values.pop(_LINK), None)
+    if not (isinstance(family_class, type) and issubclass(family_class,
+            F.Family)):
+        raise ValueError, "the family is not a family of families.family"
+    if not (isinstance(link_class, type) and issubclass(link_class,
+            (L.Link, L.NegativeBinomial))):
+        raise ValueError, "the link is not a link of families.links"
+    family_params, link_params = {}, {}
+    for name in values.keys():
+        if name.startswith(_LINK + '.'):
+            link_params[name[len(_LINK) + 1:]] = values.pop(name)
+        elif name.startswith(_FAMILY + '.'):
+            family_params[name[len(_FAMILY) + 1:]] = values.pop(name)
+    if 'dbn' in link_params:
+        dbn = getattr(stats, link_params['dbn'], None)
+        if not isinstance(dbn, stats.rv_continuous):
+            raise ValueError, "%s is not a distribution of scipy.stats" % \
+                    link_params['dbn']
+        link_params['dbn'] = dbn
+    link = link_class(**_init_kwds(link_class, link_params))
+    link.__dict__.update(link_params)
+    family_kwds = _init_kwds(family_class, family_params)
+    family_kwds['link'] = link
+    family = family_class(**family_kwds)
+    family.__dict__.update(family_params)
+    return family
+
+def _is_cached(cls, name):
+    """
+    True if name is a cached attribute of cls, see decorators.
+    """
+    for klass in cls.__mro__:
+        if name in klass.__dict__:
+            return isinstance(klass.__dict__[name], CachedAttribute)
+    return False
+
+def _collect(results):
+    """
+    Returns a list of (name, value) of what is written for results.
+    """
+    items = [('results_class', _class_path(results)),
+             ('model_class', _class_path(results.model)),
+             ('params', np.asarray(results.params, float)),
+             ('normalized_cov_params',
+                 np.asarray(results.normalized_cov_params, float))]
+    stats = {}
+    for name in ['scale'] + list(getattr(results, '_keep_attr', [])):
+        value = getattr(results, name)
+        if value is not None:
+            stats[name] = value
+    for name, value in results.__dict__.iteritems():
+        if _is_plain(value) and name not in stats:
+            stats[name] = value
+    items += sorted(stats.items())
+    model = results.model
+    for name, value in sorted(model.__dict__.iteritems()):
+        if _is_plain(value) or name in ['exog_names', 'endog_names']:
+            items.append((_MODEL_PREFIX + name, value))
+    # the data arguments that attach_data requires
+    removed = getattr(model, '_removed_data', None)
+    if removed is None:
+        removed = model._remove_data()._removed_data
+    items.append((_MODEL_PREFIX + '_removed_data', removed))
+    family = getattr(model, 'family', None)
+    if family is not None:
+        items += _family_items(family)
+    return items
+
+def _encode(name, value, offset):
+    """
+    Returns the header line for value and the numbers for the data block.
+    """
+    if isinstance(value, str):
+        return '\t'.join([name, 's', '', value.encode('string_escape')]), []
+    if isinstance(value, (list, tuple)):
+        value = '\t'.join([str(v).encode('string_escape') for v in value])
+        return '\t'.join([name, 'l', '', value]), []
+    value = np.asarray(value)
+    if value.dtype.kind == 'b':
+        kind = 'b'
+    elif value.dtype.kind in 'iu':
+        kind = 'i'
+    else:
+        kind = 'f'
+    shape = ','.join([str(n) for n in value.shape])
+    return '\t'.join([name, kind, shape, str(offset)]), value.ravel()
+
+def save(results, path):
+    """
+    Writes results to a compact binary file.
+
+    Parameters
+    ----------
+    results : LikelihoodModelResults instance
+        The results of a fit, ie., of OLS, GLM, RLM or Logit.
+    path : str
+        The file name.
+
+    Notes
+    -----
+    The parameters, normalized_cov_params, scale and the statistics in the
+    `_keep_attr` of the results are written, together with the scalar
+    attributes of the results and the model, the names of the variables and
+    the family of a GLM.  Computing the statistics needs the data, unless
+    remove_data was called.
+    """
+    lines = []
+    numbers = []
+    offset = 0
+    for name, value in _collect(results):
+        line, values = _encode(name, value, offset)
+        lines.append(line)
+        numbers.append(np.asarray(values, dtype='<f8'))
+        offset += len(values)
+    header = '\n'.join(lines)
+    # the data block starts at a multiple of 8 bytes
+    header += '\n' * (-(len(header) + 16) % 8)
+    f = open(path, 'wb')
+    try:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        f.write(np.concatenate(numbers + [np.zeros(0, '<f8')]).tostring())
+    finally:
+        f.close()
+
+def load(path, mmap_mode=None):
+    """
+    Loads results written by save.
+
+    Parameters
+    ----------
+    path : str
+        The file name.
+    mmap_mode : None or 'r'
+        If 'r', the arrays are read-only views of the memory mapped file.
+        Otherwise they are read-only views of the bytes that were read.
+
+    Returns
+    -------
+    A results instance of the saved class whose model has no data.  The
+    saved statistics, ie., bse, are available, predict, t_test, f_test and
+    conf_int work, statistics that need the data do not.
+    """
+    f = open(path, 'rb')
+    try:
+        if mmap_mode is None:
+            content = f.read()
+        else:
+            content = f.read(16)
+        if len(content) < 16 or content[:8] != MAGIC:
+            raise ValueError, "%s is not a results file" % path
+        start = 16 + struct.unpack('<Q', content[8:16])[0]
+        if mmap_mode is None:
+            header = content[16:start]
+            block = np.frombuffer(content, '<f8', offset=start)
+        else:
+            header = f.read(start - 16)
+    finally:
+        f.close()
+    if mmap_mode is not None:
+        block = np.memmap(path, '<f8', mode=mmap_mode, offset=start)
+
+    values = {}
+    for line in header.split('\n'):
+        if not line:
+            continue
+        name, kind, shape, value = line.split('\t', 3)
+        if kind == 's':
+            value = value.decode('string_escape')
+        elif kind == 'l':
+            value = [v.decode('string_escape') for v in value.split('\t')
+                    ] if value else []
+        elif not shape:
+            value = {'f' : float, 'i' : int, 'b' : bool}[kind](
+                    block[int(value)])
+        else:
+            shape = tuple([int(n) for n in shape.split(',')])
+            size = int(np.prod(shape))
+            offset = int(value)
+            value = block[offset:offset+size].reshape(shape)
+            if kind != 'f':
+                value = value.astype(kind == 'b' and bool or int)
+        values[name] = value
+    return _restore(values)
+
+def _restore(values):
+    results_class = _import_class(values.pop('results_class'))
+    model_class = _import_class(values.pop('model_class'))
+    family = None
+    if _FAMILY in values:
+        family = _restore_family(values)
+    model = model_class.__new__(model_class)
+    for name in getattr(model_class, '_data_attr', []):
+        model.__dict__[name] = None
+    results = results_class.__new__(results_class)
+    cache = resettable_cache()
+    results.__dict__['_cache'] = cache
+    if family is not None:
+        model.family = family
+    for name, value in values.iteritems():
+        if name.startswith(_MODEL_PREFIX):
+            model.__dict__[name[len(_MODEL_PREFIX):]] = value
+        elif _is_cached(results_class, name):
+            # dict.__setitem__ does not reset the dependent statistics
+            dict.__setitem__(cache, name, value)
+        else:
+            results.__dict__[name] = value
+    results.__dict__['model'] = model
+    model._results = results
+    if not isinstance(getattr(model_class, 'results', None), property):
+        model.results = results
+    return results
@@ -0,0 +1,143 @@
+"""
+Tests for iolib/resultsio.py
+"""
+
+from numpy.testing import *
+import numpy as np
+import scikits.statsmodels as sm
+import os
+import tempfile
+
+DECIMAL_7 = 7
+
+class CheckSaveLoad(object):
+
+    def setup(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.res1.save(self.path)
+        self.res2 = sm.iolib.load(self.path)
+
+    def teardown(self):
+        os.remove(self.path)
+
+    def test_class(self):
+        assert_equal(type(self.res2), type(self.res1))
+        assert_equal(type(self.res2.model), type(self.res1.model))
+
+    def test_params(self):
+        assert_almost_equal(self.res2.params, self.res1.params, DECIMAL_7)
+        assert_almost_equal(self.res2.bse, self.res1.bse, DECIMAL_7)
+        assert_almost_equal(self.res2.cov_params(), self.res1.cov_params(),
+                DECIMAL_7)
+
+    def test_keep_attr(self):
+        for name in self.res1._keep_attr:
+            assert_almost_equal(getattr(self.res2, name),
+                    getattr(self.res1, name), DECIMAL_7)
+
+    def test_inference(self):
+        k = len(self.res1.params)
+        assert_almost_equal(self.res2.conf_int(), self.res1.conf_int(),
+                DECIMAL_7)
+        assert_almost_equal(self.res2.t_test(np.eye(k)[1]).tvalue,
+                self.res1.t_test(np.eye(k)[1]).tvalue, DECIMAL_7)
+        assert_almost_equal(self.res2.f_test(np.eye(k)[1:3]).fvalue,
+                self.res1.f_test(np.eye(k)[1:3]).fvalue, DECIMAL_7)
+
+    def test_mmap(self):
+        res2 = sm.iolib.load(self.path, mmap_mode='r')
+        assert_almost_equal(res2.params, self.res1.params, DECIMAL_7)
+
+class TestOLS(CheckSaveLoad):
+    def __init__(self):
+        data = sm.datasets.longley.load()
+        self.exog = sm.add_constant(data.exog)
+        self.res1 = sm.OLS(data.endog, self.exog).fit()
+
+    def test_predict(self):
+        assert_almost_equal(self.res2.model.predict(self.exog),
+                self.res1.fittedvalues, DECIMAL_7)
+        assert_equal(self.res2.model.exog_names, self.res1.model.exog_names)
+
+class TestGLM(CheckSaveLoad):
+    def __init__(self):
+        data = sm.datasets.cpunish.load()
+        self.exog = sm.add_constant(data.exog)
+        self.res1 = sm.GLM(data.endog, self.exog,
+                family=sm.families.Poisson()).fit(keep_data=False)
+
+    def test_predict(self):
+        assert_(isinstance(self.res2.model.family, sm.families.Poisson))
+        assert_almost_equal(self.res2.model.predict(self.exog),
+                np.exp(np.dot(self.exog, self.res1.params)), DECIMAL_7)
+
+class TestGLS(CheckSaveLoad):
+    def __init__(self):
+        data = sm.datasets.longley.load()
+        self.data = data
+        self.exog = sm.add_constant(data.exog)
+        self.sigma = np.arange(1, 17.)
+        self.res1 = sm.GLS(data.endog, self.exog, sigma=self.sigma).fit()
+
+    def test_attach_data(self):
+        assert_raises(ValueError, self.res2.attach_data, self.data.endog,
+                self.exog)
+        self.res2.attach_data(self.data.endog, self.exog, sigma=self.sigma)
+        assert_almost_equal(self.res2.wresid, self.res1.wresid, DECIMAL_7)
+
+class TestGLMProbit(CheckSaveLoad):
+    def __init__(self):
+        data = sm.datasets.spector.load()
+        self.exog = sm.add_constant(data.exog)
+        self.res1 = sm.GLM(data.endog, self.exog, family=sm.families.Binomial(
+            link=sm.families.links.probit)).fit()
+
+    def test_family(self):
+        family = self.res2.model.family
+        assert_(isinstance(family, sm.families.Binomial))
+        assert_(isinstance(family.link, sm.families.links.CDFLink))
+        assert_equal(family.link.dbn.name, 'norm')
+        assert_almost_equal(self.res2.model.predict(self.exog),
+                self.res1.model.predict(self.exog), DECIMAL_7)
+
+class TestGLMGammaPower(CheckSaveLoad):
+    def __init__(self):
+        data = sm.datasets.scotland.load()
+        self.exog = sm.add_constant(data.exog)
+        self.res1 = sm.GLM(data.endog, self.exog, family=sm.families.Gamma(
+            link=sm.families.links.Power(power=-.5))).fit()
+
+    def test_family(self):
+        link = self.res2.model.family.link
+        assert_(isinstance(link, sm.families.links.Power))
+        assert_equal(link.power, -.5)
+
+def test_load_errors():
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        open(path, 'wb').write('SMRES')
+        assert_raises(ValueError, sm.iolib.load, path)
+        data = sm.datasets.cpunish.load()
+        res = sm.GLM(data.endog, sm.add_constant(data.exog),
+                family=sm.families.Poisson()).fit()
+        res.save(path)
+        content = open(path, 'rb').read()
+        # only families of families.family are restored, the replacement
+        # keeps the length of the header
+        open(path, 'wb').write(content.replace('family\ts\t\tPoisson',
+            'family\ts\t\tnp.load'))
+        assert_raises(ValueError, sm.iolib.load, path)
+    finally:
+        os.remove(path)
+
+class TestLogit(CheckSaveLoad):
+    def __init__(self):
+        data = sm.datasets.spector.load()
+        self.res1 = sm.Logit(data.endog, sm.add_constant(data.exog)).fit(
+                disp=0)
+
+if __name__ == "__main__":
+    import nose
+    nose.runmodule(argv=[__file__, '-vvs', '-x', '--pdb'], exit=False)
@@ -1,7 +1,10 @@
+import copy
 import numpy as np
 from scipy.stats import t, norm
-from scipy import optimize, derivative
+from scipy import optimize, derivative, sparse
+from scipy.linalg import cho_factor, cho_solve, LinAlgError
 from tools import recipr
+from numdiff import approx_fprime, approx_hess, _approx_hess_grad
 from contrast import ContrastResults
 
 class Model(object):
@@ -15,7 +18,8 @@ class Model(object):
     endog : array-like
         Endogenous response variable.
     exog : array-like
-        Exogenous design.
+        Exogenous design.  It can also be a scipy.sparse matrix, which is
+        stored in CSR format.
 
     Methods
     -------
@@ -33,6 +37,13 @@ class Model(object):
 
     _results = None
 
+    # the attributes that hold data, ie., n-length arrays.  They are dropped
+    # from the copy of the model that results keep after remove_data.
+    _data_attr = ['endog', 'exog']
+    # the constructor arguments, other than endog and exog, that are kept as
+    # attributes of the same name.  They are reused by attach_data.
+    _init_keys = []
+
     def __init__(self, endog, exog=None):
         endog = np.asarray(endog)
         endog = np.squeeze(endog) # for consistent outputs if endog is (n,1)
@@ -43,16 +54,22 @@ class Model(object):
 ##        if np.issubdtype(exog.dtype, int):
 ##            endog = exog.astype(float)
         if not exog is None:
-            exog = np.asarray(exog)
-            if exog.ndim == 1:
-                exog = exog[:,None]
-            if exog.ndim != 2:
-                raise ValueError, "exog is not 1d or 2d"
+            if sparse.issparse(exog):
+                exog = exog.tocsr()
+                exog_var = np.asarray(exog.multiply(exog).mean(0)).ravel() - \
+                        np.asarray(exog.mean(0)).ravel()**2
+            else:
+                exog = np.asarray(exog)
+                if exog.ndim == 1:
+                    exog = exog[:,None]
+                if exog.ndim != 2:
+                    raise ValueError, "exog is not 1d or 2d"
+                exog_var = exog.var(0)
             if endog.shape[0] != exog.shape[0]:
                 raise ValueError, "endog and exog matrices are not aligned."
-            if np.any(exog.var(0) == 0):
+            if np.any(exog_var == 0):
                 # assumes one constant in first or last position
-                const_idx = np.where(exog.var(0) == 0)[0].item()
+                const_idx = np.where(exog_var == 0)[0].item()
                 if const_idx == exog.shape[1] - 1:
                     exog_names = ['x%d' % i for i in range(1,exog.shape[1])]
                     exog_names += ['const']
@@ -83,6 +100,96 @@ class Model(object):
         """
         raise NotImplementedError
 
+    def _remove_data(self):
+        """
+        Returns a shallow copy of the model without the data.
+
+        The attributes in _data_attr are set to None unless they are scalars.
+        Their names are kept in _removed_data.
+        """
+        model = copy.copy(self)
+        removed = []
+        for name in self._data_attr:
+            value = model.__dict__.get(name, None)
+            if value is None or np.isscalar(value) or (isinstance(value,
+                    np.ndarray) and value.ndim == 0):
+                continue
+            setattr(model, name, None)
+            removed.append(name)
+        model._removed_data = removed
+        return model
+
+# the maximum number of step halvings in each Newton iteration
+_MAX_HALVINGS = 20
+
+def _cho_factor_neg(H):
+    """
+    Returns the Cholesky factorization of -H or None if -H is not positive
+    definite or not finite.
+    """
+    try:
+        return cho_factor(-H)
+    except (LinAlgError, ValueError):
+        return None
+
+def _newton_step(H, g, cho=None):
+    """
+    Returns the Newton step -inv(H) g.
+
+    The step is solved with the Cholesky factorization of -H if `cho` is
+    given and with a general solve otherwise.  The inverse of H is never
+    formed.
+    """
+    if cho is not None:
+        return cho_solve(cho, g)
+    try:
+        return -np.linalg.solve(H, g)
+    except LinAlgError:
+        return -np.dot(np.linalg.pinv(H), g)
+
+def _check_order(order):
+    if order not in [0, 1, 2]:
+        raise ValueError, "order must be 0, 1 or 2, got %s" % order
+
+class _Evaluations(object):
+    """
+    Shares the evaluations of the loglikelihood and its derivatives between
+    the objective, gradient and Hessian callables given to an optimizer.
+
+    The values at the last params are kept.  A call for the same params
+    only evaluates the model again if a higher derivative is needed.  At a
+    new point, at least `order` derivatives are evaluated in one call to
+    `model.loglike_and_derivatives`.
+    """
+    def __init__(self, model, order=0, fargs=()):
+        self.model = model
+        self.order = order
+        self.fargs = fargs
+        self._key = None
+        self._values = ()
+
+    def evaluate(self, params, order):
+        model = self.model
+        if self.fargs:
+            # extra arguments are only passed to loglike
+            values = (model.loglike(params, *self.fargs),)
+            if order > 0:
+                values += (model.score(params),)
+            if order > 1:
+                values += (model.hessian(params),)
+            return values
+        return model.loglike_and_derivatives(params, order)
+
+    def __call__(self, params, order):
+        params = np.asarray(params, dtype=float)
+        key = (params.shape, params.tostring())
+        if key != self._key:
+            self._values = self.evaluate(params, max(order, self.order))
+            self._key = key
+        elif len(self._values) <= order:
+            self._values = self.evaluate(params, order)
+        return self._values[order]
+
 class LikelihoodModel(Model):
     """
     Likelihood model is a subclass of Model.
@@ -116,6 +223,23 @@ class LikelihoodModel(Model):
         """
         raise NotImplementedError
 
+    def loglikeobs(self, params):
+        """
+        Log-likelihood of each observation.
+
+        Returns an array of length nobs that sums to loglike(params).
+        """
+        raise NotImplementedError
+
+    def score_obs(self, params):
+        """
+        Score of each observation.
+
+        Returns the nobs x k array of the gradient contributions of the
+        observations, whose column sums are score(params).
+        """
+        raise NotImplementedError
+
     def information(self, params):
         """
         Fisher information matrix of model
@@ -130,6 +254,49 @@ class LikelihoodModel(Model):
         """
         raise NotImplementedError
 
+    def _opg(self, params):
+        """
+        Returns the score and minus the outer product of the gradients.
+
+        The scores of the observations are approximated from loglikeobs if
+        the model does not implement score_obs.
+        """
+        try:
+            score_obs = self.score_obs(params)
+        except NotImplementedError:
+            score_obs = approx_fprime(params, self.loglikeobs, centered=True)
+        return score_obs.sum(0), -np.dot(score_obs.T, score_obs)
+
+    def loglike_and_derivatives(self, params, order=2):
+        """
+        The loglikelihood and its derivatives evaluated at params.
+
+        Parameters
+        ----------
+        params : array-like
+            The parameters of the model.
+        order : int {0, 1, 2}
+            The number of derivatives to return.
+
+        Returns
+        -------
+        A tuple (loglike,) if `order` is 0, (loglike, score) if `order` is 1
+        and (loglike, score, hessian) if `order` is 2.
+
+        Notes
+        -----
+        This calls loglike, score and hessian.  Models can override it to
+        compute the intermediate results, ie., the linear predictor, only
+        once.  It is used by fit.
+        """
+        _check_order(order)
+        values = (self.loglike(params),)
+        if order > 0:
+            values += (self.score(params),)
+        if order > 1:
+            values += (self.hessian(params),)
+        return values
+
     def fit(self, start_params=None, method='newton', maxiter=100, full_output=1,
             disp=1, fargs=(), callback=None, retall=0, **kwargs):
         """
@@ -140,8 +307,9 @@ class LikelihoodModel(Model):
         start_params : array-like, optional
             Initial guess of the solution for the loglikelihood maximization.
             The default is an array of zeros.
-        method : str {'newton','nm','bfgs','powell','cg', or 'ncg'}
-            Method can be 'newton' for Newton-Raphson, 'nm' for Nelder-Mead,
+        method : str {'newton','bhhh','nm','bfgs','powell','cg', or 'ncg'}
+            Method can be 'newton' for Newton-Raphson, 'bhhh' for Berndt-Hall-
+            Hall-Hausman, 'nm' for Nelder-Mead,
             'bfgs' for Broyden-Fletcher-Goldfarb-Shanno, 'powell' for modified
             Powell's method, 'cg' for conjugate gradient, or 'ncg' for Newton-
             conjugate gradient. `method` determines which solver from
@@ -174,6 +342,18 @@ class LikelihoodModel(Model):
             'newton'
                 tol : float
                     Relative error in params acceptable for convergence.
+                Each step is solved with the Cholesky factorization of the
+                negative Hessian, and it is halved until the loglikelihood
+                does not decrease.  The last factorization is reused for the
+                covariance of the parameters.
+            'bhhh'
+                tol : float
+                    Relative error in params acceptable for convergence.
+                The same as 'newton' with the Hessian replaced by minus the
+                outer product of the scores of the observations, which uses
+                score_obs or, if it is not implemented, numerical
+                derivatives of loglikeobs.  The covariance of the parameters
+                is the inverse of the outer product.
             'nm' -- Nelder Mead
                 xtol : float
                     Relative error in params acceptable for convergence
@@ -221,7 +401,7 @@ class LikelihoodModel(Model):
                 start_direc : ndarray
                     Initial direction set.
                 """
-        methods = ['newton', 'nm', 'bfgs', 'powell', 'cg', 'ncg']
+        methods = ['newton', 'bhhh', 'nm', 'bfgs', 'powell', 'cg', 'ncg']
         if start_params is None:
             if self.exog is not None:
                 start_params = [0]*self.exog.shape[1] # fails for shape (K,)?
@@ -235,34 +415,74 @@ specified")
 #TODO: separate args from nonarg taking score and hessian, ie.,
 # user-supplied and numerically evaluated
 # estimate frprime doesn't take args in most (any?) of the optimize function
-        f = lambda params, *args: -self.loglike(params, *args)
-        score = lambda params: -self.score(params)
-        try:
-            hess = lambda params: -self.hessian(params)
-        except:
-            hess = None
-        if method == 'newton':
+        # the gradient is needed at most points where the function is
+        # evaluated, except by the derivative free methods
+        if method in ['nm', 'powell', 'bhhh']:
+            evals = _Evaluations(self, 0, fargs)
+        else:
+            evals = _Evaluations(self, 1, fargs)
+        # fargs are passed to evals, the optimizers pass them back to f
+        f = lambda params, *args: -evals(params, 0)
+        score = lambda params: -evals(params, 1)
+        hess = lambda params: -evals(params, 2)
+        if method in ['newton', 'bhhh']:
             tol = kwargs.setdefault('tol', 1e-8)
-            score = lambda params: self.score(params)
-            hess = lambda params: self.hessian(params)
             iterations = 0
-            oldparams = np.inf
-            newparams = np.asarray(start_params)
+            newparams = np.asarray(start_params, dtype=float)
+            if method == 'newton':
+                order = 2
+                derivatives = lambda params: (-score(params), -hess(params))
+            else:
+                order = 0
+                derivatives = self._opg
+            evals.order = order
+            # fval is the negative likelihood
+            fval = f(newparams)
+            gopt, hopt = derivatives(newparams)
+            cho = _cho_factor_neg(hopt)
             if retall:
-                history = [oldparams, newparams]
-            while (iterations < maxiter and np.all(np.abs(newparams -
-                    oldparams) > tol)):
-                H = hess(newparams)
-                oldparams = newparams
-                newparams = oldparams - np.dot(np.linalg.inv(H),
-                        score(oldparams))
+                history = [np.inf, newparams]
+            warnflag = 0
+            while iterations < maxiter:
+                oldparams, oldfval = newparams, fval
+                step = _newton_step(hopt, gopt, cho)
+                newparams = oldparams + step
+                fval = f(newparams)
+                # backtrack if the step does not improve the loglikelihood,
+                # the trial points only need the loglikelihood
+                evals.order = 0
+                nhalve = 0
+                while not fval <= oldfval and nhalve < _MAX_HALVINGS:
+                    if nhalve == 0:
+                        fullstep = step
+                    step = step / 2.
+                    newparams = oldparams + step
+                    fval = f(newparams)
+                    nhalve += 1
+                evals.order = order
+                if not fval <= oldfval:
+                    # the line search failed, stay at the last point, which
+                    # is only converged if the full step was within tol
+                    newparams, fval = oldparams, oldfval
+                    if not np.all(np.abs(fullstep) <= tol):
+                        warnflag = 2
+                    break
+                gopt, hopt = derivatives(newparams)
+                cho = _cho_factor_neg(hopt)
                 if retall:
                     history.append(newparams)
                 if callback is not None:
                     callback(newparams)
                 iterations += 1
-            fval = f(newparams, *fargs) # this is the negative likelihood
-            if iterations == maxiter:
+                if np.all(np.abs(step) <= tol):
+                    break
+            if warnflag == 2:
+                if disp:
+                    print "Warning: The line search failed to improve the \
+loglikelihood."
+                    print "         Current function value: %f" % fval
+                    print "         Iterations: %d" % iterations
+            elif iterations == maxiter:
                 warnflag = 1
                 if disp:
                     print "Warning: Maximum number of iterations has been \
@@ -270,14 +490,12 @@ exceeded."
                     print "         Current function value: %f" % fval
                     print "         Iterations: %d" % iterations
             else:
-                warnflag = 0
                 if disp:
                     print "Optimization terminated successfully."
                     print "         Current function value: %f" % fval
                     print "         Iterations %d" % iterations
             if full_output:
-                xopt, fopt, niter, gopt, hopt = (newparams, f(newparams, *fargs),
-                    iterations, score(newparams), hess(newparams))
+                xopt, fopt, niter = newparams, fval, iterations
                 converged = not warnflag
                 retvals = {'fopt' : fopt, 'iterations' : niter, 'score' : gopt,
                         'Hessian' : hopt, 'warnflag' : warnflag,
@@ -393,11 +611,18 @@ exceeded."
 # great
 #        if method == 'bfgs' and full_output:
 #            Hinv = retvals.setdefault('Hinv', 0)
-        elif method == 'newton' and full_output:
-            Hinv = np.linalg.inv(-hopt)
+        if method in ['newton', 'bhhh']:
+            # reuse the factorization of the Hessian at the optimum
+            if cho is not None:
+                Hinv = cho_solve(cho, np.eye(len(xopt)))
+            else:
+                try:
+                    Hinv = np.linalg.inv(-hopt)
+                except LinAlgError:
+                    Hinv = None
         else:
             try:
-                Hinv = np.linalg.inv(-1*self.hessian(xopt))
+                Hinv = np.linalg.inv(-1*evals(xopt, 2))
             except:
                 Hinv = None
 #TODO: add Hessian approximation and change the above if needed
@@ -434,6 +659,14 @@ class GenericLikelihoodModel(LikelihoodModel):
     Hessian.
         'newton'
 
+    Methods that require the loglikelihood of each observation,
+    `loglikeobs`.  The scores of the observations, `score_obs`, are
+    optional.
+        'bhhh'
+
+    If `score` or `hessian` is not given, it is approximated by the finite
+    differences in numdiff, so that all methods can be used with only a
+    likelihood function.
 
     Example
 
@@ -451,25 +684,60 @@ class GenericLikelihoodModel(LikelihoodModel):
     import numpy as np
     np.allclose(res.params, probit_res.params)
     """
-    def __init__(self, endog, exog=None, loglike=None, score=None, hessian=None):
+    def __init__(self, endog, exog=None, loglike=None, score=None, hessian=None,
+            loglikeobs=None, score_obs=None):
     # let them be none in case user wants to use inheritance
         if loglike:
             self.loglike = loglike
+        if loglikeobs:
+            self.loglikeobs = loglikeobs
+            if not loglike:
+                self.loglike = lambda params: np.sum(loglikeobs(params))
+        if score_obs:
+            self.score_obs = score_obs
         if score:
             self.score = score
         if hessian:
             self.hessian = hessian
         super(GenericLikelihoodModel, self).__init__(endog, exog)
 
-    def initialize(self):
-        if not self.score:  # right now score is not optional
-            from sandbox.regression.numdiff import approx_fprime1
-            self.score = approx_fprime1
-            if not self.hessian:
-                pass
-        else:   # can use approx_hess_p if we have a gradient
-            if not self.hessian:
-                pass
+    def score(self, params):
+        """
+        Gradient of the loglikelihood by centered differences.
+
+        Used if no `score` is given.
+        """
+        return approx_fprime(params, self.loglike, centered=True)
+
+    def hessian(self, params):
+        """
+        Hessian of the loglikelihood by Richardson extrapolated centered
+        second differences.
+
+        Used if no `hessian` is given.
+        """
+        return approx_hess(params, self.loglike, richardson=True)
+
+    def loglike_and_derivatives(self, params, order=2):
+        """
+        The loglikelihood and its derivatives evaluated at params.
+
+        If neither `score` nor `hessian` is given, the loglikelihood, the
+        gradient and the Hessian come from the same evaluations of loglike.
+        See LikelihoodModel.loglike_and_derivatives.
+        """
+        _check_order(order)
+        numerical = (self._is_default('score') and
+                self._is_default('hessian'))
+        if order < 2 or not numerical:
+            return super(GenericLikelihoodModel,
+                    self).loglike_and_derivatives(params, order)
+        return _approx_hess_grad(params, self.loglike, richardson=True)
+
+    def _is_default(self, name):
+        method = getattr(self, name)
+        return getattr(method, 'im_func', None) is getattr(
+                GenericLikelihoodModel, name).im_func
 
 class Results(object):
     """
@@ -551,6 +819,9 @@ class LikelihoodModelResults(Results):
                     True: converged. False: did not converge.
                 allvecs : list
                     List of solutions at each iteration.
+            'bhhh'
+                The same as 'newton', but 'Hessian' is minus the outer product
+                of the scores of the observations.
             'nm'
                 fopt : float
                     The value of the (negative) loglikelihood at its
@@ -637,6 +908,100 @@ class LikelihoodModelResults(Results):
     def normalized_cov_params(self):
         raise NotImplementedError
 
+    # the n-length attributes of the results, which are dropped by
+    # remove_data
+    _data_attr = []
+    # the statistics that remove_data evaluates before dropping the data
+    _keep_attr = []
+
+    def remove_data(self):
+        """
+        Drops the data, so that the results only hold k-sized summaries.
+
+        The statistics that do not need the data after fit, ie., bse, llf
+        and aic, are evaluated first and stay available.  The n-length
+        attributes, ie., resid and fittedvalues, are dropped, and the results
+        refer to a copy of the model without endog, exog and the other data
+        arrays.  predict with a new exog, t_test, f_test and conf_int still
+        work.
+
+        See also
+        --------
+        attach_data
+
+        Notes
+        -----
+        The model instance that was fit is not changed.  The n-length
+        attributes are not available until the data is attached again.
+        """
+        for name in self._keep_attr:
+            getattr(self, name)
+        cache = self.__dict__.get('_cache', {})
+        for name in self._data_attr:
+            # dict.pop does not reset the dependent cache entries
+            cache.pop(name, None)
+            self.__dict__.pop(name, None)
+        self.model = self.model._remove_data()
+
+    def attach_data(self, endog, exog=None, **kwds):
+        """
+        Attaches the data to results after remove_data.
+
+        The n-length attributes, ie., resid, are computed again on demand.
+
+        Parameters
+        ----------
+        endog : array-like
+            The endog the model was fit to.
+        exog : array-like, optional
+            The exog the model was fit to.
+        kwds : keywords
+            The arguments of the model that are data, ie., n-length `weights`
+            for WLS or `sigma` for GLS.  They are required if the model was
+            created with them.  The other arguments, ie., `family` for GLM,
+            are kept from the model.
+
+        Notes
+        -----
+        A new model is created from the data and given the fitted state of
+        the model, ie., normalized_cov_params.  The data is not checked to be
+        the data that was fit.
+        """
+        model = self.model
+        removed = getattr(model, '_removed_data', [])
+        missing = [key for key in model._init_keys if key in removed and
+                kwds.get(key) is None]
+        if missing:
+            raise ValueError, "%s were removed with the data and have to " \
+                    "be given" % ", ".join(missing)
+        init_kwds = {}
+        for key in model._init_keys:
+            value = getattr(model, key, None)
+            if value is not None:
+                init_kwds[key] = value
+        init_kwds.update(kwds)
+        new_model = model.__class__(endog, exog, **init_kwds)
+        for key, value in model.__dict__.iteritems():
+            if value is not None and key != '_removed_data':
+                new_model.__dict__[key] = value
+        self.model = new_model
+        self._attach_data()
+
+    def _attach_data(self):
+        """
+        Restores the n-length attributes that are not computed on demand.
+        """
+        pass
+
+    def save(self, path):
+        """
+        Writes the estimates and summary statistics to a compact binary file.
+
+        The file is read by iolib.load.  See iolib.resultsio.save.
+        """
+        from iolib.resultsio import save
+        save(self, path)
+
     def t(self, column=None):
         """
         Return the t-statistic for a given parameter estimate.
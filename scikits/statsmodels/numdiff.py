@@ -0,0 +1,234 @@
+"""
+Numerical derivatives of scalar and vector valued functions.
+
+approx_fprime
+    Gradient or Jacobian by forward or centered differences.
+approx_fprime_cs
+    Gradient or Jacobian by complex step differentiation.
+approx_hess
+    Hessian and gradient by centered differences, optionally with Richardson
+    extrapolation.
+
+All functions can evaluate the perturbed points in one call to `f` if `f`
+accepts a 2d array of parameters with one point in each row.  This is
+requested with `vectorized=True`.
+
+Notes
+-----
+The default step sizes are scaled by max(abs(x), .1) and are
+
+    forward differences : EPS**(1/2.)
+    centered differences : EPS**(1/3.)
+    second differences : EPS**(1/4.)
+    extrapolated second differences : EPS**(1/6.)
+    complex step : EPS
+
+where EPS is the machine epsilon of float64.
+
+The complex step derivative, Im(f(x + i*h))/h, has no subtractive
+cancellation, so it is accurate to machine precision for any small h.  It
+requires that `f` is analytic and implemented with functions that accept
+complex arguments, ie., no abs, no comparisons and no np.maximum.
+
+References
+----------
+Ridout, M.S. (2009) Statistical applications of the complex-step method of
+    numerical differentiation. The American Statistician, 63, 66-74.
+"""
+
+import numpy as np
+
+__all__ = ['approx_fprime', 'approx_fprime_cs', 'approx_hess']
+
+EPS = np.MachAr().eps
+
+def _step(x, epsilon, power):
+    """
+    Returns the step size for each element of x.
+    """
+    if epsilon is None:
+        return EPS**(1./power) * np.maximum(np.abs(x), .1)
+    return epsilon * np.ones(len(x))
+
+def _evaluate(f, points, args, vectorized):
+    """
+    Returns f at each row of points as an array with one row per point.
+    """
+    if vectorized:
+        return np.asarray(f(*((points,)+args)))
+    return np.array([f(*((point,)+args)) for point in points])
+
+def approx_fprime(x, f, epsilon=None, args=(), centered=False,
+        vectorized=False):
+    """
+    Gradient of f, or Jacobian if f returns a 1d array, by finite differences.
+
+    Parameters
+    ----------
+    x : array
+        The parameters at which the derivative is evaluated.
+    f : function
+        `f(*((x,)+args))` returns either one value or a 1d array.
+    epsilon : float, optional
+        The step size.  The default is scaled by abs(x), see Notes of the
+        module.
+    args : tuple
+        Additional arguments for `f`.
+    centered : bool
+        If True, centered differences are used, which take twice as many
+        function evaluations but are more accurate.
+    vectorized : bool
+        If True, `f` is called once with a 2d array of all perturbed points,
+        one point in each row, and returns one value, or a 1d array, for
+        each row.
+
+    Returns
+    -------
+    grad : array
+        The gradient with shape (k,) or the Jacobian with shape (nobs, k).
+    """
+    x = np.asarray(x, dtype=float)
+    k = len(x)
+    if centered:
+        h = _step(x, epsilon, 3)
+        points = np.vstack((x + np.diag(h), x - np.diag(h)))
+        values = _evaluate(f, points, args, vectorized)
+        grad = (values[:k] - values[k:]) / (2 * h[(slice(None),) +
+            (None,) * (values.ndim - 1)])
+    else:
+        h = _step(x, epsilon, 2)
+        points = np.vstack((x[None,:], x + np.diag(h)))
+        values = _evaluate(f, points, args, vectorized)
+        grad = (values[1:] - values[0]) / h[(slice(None),) +
+            (None,) * (values.ndim - 1)]
+    return grad.T
+
+def approx_fprime_cs(x, f, epsilon=None, args=(), vectorized=False):
+    """
+    Gradient of f, or Jacobian if f returns a 1d array, by complex step.
+
+    Parameters
+    ----------
+    x : array
+        The parameters at which the derivative is evaluated.
+    f : function
+        `f(*((x,)+args))` returns either one value or a 1d array.  It has to
+        accept complex parameters.  See the Notes of the module.
+    epsilon : float, optional
+        The step size.  The default is EPS*max(abs(x), .1).
+    args : tuple
+        Additional arguments for `f`.
+    vectorized : bool
+        If True, `f` is called once with a 2d complex array of all perturbed
+        points, one point in each row.
+
+    Returns
+    -------
+    grad : array
+        The gradient with shape (k,) or the Jacobian with shape (nobs, k).
+    """
+    x = np.asarray(x, dtype=float)
+    h = _step(x, epsilon, 1)
+    points = x + 1j * np.diag(h)
+    values = _evaluate(f, points, args, vectorized)
+    return (values.imag / h[(slice(None),) + (None,) * (values.ndim - 1)]).T
+
+def _hess_offsets(k):
+    """
+    Returns the offsets of the points for the centered Hessian, in units of
+    the step, and the indices of the points in the offsets.
+
+    The points are x, x+-2e_i for each i and x+-e_i+-e_j for each i < j.
+    """
+    eye = np.eye(k, dtype=int)
+    i, j = np.triu_indices(k, 1)
+    offsets = np.vstack((np.zeros((1, k), int), 2 * eye, -2 * eye,
+        eye[i] + eye[j], eye[i] - eye[j], -eye[i] + eye[j], -eye[i] - eye[j]))
+    npairs = len(i)
+    start = 1 + 2 * k + npairs * np.arange(4)
+    return offsets, i, j, start
+
+def _approx_hess_grad(x, f, epsilon=None, args=(), vectorized=False,
+        richardson=False):
+    """
+    Returns f(x), the gradient and the Hessian from one batch of evaluations
+    of f for each step size.  See approx_hess.
+    """
+    x = np.asarray(x, dtype=float)
+    k = len(x)
+    offsets, i, j, start = _hess_offsets(k)
+    npairs = len(i)
+    # the truncation error with extrapolation is O(h**4), so the rounding
+    # error is balanced by a larger step
+    h = _step(x, epsilon, 6 if richardson else 4)
+    steps = [h, h / 2.] if richardson else [h]
+    results = []
+    for step in steps:
+        values = _evaluate(f, x + offsets * step, args, vectorized)
+        f0 = values[0]
+        fp, fm = values[1:k+1], values[k+1:2*k+1]
+        fpp, fpm, fmp, fmm = [values[s:s+npairs] for s in start]
+        grad = (fp - fm) / (4 * step)
+        hess = np.empty((k, k))
+        hess[np.diag_indices(k)] = (fp - 2 * f0 + fm) / (4 * step**2)
+        hess[i,j] = (fpp - fpm - fmp + fmm) / (4 * step[i] * step[j])
+        hess[j,i] = hess[i,j]
+        results.append((f0, grad, hess))
+    if richardson:
+        (f0, grad1, hess1), (f0, grad2, hess2) = results
+        return f0, (4 * grad2 - grad1) / 3., (4 * hess2 - hess1) / 3.
+    return results[0]
+
+def approx_hess(x, f, epsilon=None, args=(), vectorized=False,
+        richardson=False, return_grad=False):
+    """
+    Hessian of the scalar function f by centered second differences.
+
+    Parameters
+    ----------
+    x : array
+        The parameters at which the Hessian is evaluated.
+    f : function
+        `f(*((x,)+args))` returns one value.
+    epsilon : float, optional
+        The step size h.  The default is scaled by abs(x) and is larger if
+        `richardson` is True, see Notes of the module.
+    args : tuple
+        Additional arguments for `f`.
+    vectorized : bool
+        If True, all points for each step size are evaluated in one call to
+        `f` with a 2d array of points, one point in each row.
+    richardson : bool
+        If True, the Hessian and the gradient are also computed with step h/2
+        and combined by Richardson extrapolation, (4*H(h/2) - H(h))/3, which
+        reduces the truncation error from O(h**2) to O(h**4).  This doubles
+        the number of function evaluations.
+    return_grad : bool
+        If True, the gradient is returned as well.  It comes from the same
+        function evaluations.
+
+    Returns
+    -------
+    hess : array
+        The k x k Hessian.
+    grad : array
+        The gradient, only returned if `return_grad` is True.
+
+    Notes
+    -----
+    With e_i the step h_i in direction i, the off-diagonal elements are
+
+        (f(x+e_i+e_j) - f(x+e_i-e_j) - f(x-e_i+e_j) + f(x-e_i-e_j))/(4 h_i h_j)
+
+    and the diagonal elements are
+
+        (f(x+2e_i) - 2f(x) + f(x-2e_i))/(4 h_i**2)
+
+    so that the points x+-2e_i also give the centered gradient.  All
+    2k**2 + 1 points for a step size are evaluated in one batch.
+    """
+    f0, grad, hess = _approx_hess_grad(x, f, epsilon, args, vectorized,
+            richardson)
+    if return_grad:
+        return hess, grad
+    return hess
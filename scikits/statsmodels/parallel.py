@@ -0,0 +1,185 @@
+"""
+Helpers to fit many independent models in parallel.
+"""
+
+import numpy as np
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from multiprocessing.sharedctypes import RawArray
+
+__all__ = ['fit_many', 'FitSummary']
+
+class FitSummary(object):
+    """
+    The estimates returned by fit_many for one model.
+
+    Only a few small arrays are kept, so that sending them back from a
+    worker process is cheap.
+
+    Attributes
+    ----------
+    params : array
+        The estimated parameters.
+    bse : array
+        The standard errors of the parameters.
+    llf : float or None
+        The value of the loglikelihood, None if the results have no llf.
+    converged : bool or None
+        Whether the fit converged.  None if the model does not report it.
+    """
+    def __init__(self, params, bse, llf=None, converged=None):
+        self.params = params
+        self.bse = bse
+        self.llf = llf
+        self.converged = converged
+
+    def __repr__(self):
+        return "<FitSummary: params=%s, converged=%s>" % (self.params,
+                self.converged)
+
+def _converged(results):
+    """
+    Returns the convergence flag of a results instance or None.
+    """
+    converged = getattr(results, 'converged', None)
+    if converged is None and hasattr(results, 'mle_retvals'):
+        converged = results.mle_retvals.get('converged', None)
+    return converged
+
+def _summarize(model_class, args, model_kwargs, fit_kwargs):
+    results = model_class(*args, **model_kwargs).fit(**fit_kwargs)
+    return FitSummary(np.asarray(results.params), np.asarray(results.bse),
+            getattr(results, 'llf', None), _converged(results))
+
+class _SharedArg(object):
+    def __init__(self, offset, shape):
+        self.offset = offset
+        self.shape = shape
+
+def _to_shared(datasets):
+    """
+    Copies the numeric arrays in datasets into one shared memory buffer.
+
+    Returns the buffer and the datasets with each array replaced by an
+    (offset, shape) tuple in a _SharedArg.  An array that is used by several
+    datasets, ie., a common exog, is only stored once.
+    """
+    offsets = {}
+    arrays = []
+    size = 0
+    packed = []
+    for args in datasets:
+        packed_args = []
+        for arg in args:
+            if isinstance(arg, np.ndarray) and arg.dtype.kind in 'biuf':
+                key = id(arg)
+                if key not in offsets:
+                    offsets[key] = size
+                    arrays.append(arg)
+                    size += arg.size
+                arg = _SharedArg(offsets[key], arg.shape)
+            packed_args.append(arg)
+        packed.append(tuple(packed_args))
+    buf = RawArray('d', max(size, 1))
+    shared = np.ctypeslib.as_array(buf)
+    for arr in arrays:
+        start = offsets[id(arr)]
+        shared[start:start+arr.size] = arr.ravel()
+    return buf, packed
+
+# set in each worker process by _init_worker
+_worker_state = None
+
+def _init_worker(buf, packed, model_class, model_kwargs, fit_kwargs):
+    global _worker_state
+    _worker_state = (np.ctypeslib.as_array(buf), packed, model_class,
+            model_kwargs, fit_kwargs)
+
+def _fit_shared(i):
+    shared, packed, model_class, model_kwargs, fit_kwargs = _worker_state
+    args = []
+    for arg in packed[i]:
+        if isinstance(arg, _SharedArg):
+            size = int(np.prod(arg.shape))
+            arg = shared[arg.offset:arg.offset+size].reshape(arg.shape)
+        args.append(arg)
+    return _summarize(model_class, args, model_kwargs, fit_kwargs)
+
+def fit_many(model_class, datasets, fit_kwargs=None, n_jobs=None,
+        backend="process", model_kwargs=None):
+    """
+    Fits a model to each of several datasets using a pool of workers.
+
+    Parameters
+    ----------
+    model_class : class
+        The model class, ie., OLS, GLM, RLM or Logit.
+    datasets : sequence
+        A sequence of tuples of the positional arguments to `model_class`,
+        ie., [(endog1, exog1), (endog2, exog2)].
+    fit_kwargs : dict, optional
+        Keyword arguments passed to each call to fit.
+    n_jobs : int, optional
+        The number of workers.  The default None uses all cores.  If
+        `n_jobs` is 1, the models are fit one after another in this process.
+    backend : str
+        "process" uses a pool of processes.  "thread" uses a pool of threads,
+        this only helps if most of the time is spent in numpy and LAPACK code
+        that releases the GIL.
+    model_kwargs : dict, optional
+        Keyword arguments passed to each call to `model_class`, ie.,
+        {'family' : families.Poisson()} for GLM.
+
+    Returns
+    -------
+    A list of FitSummary instances in the order of `datasets`.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import scikits.statsmodels as sm
+    >>> exog = sm.add_constant(np.random.randn(1000,3))
+    >>> datasets = [(np.random.randn(1000), exog) for i in range(100)]
+    >>> res = sm.fit_many(sm.OLS, datasets, n_jobs=4)
+    >>> res[0].params
+
+    Notes
+    -----
+    With the "process" backend, the numeric arrays in `datasets` are copied
+    once into shared memory before the workers are started.  The workers
+    receive only an index into `datasets`, and they return only a
+    FitSummary, so the arrays are not pickled.  An array that is used in
+    more than one dataset is stored once.  The "process" backend relies on
+    the workers being forked, so that they can inherit the shared memory.
+    """
+    if fit_kwargs is None:
+        fit_kwargs = {}
+    if model_kwargs is None:
+        model_kwargs = {}
+    datasets = [tuple(args) for args in datasets]
+    if backend not in ["process", "thread"]:
+        raise ValueError, "backend %s not understood" % backend
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = multiprocessing.cpu_count()
+    n_jobs = min(n_jobs, len(datasets))
+    if n_jobs <= 1:
+        return [_summarize(model_class, args, model_kwargs, fit_kwargs)
+                for args in datasets]
+    if backend == "thread":
+        pool = ThreadPool(n_jobs)
+        try:
+            results = pool.map(lambda args: _summarize(model_class, args,
+                model_kwargs, fit_kwargs), datasets)
+        finally:
+            pool.close()
+            pool.join()
+        return results
+    buf, packed = _to_shared(datasets)
+    pool = multiprocessing.Pool(n_jobs, _init_worker,
+            (buf, packed, model_class, model_kwargs, fit_kwargs))
+    try:
+        results = pool.map(_fit_shared, range(len(datasets)))
+    finally:
+        pool.close()
+        pool.join()
+    return results
@@ -28,16 +28,132 @@ W. Green.  "Econometric Analysis," 5th ed., Pearson, 2003.
 
 __docformat__ = 'restructuredtext en'
 
-__all__ = ['GLS', 'WLS', 'OLS', 'GLSAR']
+__all__ = ['GLS', 'WLS', 'OLS', 'GLSAR', 'IncrementalOLS']
 
 import numpy as np
-from scipy.linalg import norm, toeplitz, lstsq, calc_lwork
-from scipy import stats
+from scipy.linalg import norm, toeplitz, lstsq, calc_lwork, cholesky_banded, \
+        solve_banded, cholesky, cho_solve
+from scipy.linalg.lapack import get_lapack_funcs
+from scipy import stats, sparse
+from scipy.sparse.linalg import splu
 from scipy.stats.stats import ss
 from model import LikelihoodModel, LikelihoodModelResults
-from tools import add_constant, rank, recipr
+from tools import add_constant, rank, recipr, spdot, spxtwx
 from decorators import *
 
+def _ls_solve(exog, endog, method="pinv"):
+    """
+    Solves the least squares problem min ||endog - dot(exog, params)||.
+
+    Parameters
+    ----------
+    exog : array
+        n x k design matrix.
+    endog : array
+        n-length response (or n x m for m responses sharing `exog`).
+    method : str
+        "pinv", "qr", "cholesky", or "lstsq".  See GLS.fit.
+
+    Returns
+    -------
+    params : array
+        The least squares solution.
+    normalized_cov_params : array
+        k x k array inv(dot(exog.T, exog)), computed from the k x k factor.
+    pinv_exog : array or None
+        The k x n pseudoinverse of `exog` if `method` is "pinv", else None.
+
+    Notes
+    -----
+    Only the "pinv" method forms an n x k array.  "qr" and "cholesky" keep
+    just the k x k triangular factor R, with dot(R.T, R) = dot(exog.T, exog),
+    and assume that `exog` has full column rank.
+
+    If `exog` is a scipy.sparse matrix, `method` is ignored.  The normal
+    equations are then solved with a sparse LU factorization of
+    dot(exog.T, exog), or its pseudoinverse if `exog` is rank deficient.
+    """
+    if sparse.issparse(exog):
+        return _sparse_ls_solve(exog, endog) + (None,)
+    method = method.lower()
+    if method == "pinv":
+        pinv_exog = np.linalg.pinv(exog)
+        return np.dot(pinv_exog, endog), np.dot(pinv_exog, pinv_exog.T), \
+                pinv_exog
+    elif method == "qr":
+        Q, R = np.linalg.qr(exog)
+        params = np.linalg.solve(R, np.dot(Q.T, endog))
+        del Q
+    elif method == "cholesky":
+        R = cholesky(np.dot(exog.T, exog), lower=False)
+        params = cho_solve((R, False), np.dot(exog.T, endog))
+    elif method == "lstsq":
+        params = lstsq(exog, endog)[0]
+        # pinv(dot(exog.T, exog)) from R alone, allows for rank deficiency
+        pinv_R = np.linalg.pinv(np.linalg.qr(exog, mode='r'))
+        return params, np.dot(pinv_R, pinv_R.T), None
+    else:
+        raise ValueError, "method %s not understood" % method
+    normalized_cov_params = cho_solve((R, False), np.eye(R.shape[0]))
+    return params, normalized_cov_params, None
+
+def _sparse_ls_solve(exog, endog):
+    """
+    Solves the normal equations for a scipy.sparse `exog`.
+
+    Returns params and the dense k x k normalized_cov_params.
+    """
+    xtx = (exog.T * exog).tocsc()
+    xty = exog.T * endog
+    k = xtx.shape[0]
+    if rank(exog) < k:
+        # splu does not detect numerically singular matrices, use the
+        # tolerance of rank for the pseudoinverse
+        normalized_cov_params = np.linalg.pinv(xtx.toarray(),
+                rcond=max(exog.shape) * np.finfo(np.float64).eps)
+        return np.dot(normalized_cov_params, xty), normalized_cov_params
+    lu = splu(xtx)
+    if xty.ndim == 1:
+        params = lu.solve(xty)
+    else:
+        params = np.column_stack([lu.solve(col) for col in xty.T])
+    normalized_cov_params = np.column_stack([lu.solve(col) for col in
+            np.eye(k)])
+    return params, normalized_cov_params
+
+def _ls_solve_inplace(aug):
+    """
+    Solves a least squares problem, overwriting the data with its QR factor.
+
+    Parameters
+    ----------
+    aug : array
+        Fortran ordered n x (k+1) float64 array [exog, endog].  It is
+        overwritten by the LAPACK QR factorization.
+
+    Returns
+    -------
+    params : array
+        The least squares solution.
+    normalized_cov_params : array
+        k x k array pinv(dot(exog.T, exog)).
+
+    Notes
+    -----
+    The QR factorization of the augmented array gives the triangular factor R
+    of exog and Q'endog without forming Q, so no n x k array is allocated.
+    The solution uses the pseudoinverse of the k x k factor R, which is the
+    same as the pseudoinverse solution of the full problem, also if exog is
+    rank deficient.
+    """
+    geqrf, = get_lapack_funcs(('geqrf',), (aug,))
+    qr, tau, work, info = geqrf(aug, overwrite_a=1)
+    if info < 0:
+        raise ValueError, "illegal value in argument %d of geqrf" % -info
+    k = aug.shape[1] - 1
+    pinv_R = np.linalg.pinv(np.triu(qr[:k,:k]))
+    return np.dot(pinv_R, qr[:k,k]), np.dot(pinv_R, pinv_R.T)
+
 class GLS(LikelihoodModel):
     """
     Generalized least squares model with a general covariance structure.
@@ -46,25 +162,33 @@ class GLS(LikelihoodModel):
     ----------
     endog : array-like
            endog is a 1-d vector that contains the response/independent variable
+           It can also be n x m for m independent regressions that share
+           `exog`, see Notes.
     exog : array-like
            exog is a n x p vector where n is the number of observations and p is
            the number of regressors/dependent variables including the intercept
            if one is included in the data.
-    sigma : scalar or array
+    sigma : scalar, array, scipy.sparse matrix, or list of arrays
            `sigma` is the weighting matrix of the covariance.
            The default is None for no scaling.  If `sigma` is a scalar, it is
            assumed that `sigma` is an n x n diagonal matrix with the given
            scalar, `sigma` as the value of each diagonal element.  If `sigma`
            is an n-length vector, then `sigma` is assumed to be a diagonal
            matrix with the given `sigma` on the diagonal.  This should be the
-           same as WLS.
+           same as WLS.  If `sigma` is a scipy.sparse matrix, it is assumed
+           to be banded (ie., MA-type) and a banded Cholesky decomposition is
+           used.  If `sigma` is a list of square arrays, it is assumed to be
+           block diagonal with the given blocks along the diagonal (ie.,
+           clustered errors).  None of these build a dense n x n array.
 
     Attributes
     ----------
     pinv_wexog : array
         `pinv_wexog` is the p x n Moore-Penrose pseudoinverse of `wexog`.
+        It is None unless the model was fit with method "pinv".
     cholsimgainv : array
         The transpose of the Cholesky decomposition of the pseudoinverse.
+        Only available if `sigma` is a dense n x n array.
     df_model : float
         p - 1, where p is the number of regressors including the intercept.
         of freedom.
@@ -77,7 +201,10 @@ class GLS(LikelihoodModel):
     normalized_cov_params : array
         p x p array :math:`(X^{T}\Sigma^{-1}X)^{-1}`
     sigma : array
-        `sigma` is the n x n covariance structure of the error terms.
+        `sigma` is the n x n covariance structure of the error terms.  A
+        diagonal `sigma` is stored as an n-length vector, a banded `sigma` as
+        the scipy.sparse matrix that was given, and a block diagonal `sigma`
+        as the list of blocks.
     wexog : array
         Design matrix whitened by `cholsigmainv`
     wendog : array
@@ -108,6 +235,12 @@ class GLS(LikelihoodModel):
     If sigma is a function of the data making one of the regressors
     a constant, then the current postestimation statistics will not be correct.
 
+    If `endog` is n x m, the m regressions are fit with a single factorization
+    of `wexog`.  The results then hold params and bse as p x m arrays, and
+    scale, ssr, rsquared, fvalue and llf as length m arrays, one column or
+    element per response.  The heteroskedasticity robust standard errors,
+    t_test, f_test and summary are only available for a 1d `endog`.
+
 
     Examples
     --------
@@ -134,37 +267,115 @@ class GLS(LikelihoodModel):
     >>> gls_results = gls_model.results
 
     """
+    _data_attr = ['endog', 'exog', 'wendog', 'wexog', 'pinv_wexog', 'sigma',
+            'cholsigmainv', '_cholsigma_banded', '_cholsigmainv_blocks']
+    _init_keys = ['sigma']
 
     def __init__(self, endog, exog, sigma=None):
 #TODO: add options igls, for iterative fgls if sigma is None
 #TODO: default is sigma is none should be two-step GLS
-        if sigma is not None:
-            self.sigma = np.asarray(sigma)
+        nobs = int(np.asarray(endog).shape[0])
+        self._sigma_type = None
+        if sigma is None:
+            self.sigma = None
+        elif sparse.issparse(sigma):
+            self._set_sparse_sigma(sigma, nobs)
+        elif isinstance(sigma, (list, tuple)) and len(sigma) > 0 and \
+                np.ndim(sigma[0]) == 2:
+            self._set_block_sigma(sigma, nobs)
         else:
-            self.sigma = sigma
-        if self.sigma is not None and not self.sigma.shape == (): #greedy logic
-            nobs = int(endog.shape[0])
+            self.sigma = np.asarray(sigma)
+            if self.sigma.shape == ():
+                self.sigma = np.ones(nobs) * self.sigma
             if self.sigma.ndim == 1 or np.squeeze(self.sigma).ndim == 1:
+                self.sigma = np.squeeze(self.sigma)
                 if self.sigma.shape[0] != nobs:
                     raise ValueError, "sigma is not the correct dimension.  \
 Should be of length %s, if sigma is a 1d array" % nobs
-            elif self.sigma.shape[0] != nobs and \
-                    self.sigma.shape[1] != nobs:
-                raise ValueError, "expected an %s x %s array for sigma" % \
-                        (nobs, nobs)
-        if self.sigma is not None:
-            nobs = int(endog.shape[0])
-            if self.sigma.shape == ():
-                self.sigma = np.diag(np.ones(nobs)*self.sigma)
-            if np.squeeze(self.sigma).ndim == 1:
-                self.sigma = np.diag(np.squeeze(self.sigma))
-            self.cholsigmainv = np.linalg.cholesky(np.linalg.pinv(\
-                    self.sigma)).T
+                self._sigma_type = 'diag'
+            else:
+                if self.sigma.shape[0] != nobs and \
+                        self.sigma.shape[1] != nobs:
+                    raise ValueError, "expected an %s x %s array for sigma" % \
+                            (nobs, nobs)
+                self._sigma_type = 'dense'
+                self.cholsigmainv = np.linalg.cholesky(np.linalg.pinv(\
+                        self.sigma)).T
         super(GLS, self).__init__(endog, exog)
 
+    def _set_sparse_sigma(self, sigma, nobs):
+        """
+        Sets up the whitening for a scipy.sparse `sigma`.
+
+        A diagonal `sigma` is stored as a 1d array.  Otherwise the lower
+        band of `sigma` is factored with a banded Cholesky decomposition, so
+        that neither sigma nor its factor is ever stored as a dense n x n
+        array.
+        """
+        if sigma.shape != (nobs, nobs):
+            raise ValueError, "expected an %s x %s array for sigma" % \
+                    (nobs, nobs)
+        sigma = sigma.tocsr().tocoo() # sums duplicate entries
+        lower = sigma.row >= sigma.col
+        row = sigma.row[lower]
+        col = sigma.col[lower]
+        data = sigma.data[lower]
+        bandwidth = 0
+        if row.size:
+            bandwidth = int((row - col).max())
+        if bandwidth == 0:
+            self.sigma = np.zeros(nobs)
+            self.sigma[row] = data
+            self._sigma_type = 'diag'
+            return
+        # The observations are put in reverse order before factoring.  If
+        # P is the reversal permutation and P sigma P = C C', then
+        # sigma = U U' with U = P C P upper triangular and U^(-1) is the
+        # same whitening matrix as cholesky(pinv(sigma)).T for a dense sigma.
+        cholband = np.zeros((bandwidth + 1, nobs))
+        cholband[row - col, nobs - 1 - row] = data
+        self.sigma = sigma.tocsr()
+        self._cholsigma_banded = cholesky_banded(cholband, lower=True)
+        self._sigma_bandwidth = bandwidth
+        self._sigma_type = 'banded'
+
+    def _set_block_sigma(self, sigma, nobs):
+        """
+        Sets up the whitening for a block diagonal `sigma` given as a
+        sequence of square blocks along the diagonal.
+        """
+        blocks = [np.asarray(block) for block in sigma]
+        sizes = [block.shape[0] for block in blocks]
+        if sum(sizes) != nobs:
+            raise ValueError, "The blocks of sigma should sum to %s \
+observations.  Got %s" % (nobs, sum(sizes))
+        for block in blocks:
+            if block.ndim != 2 or block.shape[0] != block.shape[1]:
+                raise ValueError, "The blocks of sigma must be square arrays"
+        self.sigma = blocks
+        self._block_bounds = np.cumsum([0] + sizes)
+        self._cholsigmainv_blocks = [np.linalg.cholesky(\
+                np.linalg.pinv(block)).T for block in blocks]
+        self._sigma_type = 'block'
+
+    def _logdet_sigma(self):
+        """
+        Returns the log of the determinant of sigma using its structure.
+        """
+        if self._sigma_type == 'diag':
+            return np.sum(np.log(self.sigma))
+        elif self._sigma_type == 'banded':
+            return 2 * np.sum(np.log(self._cholsigma_banded[0]))
+        elif self._sigma_type == 'block':
+            return np.sum([np.log(np.linalg.det(block)) for block in
+                    self.sigma])
+        else:
+            return np.log(np.linalg.det(self.sigma))
+
     def initialize(self):
         self.wexog = self.whiten(self.exog)
         self.wendog = self.whiten(self.endog)
+        self.pinv_wexog = None
         # overwrite nobs from class Model:
         self.nobs = float(self.wexog.shape[0])
         self.df_resid = self.nobs - rank(self.exog)
@@ -184,17 +395,48 @@ Should be of length %s, if sigma is a 1d array" % nobs
         -------
         np.dot(cholsigmainv,X)
 
+        Notes
+        -----
+        The dense cholsigmainv is only formed if sigma was given as a dense
+        2d array.  Diagonal, banded (scipy.sparse) and block diagonal sigma
+        are whitened using their structure, which gives the same result.
+
+        If X is a scipy.sparse matrix, the result is sparse for diagonal
+        sigma.  Otherwise X is converted to a dense array.
+
         See Also
         --------
         regression.GLS
         """
+        if sparse.issparse(X):
+            if self.sigma is None:
+                return X
+            elif self._sigma_type == 'diag':
+                nobs = X.shape[0]
+                return sparse.spdiags(1/np.sqrt(self.sigma), 0, nobs,
+                        nobs) * X
+            X = X.toarray()
         X = np.asarray(X)
-        if np.any(self.sigma) and not self.sigma==():
-            return np.dot(self.cholsigmainv, X)
-        else:
+        if self.sigma is None:
             return X
+        elif self._sigma_type == 'diag':
+            if X.ndim == 1:
+                return X / np.sqrt(self.sigma)
+            return X / np.sqrt(self.sigma)[:,None]
+        elif self._sigma_type == 'banded':
+            return solve_banded((self._sigma_bandwidth, 0),
+                    self._cholsigma_banded, X[::-1])[::-1]
+        elif self._sigma_type == 'block':
+            bounds = self._block_bounds
+            wX = np.empty(X.shape)
+            for i, cholsigmainv in enumerate(self._cholsigmainv_blocks):
+                wX[bounds[i]:bounds[i+1]] = np.dot(cholsigmainv,
+                        X[bounds[i]:bounds[i+1]])
+            return wX
+        else:
+            return np.dot(self.cholsigmainv, X)
 
-    def fit(self, method="pinv", **kwargs):
+    def fit(self, method="pinv", keep_data=True, **kwargs):
         """
         Full fit of the model.
 
@@ -204,11 +446,16 @@ Should be of length %s, if sigma is a 1d array" % nobs
         Parameters
         ----------
         method : str
-            Can be "pinv", "qr", or "mle".  "pinv" uses the
+            Can be "pinv", "qr", "cholesky", or "lstsq".  "pinv" uses the
             Moore-Penrose pseudoinverse to solve the least squares problem.
-            "svd" uses the Singular Value Decomposition.  "qr" uses the
-            QR factorization.  "mle" fits the model via maximum likelihood.
-            "mle" is not yet implemented.
+            "qr" uses the QR factorization.  "cholesky" solves the normal
+            equations with the Cholesky factorization of dot(wexog.T, wexog).
+            "lstsq" uses scipy.linalg.lstsq.  Only "pinv" forms the p x n
+            pseudoinverse `pinv_wexog`, the others keep just a p x p factor.
+            "qr" and "cholesky" assume that `wexog` has full column rank.
+        keep_data : bool
+            If False, remove_data is called on the results, so that they do
+            not hold a reference to the data.
 
         Returns
         -------
@@ -223,25 +470,19 @@ Should be of length %s, if sigma is a 1d array" % nobs
         Currently it is assumed that all models will have an intercept /
         constant in the design matrix for postestimation statistics.
 
-        The fit method uses the pseudoinverse of the design/exogenous variables
-        to solve the least squares minimization.
+        The default fit method uses the pseudoinverse of the design/exogenous
+        variables to solve the least squares minimization.  "qr" is faster
+        and uses less memory for long designs, "cholesky" is the fastest but
+        squares the condition number of `wexog`.
 
         """
-        pinv_wexog = np.linalg.pinv(self.wexog)
-        self.normalized_cov_params = np.dot(pinv_wexog,
-                                         np.transpose(pinv_wexog))
-        exog = self.wexog
-        endog = self.wendog
-        self.pinv_wexog = pinv_wexog
-        if method == "pinv":
-            beta = np.dot(pinv_wexog, endog)
-        elif method == "qr":
-            Q,R = np.linalg.qr(exog)
-            beta = np.linalg.solve(R,np.dot(Q.T,endog))
-            # no upper triangular solve routine in numpy/scipy?
+        beta, self.normalized_cov_params, self.pinv_wexog = _ls_solve(
+                self.wexog, self.wendog, method)
         lfit = RegressionResults(self, beta,
                        normalized_cov_params=self.normalized_cov_params)
         self._results = lfit
+        if not keep_data:
+            lfit.remove_data()
         return lfit
 
     @property
@@ -281,9 +522,9 @@ Should be of length %s, if sigma is a 1d array" % nobs
         if self._results is None and params is None:
             raise ValueError, "If the model has not been fit, then you must specify the params argument."
         if self._results is not None:
-            return np.dot(exog, self.results.params)
+            return spdot(exog, self.results.params)
         else:
-            return np.dot(exog, params)
+            return spdot(exog, params)
 
     def loglike(self, params):
         """
@@ -314,12 +555,11 @@ Should be of length %s, if sigma is a 1d array" % nobs
         """
 #TODO: combine this with OLS/WLS loglike and add _det_sigma argument
         nobs2 = self.nobs / 2.0
-        SSR = ss(self.wendog - np.dot(self.wexog,params))
+        SSR = ss(self.wendog - spdot(self.wexog,params))
         llf = -np.log(SSR) * nobs2      # concentrated likelihood
         llf -= (1+np.log(np.pi/nobs2))*nobs2  # with likelihood constant
-        if np.any(self.sigma) and self.sigma.ndim == 2:
-#FIXME: robust-enough check?  unneeded if _det_sigma gets defined
-            llf -= .5*np.log(np.linalg.det(self.sigma))
+        if self.sigma is not None:
+            llf -= .5*self._logdet_sigma()
             # with error covariance matrix
         return llf
 
@@ -388,6 +628,9 @@ class WLS(GLS):
 #mse_model is calculated incorrectly according to R
 #same fixed used for WLS in the tests doesn't work
 #mse_resid is good
+    _data_attr = GLS._data_attr + ['weights']
+    _init_keys = ['weights']
+
     def __init__(self, endog, exog, weights=1.):
         weights = np.array(weights)
         if weights.shape == ():
@@ -414,6 +657,10 @@ class WLS(GLS):
         -------
         sqrt(weights)*X
         """
+        if sparse.issparse(X):
+            nobs = X.shape[0]
+            return sparse.spdiags(np.ones(nobs) * np.sqrt(self.weights), 0,
+                    nobs, nobs) * X
         X = np.asarray(X)
         if X.ndim == 1:
             return X * np.sqrt(self.weights)
@@ -447,7 +694,7 @@ class WLS(GLS):
         W is treated as a diagonal matrix for the purposes of the formula.
         """
         nobs2 = self.nobs / 2.0
-        SSR = ss(self.wendog - np.dot(self.wexog,params))
+        SSR = ss(self.wendog - spdot(self.wexog,params))
         #SSR = ss(self.endog - np.dot(self.exog,params))
         llf = -np.log(SSR) * nobs2      # concentrated likelihood
         llf -= (1+np.log(np.pi/nobs2))*nobs2  # with constant
@@ -505,6 +752,8 @@ class OLS(WLS):
     OLS, as the other models, assumes that the design matrix contains a constant.
     """
 #TODO: change example to use datasets.  This was the point of datasets!
+    _init_keys = []
+
     def __init__(self, endog, exog=None):
         super(OLS, self).__init__(endog, exog)
 
@@ -522,11 +771,8 @@ class OLS(WLS):
         The concentrated likelihood function evaluated at params.
         '''
         nobs2 = self.nobs/2.
-        return -nobs2*np.log(2*np.pi)-nobs2*np.log(1/(2*nobs2) *\
-                np.dot(np.transpose(self.endog -
-                    np.dot(self.exog, params)),
-                    (self.endog - np.dot(self.exog,params)))) -\
-                    nobs2
+        SSR = ss(self.endog - spdot(self.exog, params))
+        return -nobs2*np.log(2*np.pi)-nobs2*np.log(SSR/(2*nobs2)) - nobs2
 
     def whiten(self, Y):
         """
@@ -581,6 +827,8 @@ class GLSAR(GLS):
     -----
     GLSAR is considered to be experimental.
     """
+    _init_keys = ['rho']
+
     def __init__(self, endog, exog=None, rho=1):
         if isinstance(rho, np.int):
             self.order = rho
@@ -649,6 +897,175 @@ class GLSAR(GLS):
                 _X[(i+1):,:] = _X[(i+1):,:] - self.rho[i] * X[0:-(i+1),:]
                 return _X[self.order:,:]
 
+class IncrementalOLS(LikelihoodModel):
+    """
+    An OLS / WLS model fit incrementally from chunks of data.
+
+    The full design is never held in memory.  Each chunk is folded into a
+    (p+1) x (p+1) triangular factor of the augmented whitened design
+    [wexog, wendog], so that memory does not depend on the number of
+    observations.
+
+    Parameters
+    ----------
+    chunks : iterable, optional
+        An iterable of (endog, exog) or (endog, exog, weights) tuples.  Each
+        tuple is passed to `update`.  More chunks can be added later with
+        `update`.
+
+    Attributes
+    ----------
+    nobs : float
+        The number of observations seen so far.
+    normalized_cov_params : array
+        p x p array inv(dot(wexog.T, wexog)).  Only available after fit.
+
+    Examples
+    --------
+    >>> import scikits.statsmodels as sm
+    >>> from scikits.statsmodels.datasets.longley import load
+    >>> data = load()
+    >>> exog = sm.add_constant(data.exog)
+    >>> chunks = [(data.endog[i:i+4], exog[i:i+4]) for i in range(0,16,4)]
+    >>> results = sm.IncrementalOLS(chunks).fit()
+
+    Notes
+    -----
+    The results are the same as those of OLS, or WLS if weights are given,
+    on the stacked data, up to floating point error.  The loglikelihood
+    adds .5*sum(log(weights)) of all weighted chunks, unlike WLS, which
+    drops it if any weight is 1.  The results do not have the attributes
+    that need the data, ie., resid, wresid, fittedvalues and the
+    heteroskedasticity robust standard errors.
+    """
+    def __init__(self, chunks=None):
+        self._R = None
+        self._n_wendog = 0
+        self._mean_wendog = 0.
+        self._m2_wendog = 0.
+        self._sumlogweights = 0.
+        self._weighted = False
+        self.nobs = 0.
+        if chunks is not None:
+            for chunk in chunks:
+                self.update(*chunk)
+
+    def update(self, endog, exog, weights=None):
+        """
+        Add a chunk of observations to the model.
+
+        Parameters
+        ----------
+        endog : array-like
+            1d response for the chunk
+        exog : array-like
+            n x p design for the chunk
+        weights : array-like, optional
+            1d weights for the chunk, as in WLS.  The default is 1.
+        """
+        endog = np.asarray(endog, dtype=np.float64).reshape(-1)
+        exog = np.asarray(exog, dtype=np.float64)
+        if exog.ndim == 1:
+            exog = exog[:,None]
+        if exog.ndim != 2 or exog.shape[0] != endog.shape[0]:
+            raise ValueError, "endog and exog matrices are not aligned."
+        if self._R is not None and exog.shape[1] != self._R.shape[1] - 1:
+            raise ValueError, "exog must have %i columns" % \
+                    (self._R.shape[1] - 1)
+        n = endog.shape[0]
+        if n == 0:
+            return
+        if weights is None:
+            wendog = endog
+            wexog = exog
+        else:
+            weights = np.asarray(weights, dtype=np.float64)
+            if weights.shape == ():
+                weights = np.repeat(weights, n)
+            if weights.shape != (n,):
+                raise ValueError, "Weights must be scalar or same length " \
+                        "as design"
+            # log(1) = 0, so chunks without weights need no term
+            self._weighted = True
+            self._sumlogweights += np.log(weights).sum()
+            sqrtw = np.sqrt(weights)
+            wendog = sqrtw * endog
+            wexog = sqrtw[:,None] * exog
+        aug = np.column_stack((wexog, wendog))
+        if self._R is not None:
+            aug = np.vstack((self._R, aug))
+        self._R = np.linalg.qr(aug, mode='r')
+        # pairwise update of mean and centered sum of squares of wendog
+        mean = wendog.mean()
+        delta = mean - self._mean_wendog
+        n_all = self._n_wendog + n
+        self._m2_wendog += ss(wendog - mean) + \
+                delta**2 * self._n_wendog * n / n_all
+        self._mean_wendog += delta * n / n_all
+        self._n_wendog = n_all
+        self.nobs = float(n_all)
+
+    def initialize(self):
+        pass
+
+    def _factor(self):
+        """
+        Returns the p x p factor R, dot(R.T, R) = dot(wexog.T, wexog), Q'y
+        and the minimized sum of squared residuals.
+        """
+        if self._R is None:
+            raise ValueError, "no data, call update first"
+        k = self._R.shape[1] - 1
+        if self._R.shape[0] <= k:
+            raise ValueError, "need more observations than regressors"
+        R = self._R
+        return R[:k,:k], R[:k,k], R[k,k]**2
+
+    def fit(self):
+        """
+        Fit the model to the data seen so far.
+
+        Returns
+        -------
+        An IncrementalRegressionResults class instance.
+        """
+        R, qty, self._ssr = self._factor()
+        r = rank(R)
+        if r < R.shape[0]:
+            raise ValueError, "exog is not of full column rank"
+        self.df_resid = self.nobs - r
+        self.df_model = float(r - 1)
+        beta = np.linalg.solve(R, qty)
+        self.normalized_cov_params = cho_solve((R, False), np.eye(r))
+        self.exog_names = ['x%d' % i for i in range(r)]
+        lfit = IncrementalRegressionResults(self, beta,
+                       normalized_cov_params=self.normalized_cov_params)
+        self._results = lfit
+        return lfit
+
+    def predict(self, exog, params=None):
+        """
+        Return linear predicted values from a design matrix.
+        """
+        if params is None:
+            params = self._results.params
+        return np.dot(exog, params)
+
+    def loglike(self, params):
+        """
+        Returns the value of the gaussian loglikelihood function at params.
+
+        Uses the accumulated factor, see WLS.loglike for the formula.
+        """
+        R, qty, ssr = self._factor()
+        SSR = ssr + ss(qty - np.dot(R, params))
+        nobs2 = self.nobs / 2.0
+        llf = -np.log(SSR) * nobs2      # concentrated likelihood
+        llf -= (1+np.log(np.pi/nobs2))*nobs2  # with constant
+        if self._weighted:
+            llf += .5*self._sumlogweights # with weights
+        return llf
+
 def yule_walker(X, order=1, method="unbiased", df=None, inv=False, demean=True):
     """
     Estimate AR(p) parameters from a sequence X using Yule-Walker equation.
@@ -749,13 +1166,13 @@ class RegressionResults(LikelihoodModelResults):
     centered_tss
         The total sum of squares centered about the mean
     cov_HC0
-        See HC0_se below.  Only available after calling HC0_se.
+        See HC0_se below.  It is computed when first accessed.
     cov_HC1
-        See HC1_se below.  Only available after calling HC1_se.
+        See HC1_se below.  It is computed when first accessed.
     cov_HC2
-        See HC2_se below.  Only available after calling HC2_se.
+        See HC2_se below.  It is computed when first accessed.
     cov_HC3
-        See HC3_se below.  Only available after calling HC3_se.
+        See HC3_se below.  It is computed when first accessed.
     df_model :
         Model degress of freedom. The number of regressors p - 1 for the
         constant  Note that df_model does not include the constant even though
@@ -846,11 +1263,14 @@ class RegressionResults(LikelihoodModelResults):
     scale
         A scale factor for the covariance matrix.
         Default value is ssr/(n-p).  Note that the square root of `scale` is
-        often called the standard error of the regression.
+        often called the standard error of the regression.  Setting `scale`
+        resets `bse`, `tvalues` and `pvalues`.
     ssr
         Sum of squared (whitened) residuals.
     stand_errors
         The standard errors of the parameter estimates.
+    tvalues
+        The t-statistics of the params, params/bse.
     uncentered_tss
         Uncentered sum of squares.  Sum of the squared values of the
         (whitened) endogenous response variable.
@@ -884,11 +1304,6 @@ class RegressionResults(LikelihoodModelResults):
     """
 
     # For robust covariance matrix properties
-    _HC0_se = None
-    _HC1_se = None
-    _HC2_se = None
-    _HC3_se = None
-
     _cache = {} # needs to be a class attribute for scale setter?
 
     def __init__(self, model, params, normalized_cov_params=None, scale=1.):
@@ -941,26 +1356,30 @@ class RegressionResults(LikelihoodModelResults):
 
 #    scale = property(_getscale, _setscale)
 
+    _data_attr = ['fittedvalues', 'wresid', 'resid', '_leverage', 'het_scale']
+    _keep_attr = ['nobs', 'df_resid', 'df_model', 'scale', 'ssr',
+            'centered_tss', 'uncentered_tss', 'ess', 'rsquared', 'rsquared_adj',
+            'mse_model', 'mse_resid', 'mse_total', 'fvalue', 'f_pvalue', 'bse',
+            'tvalues', 'pvalues', 'llf', 'aic', 'bic']
+
 #TODO: fix writable example
-    @cache_writable()
+    # setting scale resets the statistics that depend on it
+    @cache_writable(resetlist=('bse', 'tvalues', 'pvalues'))
     def scale(self):
-        wresid = self.wresid
-        return np.dot(wresid, wresid) / self.df_resid
+        return self.ssr / self.df_resid
 
     @cache_readonly
     def ssr(self):
-        wresid = self.wresid
-        return np.dot(wresid, wresid)
+        return ss(self.wresid)
 
     @cache_readonly
     def centered_tss(self):
-        centered_wendog = self.model.wendog - np.mean(self.model.wendog)
-        return np.dot(centered_wendog, centered_wendog)
+        wendog = self.model.wendog
+        return ss(wendog - np.mean(wendog, axis=0))
 
     @cache_readonly
     def uncentered_tss(self):
-        wendog = self.model.wendog
-        return np.dot(wendog, wendog)
+        return ss(self.model.wendog)
 
     @cache_readonly
     def ess(self):
@@ -1000,11 +1419,30 @@ class RegressionResults(LikelihoodModelResults):
 
     @cache_readonly
     def bse(self):
+        if self.params.ndim == 2: # one column per response
+            return np.sqrt(np.diag(self.normalized_cov_params)[:,None] *
+                    self.scale)
         return np.sqrt(np.diag(self.cov_params()))
 
+    def t(self, column=None):
+        """
+        Return the t-statistic for a given parameter estimate.
+
+        See LikelihoodModelResults.t.  If the model has n x m `endog`, the
+        t-statistics are returned with one column per response.
+        """
+        if column is None:
+            return self.tvalues
+        column = np.asarray(column)
+        return self.tvalues[column]
+
+    @cache_readonly
+    def tvalues(self):
+        return self.params / self.bse
+
     @cache_readonly
     def pvalues(self):
-        return stats.t.sf(np.abs(self.t()), self.df_resid)*2
+        return stats.t.sf(np.abs(self.tvalues), self.df_resid)*2
 
     @cache_readonly
     def llf(self):
@@ -1025,58 +1463,73 @@ class RegressionResults(LikelihoodModelResults):
 
 #TODO: make these properties reset bse
     def _HCCM(self, scale):
-        H = np.dot(self.model.pinv_wexog,
-            scale[:,None]*self.model.pinv_wexog.T)
+        if self.params.ndim == 2:
+            raise ValueError, "HCCM is only available for a 1d endog"
+        pinv_wexog = self.model.pinv_wexog
+        if pinv_wexog is not None:
+            H = np.dot(pinv_wexog, scale[:,None]*pinv_wexog.T)
+        else:
+            # sandwich with the p x p normalized_cov_params
+            ncp = self.normalized_cov_params
+            H = np.dot(ncp, np.dot(spxtwx(self.model.wexog, scale), ncp))
         return H
 
-    @property
+    @cache_readonly
+    def _leverage(self):
+        # only the diagonal of exog (X'X)^(-1) exog.T, without the n x n array
+        exog = self.model.exog
+        xc = spdot(exog, self.normalized_cov_params)
+        if sparse.issparse(exog):
+            return np.asarray(exog.multiply(xc).sum(1)).ravel()
+        return (xc * exog).sum(1)
+
+    @cache_readonly
+    def cov_HC0(self):
+        self.het_scale = self.resid**2 # or whitened residuals? only OLS?
+        return self._HCCM(self.het_scale)
+
+    @cache_readonly
+    def cov_HC1(self):
+        self.het_scale = self.nobs/(self.df_resid)*(self.resid**2)
+        return self._HCCM(self.het_scale)
+
+    @cache_readonly
+    def cov_HC2(self):
+        self.het_scale = self.resid**2/(1-self._leverage)
+        return self._HCCM(self.het_scale)
+
+    @cache_readonly
+    def cov_HC3(self):
+        self.het_scale = (self.resid/(1-self._leverage))**2
+        return self._HCCM(self.het_scale)
+
+    @cache_readonly
     def HC0_se(self):
         """
         See statsmodels.RegressionResults
         """
-        if self._HC0_se is None:
-            self.het_scale = self.resid**2 # or whitened residuals? only OLS?
-            self.cov_HC0 = self._HCCM(self.het_scale)
-            self._HC0_se = np.sqrt(np.diag(self.cov_HC0))
-        return self._HC0_se
+        return np.sqrt(np.diag(self.cov_HC0))
 
-    @property
+    @cache_readonly
     def HC1_se(self):
         """
         See statsmodels.RegressionResults
         """
-        if self._HC1_se is None:
-            self.het_scale = self.nobs/(self.df_resid)*(self.resid**2)
-            self.cov_HC1 = self._HCCM(self.het_scale)
-            self._HC1_se = np.sqrt(np.diag(self.cov_HC1))
-        return self._HC1_se
+        return np.sqrt(np.diag(self.cov_HC1))
 
-    @property
+    @cache_readonly
     def HC2_se(self):
         """
         See statsmodels.RegressionResults
         """
-        if self._HC2_se is None:
-            h=np.diag(np.dot(np.dot(self.model.exog, self.normalized_cov_params),
-                    self.model.exog.T)) # probably could be optimized
-            self.het_scale= self.resid**2/(1-h)
-            self.cov_HC2 = self._HCCM(self.het_scale)
-            self._HC2_se = np.sqrt(np.diag(self.cov_HC2))
-        return self._HC2_se
+        return np.sqrt(np.diag(self.cov_HC2))
 
-    @property
+    @cache_readonly
     def HC3_se(self):
         """
         See statsmodels.RegressionResults
         """
-        if self._HC3_se is None:
-            h=np.diag(np.dot(np.dot(self.model.exog,
-                self.normalized_cov_params),self.model.exog.T))
-            # above probably could be optimized to only calc the diag
-            self.het_scale=(self.resid/(1-h))**2
-            self.cov_HC3 = self._HCCM(self.het_scale)
-            self._HC3_se = np.sqrt(np.diag(self.cov_HC3))
-        return self._HC3_se
+        return np.sqrt(np.diag(self.cov_HC3))
 
 #TODO: this needs a test
     def norm_resid(self):
@@ -1223,10 +1676,7 @@ class RegressionResults(LikelihoodModelResults):
 
         ########  summary Part 2   #######
 
-        part2data = zip([self.params[i] for i in range(len(xname))],
-                        [self.bse[i] for i in range(len(xname))],
-                        [self.t()[i] for i in range(len(xname))],
-                        [self.pvalues[i] for i in range(len(xname))])
+        part2data = zip(self.params, self.bse, self.tvalues, self.pvalues)
         part2header = ('coefficient', 'std. error', 't-statistic', 'prob.')
         part2stubs = xname
         #dfmt={'data_fmt':["%#12.6g","%#12.6g","%#10.4g","%#5.4g"]}
@@ -1281,6 +1731,37 @@ class RegressionResults(LikelihoodModelResults):
 #      screen. This would take better advantage of table.SimpleTable
         return table
 
+class IncrementalRegressionResults(RegressionResults):
+    """
+    Results of an IncrementalOLS model.
+
+    The sums of squares are computed from the statistics accumulated by
+    the model.  Attributes that need the data, such as resid, wresid and
+    HC0_se, are not available.
+
+    See RegressionResults
+    """
+    @cache_readonly
+    def nobs(self):
+        return self.model.nobs
+
+    @cache_writable()
+    def scale(self):
+        return self.ssr / self.df_resid
+
+    @cache_readonly
+    def ssr(self):
+        return self.model._ssr
+
+    @cache_readonly
+    def centered_tss(self):
+        return self.model._m2_wendog
+
+    @cache_readonly
+    def uncentered_tss(self):
+        model = self.model
+        return model._m2_wendog + model._n_wendog * model._mean_wendog**2
+
 if __name__ == "__main__":
     data = np.recfromcsv('datasets/anes96/anes96.csv', delimiter='\t')
     ols2 = OLS(data['income'], np.column_stack((data['age'],data['educ']))).fit()
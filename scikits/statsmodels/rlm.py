@@ -13,14 +13,23 @@ PJ Huber.  1973,  'The 1972 Wald Memorial Lectures: Robust Regression:
 R Venables, B Ripley. 'Modern Applied Statistics in S'  Springer, New York,
     2002.
 """
+import warnings
 import numpy as np
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+from scipy import stats
 import tools
-from regression import WLS, GLS
+from regression import _ls_solve, _ls_solve_inplace
 from robust import norms, scale
 from model import LikelihoodModel, LikelihoodModelResults
 from decorators import *
 
-__all__ = ['RLM']
+__all__ = ['RLM', 'LTS', 'SEstimator', 'MMEstimator']
+
+# the number of random starts that are improved together
+_BLOCK_SIZE = 50
+# outliers have absolute standardized residuals above _CUTOFF
+_CUTOFF = 2.5
 
 class RLM(LikelihoodModel):
     """
@@ -81,8 +90,9 @@ class RLM(LikelihoodModel):
         data is already an array and it is changed, then `endog` changes
         as well.
     history : dict
-        Contains information about the iterations. Its keys are `fittedvalues`,
-        `deviance`, and `params`.
+        Contains information about the iterations. Its keys are `deviance`,
+        `params`, and `scale`, and `sresid` or `weights` if they are the
+        convergence criterion of the fit.
     M : scikits.statsmodels.robust.norms.RobustNorm
          See above.  Robust estimator instance instantiated.
     nobs : float
@@ -123,6 +133,8 @@ class RLM(LikelihoodModel):
     array([  0.73175452,   1.25082038,  -0.14794399, -40.27122257])
 
     """
+    _data_attr = ['endog', 'exog', 'pinv_wexog', 'weights', 'history']
+    _init_keys = ['M']
 
     def __init__(self, endog, exog, M=norms.HuberT()):
         self.M = M
@@ -162,12 +174,21 @@ class RLM(LikelihoodModel):
         return self.M((self.endog - tmp_results.fittedvalues)/\
                     tmp_results.scale).sum()
 
-    def _update_history(self, tmp_results):
-        self.history['deviance'].append(self.deviance(tmp_results))
-        self.history['params'].append(tmp_results.params)
-        self.history['scale'].append(tmp_results.scale)
-        self.history['sresid'].append(tmp_results.resid/tmp_results.scale)
-        self.history['weights'].append(tmp_results.model.weights)
+    def _update_history(self, params, resid, wls_scale, weights, conv):
+        """
+        Helper method to update history during the IRLS fit.
+
+        The n-length standardized residuals and weights are only kept if they
+        are the convergence criterion `conv`.
+        """
+        sresid = resid/wls_scale
+        self.history['deviance'].append(self.M(sresid).sum())
+        self.history['params'].append(params)
+        self.history['scale'].append(wls_scale)
+        if conv == 'resid':
+            self.history['sresid'].append(sresid)
+        elif conv == 'weights':
+            self.history['weights'].append(weights)
 
     def _estimate_scale(self, resid):
         """
@@ -180,11 +201,13 @@ class RLM(LikelihoodModel):
                 return scale.stand_mad(resid)
         elif isinstance(self.scale_est, scale.HuberScale):
             return scale.hubers_scale(self.df_resid, self.nobs, resid)
+        elif np.isscalar(self.scale_est):
+            return float(self.scale_est)
         else:
             return scale.scale_est(self, resid)**2
 
     def fit(self, maxiter=50, tol=1e-8, scale_est='mad', init=None, cov='H1',
-            update_scale=True, conv='dev'):
+            update_scale=True, conv='dev', keep_data=True, start_params=None):
         """
         Fits the model using iteratively reweighted least squares.
 
@@ -209,7 +232,7 @@ class RLM(LikelihoodModel):
             is used.  Currently it is the only available choice.
         maxiter : int
             The maximum number of iterations to try. Default is 50.
-        scale_est : string or HuberScale()
+        scale_est : string, HuberScale() or float
             'mad', 'stand_mad', or HuberScale()
             Indicates the estimate to use for scaling the weights in the IRLS.
             The default is 'mad' (median absolute deviation.  Other options are
@@ -218,18 +241,33 @@ class RLM(LikelihoodModel):
             Huber's proposal 2 has optional keyword arguments d, tol, and
             maxiter for specifying the tuning constant, the convergence
             tolerance, and the maximum number of iterations.
-            See models.robust.scale for more information.
+            See models.robust.scale for more information.  A float is used
+            as a fixed scale.
         tol : float
             The convergence tolerance of the estimate.  Default is 1e-8.
         update_scale : Bool
             If `update_scale` is False then the scale estimate for the
             weights is held constant over the iteration.  Otherwise, it
             is updated for each fit in the iteration.  Default is True.
+        keep_data : bool
+            If False, remove_data is called on the results, so that they do
+            not hold a reference to the data or the history.
+        start_params : array-like, optional
+            If given, the IRLS starts from the residuals of `start_params`
+            instead of the least squares fit.
 
         Returns
         -------
         results : object
             scikits.statsmodels.rlm.RLMresults
+
+        Notes
+        -----
+        Each IRLS step solves the weighted least squares problem directly.
+        The weighted design and response are written into a work array that
+        is allocated once, and they are overwritten in place by their QR
+        factorization.  See regression._ls_solve_inplace.  The history only
+        holds n-length arrays if `conv` is "resid" or "weights".
         """
         if not cov.upper() in ["H1","H2","H3"]:
             raise AttributeError, "Covariance matrix %s not understood" % cov
@@ -240,10 +278,25 @@ class RLM(LikelihoodModel):
             raise AttributeError, "Convergence argument %s not understood" \
                 % conv
         self.scale_est = scale_est
-        wls_results = WLS(self.endog, self.exog).fit()
+        self.history = {'deviance' : [np.inf], 'params' : [np.inf],
+            'weights' : [np.inf], 'sresid' : [np.inf], 'scale' : []}
+        endog, exog = self.endog, self.exog
+        nobs, k = exog.shape
+        # work array for the weighted design and response
+        aug = np.empty((nobs, k+1), np.float64, order='F')
+        wexog = aug[:,:k]
+        wendog = aug[:,k]
+        if start_params is None:
+            wexog[:] = exog
+            wendog[:] = endog
+            params = _ls_solve_inplace(aug)[0]
+        else:
+            params = np.asarray(start_params, dtype=np.float64)
+        resid = endog - np.dot(exog, params)
         if not init:
-            self.scale = self._estimate_scale(wls_results.resid)
-        self._update_history(wls_results)
+            self.scale = self._estimate_scale(resid)
+        self._update_history(params, resid, np.dot(resid, resid) /
+                self.df_resid, 1., conv)
         self.iteration = 1
         if conv == 'coefs':
             criterion = self.history['params']
@@ -256,17 +309,23 @@ class RLM(LikelihoodModel):
         while (np.all(np.fabs(criterion[self.iteration]-\
                 criterion[self.iteration-1]) > tol) and \
                 self.iteration < maxiter):
-#            self.weights = self.M.weights((self.endog - \
-#                    wls_results.fittedvalues)/self.scale)
-            self.weights = self.M.weights(wls_results.resid/self.scale)
-            wls_results = WLS(self.endog, self.exog,
-                                    weights=self.weights).fit()
+            self.weights = self.M.weights(resid/self.scale)
+            sqrt_weights = np.sqrt(self.weights)
+            np.multiply(exog, sqrt_weights[:,None], wexog)
+            np.multiply(endog, sqrt_weights, wendog)
+            params = _ls_solve_inplace(aug)[0]
+            resid = endog - np.dot(exog, params)
             if update_scale is True:
-                self.scale = self._estimate_scale(wls_results.resid)
-            self._update_history(wls_results)
+                self.scale = self._estimate_scale(resid)
+            # the scale of the weighted least squares fit
+            wresid = np.multiply(resid, sqrt_weights, wendog)
+            self._update_history(params, resid, np.dot(wresid, wresid) /
+                    self.df_resid, self.weights, conv)
             self.iteration += 1
-        results = RLMResults(self, wls_results.params,
+        results = RLMResults(self, params,
                             self.normalized_cov_params, self.scale)
+        if not keep_data:
+            results.remove_data()
         return results
 
 class RLMResults(LikelihoodModelResults):
@@ -353,6 +412,17 @@ class RLMResults(LikelihoodModelResults):
 
         #TODO: "pvals" should come from chisq on bse?
 
+    _data_attr = ['fittedvalues', 'resid', 'sresid', 'weights']
+    _keep_attr = ['bcov_unscaled', 'bcov_scaled', 'bse', 'chisq']
+
+    def _attach_data(self):
+        # the weights of the final residuals, the last IRLS weights were
+        # computed from the residuals of the previous iteration
+        if self.scale == 0:
+            self.model.weights = (self.resid == 0).astype(np.float64)
+        else:
+            self.model.weights = self.model.M.weights(self.sresid)
+
     @cache_readonly
     def fittedvalues(self):
         return np.dot(self.model.exog, self.params)
@@ -376,30 +446,30 @@ class RLMResults(LikelihoodModelResults):
     @cache_readonly
     def bcov_scaled(self):
         model = self.model
-        m = np.mean(model.M.psi_deriv(self.sresid))
-        var_psiprime = np.var(model.M.psi_deriv(self.sresid))
+        if self.scale == 0: # exact fit
+            return np.zeros_like(model.normalized_cov_params)
+        # psi and its derivative are evaluated once for all estimators
+        psi, psi_deriv = model.M.evaluate(self.sresid, ('psi', 'psi_deriv'))
+        m = np.mean(psi_deriv)
+        var_psiprime = np.var(psi_deriv)
         k = 1 + (self.df_model+1)/self.nobs * var_psiprime/m**2
 
         if model.cov == "H1":
             return k**2 * (1/self.df_resid*\
-                np.sum(model.M.psi(self.sresid)**2)*self.scale**2)\
-                /((1/self.nobs*np.sum(model.M.psi_deriv(self.sresid)))**2)\
+                np.sum(psi**2)*self.scale**2)\
+                /((1/self.nobs*np.sum(psi_deriv))**2)\
                 *model.normalized_cov_params
         else:
-            W = np.dot(model.M.psi_deriv(self.sresid)*model.exog.T,
-                    model.exog)
+            W = np.dot(psi_deriv*model.exog.T, model.exog)
             W_inv = np.linalg.inv(W)
             # [W_jk]^-1 = [SUM(psi_deriv(Sr_i)*x_ij*x_jk)]^-1
             # where Sr are the standardized residuals
             if model.cov == "H2":
             # These are correct, based on Huber (1973) 8.13
-                return k*(1/self.df_resid)*np.sum(\
-                    model.M.psi(self.sresid)**2)*self.scale**2\
-                    /((1/self.nobs)*np.sum(\
-                    model.M.psi_deriv(self.sresid)))*W_inv
+                return k*(1/self.df_resid)*np.sum(psi**2)*self.scale**2\
+                    /((1/self.nobs)*np.sum(psi_deriv))*W_inv
             elif model.cov == "H3":
-                return k**-1*1/self.df_resid*np.sum(\
-                    model.M.psi(self.sresid)**2)*self.scale**2\
+                return k**-1*1/self.df_resid*np.sum(psi**2)*self.scale**2\
                     *np.dot(np.dot(W_inv, np.dot(model.exog.T,model.exog)),\
                     W_inv)
 
@@ -412,6 +482,681 @@ class RLMResults(LikelihoodModelResults):
     def chisq(self):
         return (self.params/self.bse)**2
 
+def _subsets(nobs, k, n_subsets, rng):
+    """
+    Returns n_subsets x k indices of random subsets of k of nobs observations.
+    """
+    idx = rng.randint(0, nobs, (n_subsets, k))
+    while True:
+        idx.sort(1)
+        dup = np.any(idx[:,1:] == idx[:,:-1], 1)
+        if not dup.any():
+            return idx
+        idx[dup] = rng.randint(0, nobs, (dup.sum(), k))
+
+def _solve_many(xtx, xty):
+    """
+    Solves the m k x k systems dot(xtx[i], b) = xty[i].
+
+    Singular systems get the minimum norm least squares solution.
+    """
+    try:
+        return np.linalg.solve(xtx, xty[...,None])[...,0]
+    except np.linalg.LinAlgError:
+        return np.array([np.linalg.lstsq(a, b)[0] for a, b in zip(xtx, xty)])
+
+def _wls_many(exog, endog, weights):
+    """
+    Weighted least squares for each column of the n x m weights.
+
+    Returns the k x m parameters.
+    """
+    m = weights.shape[1]
+    k = exog.shape[1]
+    xtwx = np.empty((m, k, k))
+    for j in range(m):
+        xtwx[j] = np.dot(exog.T * weights[:,j], exog)
+    xtwy = np.dot((weights * endog[:,None]).T, exog)
+    return _solve_many(xtwx, xtwy).T
+
+def _m_scale(resid, norm, b, scale0=None, maxiter=100, tol=1e-10, zero=0.):
+    """
+    The M-estimate of scale of each column of resid.
+
+    Solves mean(rho(resid/scale)) = b, where rho is the rho of the
+    TukeyBiweight `norm` shifted to rho(0) = 0.  It starts from `scale0` or
+    the mad of resid.  The steps are Newton steps, or fixed point steps
+    s*sqrt(mean(rho)/b) if the Newton step more than halves or doubles s.
+    Residuals of at most `zero` in absolute value count as 0.
+
+    If the starting scale of a column is 0, more than half of its residuals
+    are 0.  Its scale is 0, an exact fit, if mean(rho) stays at most b as
+    the scale goes to 0.  Otherwise it starts from the mad of the nonzero
+    residuals.
+    """
+    c2 = norm.c**2 / 6.
+    resid2 = resid.reshape(resid.shape[0], -1)
+    if zero > 0:
+        resid2 = np.where(np.fabs(resid2) <= zero, 0., resid2)
+    if scale0 is None:
+        scale0 = scale.mad(resid2)
+    s = np.zeros(resid2.shape[1])
+    s += scale0
+    for j in np.flatnonzero(~(s > 0)):
+        nonzero = resid2[:,j][resid2[:,j] != 0]
+        # mean(rho) goes to c2 * len(nonzero) / n as the scale goes to 0
+        if c2 * len(nonzero) <= b * resid2.shape[0]:
+            s[j] = 0
+        else:
+            s[j] = scale.mad(nonzero)
+    positive = s > 0
+    if positive.all():
+        s = _m_scale_positive(resid2, norm, b, s, maxiter, tol)
+    elif positive.any():
+        s[positive] = _m_scale_positive(resid2[:,positive], norm, b,
+                s[positive], maxiter, tol)
+    if resid.ndim == 1:
+        return s[0]
+    return s
+
+def _m_scale_positive(resid, norm, b, s, maxiter, tol):
+    """
+    The iterations of _m_scale for positive starting scales s.
+    """
+    c2 = norm.c**2 / 6.
+    for i in range(maxiter):
+        z = resid / s
+        rho, psi = norm.evaluate(z, ('rho', 'psi'))
+        rho += c2
+        mean_rho = rho.mean(0)
+        # d mean(rho(resid/s)) / ds = -mean(psi(z)*z)/s
+        psi *= z
+        mean_psiz = psi.mean(0)
+        new_s = s * np.sqrt(mean_rho / b)
+        newton = s * (1 + (mean_rho - b) / np.maximum(mean_psiz, 1e-300))
+        use_newton = (newton > .5 * s) & (newton < 2 * s)
+        new_s = np.where(use_newton, newton, new_s)
+        if np.all(np.fabs(new_s - s) <= tol * new_s):
+            return new_s
+        s = new_s
+    return s
+
+class _HighBreakdownModel(LikelihoodModel):
+    """
+    Linear models that are fit by a search over random starts.
+
+    Subclasses implement _improve, which improves the parameters of a set of
+    starts and returns their objective.
+    """
+
+    def __init__(self, endog, exog):
+        super(_HighBreakdownModel, self).__init__(endog, exog)
+        self.endog = np.asarray(self.endog, dtype=np.float64)
+        self.exog = np.asarray(self.exog, dtype=np.float64)
+
+    def initialize(self):
+        self.df_resid = np.float(self.exog.shape[0] - tools.rank(self.exog))
+        self.df_model = np.float(tools.rank(self.exog)-1)
+        # residuals of at most _exact_tol are rounding errors of an exact fit
+        self._exact_tol = 1e-12 * np.fabs(self.endog).max()
+
+    def _search(self, n_starts, n_best, max_subsample, maxiter, tol, seed,
+            n_jobs):
+        """
+        Returns the best parameters of n_starts random starts.
+
+        The starts are exact fits to random subsets of k observations.  They
+        are improved by two steps of _improve on a random subsample of at
+        most max_subsample observations.  The n_best of them are iterated to
+        convergence.  With a subsample, they converge on the subsample, and
+        only the best after two more steps on all observations is iterated to
+        convergence on all observations.
+        """
+        rng = np.random.RandomState(seed)
+        nobs, k = self.exog.shape
+        if max_subsample and nobs > max_subsample:
+            subset = rng.permutation(nobs)[:max_subsample]
+            exog, endog = self.exog[subset], self.endog[subset]
+        else:
+            exog, endog = self.exog, self.endog
+        # blocks of starts with their own seeds, so that the starts are the
+        # same for any n_jobs
+        sizes = [_BLOCK_SIZE] * (n_starts // _BLOCK_SIZE)
+        if n_starts % _BLOCK_SIZE:
+            sizes.append(n_starts % _BLOCK_SIZE)
+        seeds = rng.randint(0, 2**31 - 1, len(sizes))
+
+        def search_block(args):
+            block_seed, size = args
+            idx = _subsets(endog.shape[0], k, size,
+                    np.random.RandomState(block_seed))
+            params = _solve_many(exog[idx], endog[idx]).T
+            return self._improve(exog, endog, params, 2, tol)
+
+        if n_jobs is None or n_jobs < 1:
+            n_jobs = multiprocessing.cpu_count()
+        n_jobs = min(n_jobs, len(sizes))
+        if n_jobs <= 1:
+            blocks = map(search_block, zip(seeds, sizes))
+        else:
+            pool = ThreadPool(n_jobs)
+            try:
+                blocks = pool.map(search_block, zip(seeds, sizes))
+            finally:
+                pool.close()
+                pool.join()
+        params = np.column_stack([block[0] for block in blocks])
+        objective = np.concatenate([block[1] for block in blocks])
+        params = params[:,np.argsort(objective)[:n_best]]
+        if exog is not self.exog:
+            params = self._improve(exog, endog, params, maxiter, tol)[0]
+            params, objective = self._improve(self.exog, self.endog, params,
+                    2, tol)
+            params = params[:,[np.argmin(objective)]]
+        params, objective = self._improve(self.exog, self.endog, params,
+                maxiter, tol)
+        i = np.argmin(objective)
+        return params[:,i], objective[i]
+
+    def _improve(self, exog, endog, params, maxiter, tol):
+        raise NotImplementedError
+
+    def _fit_args(self, n_starts, n_best, max_subsample):
+        k = self.exog.shape[1]
+        if n_starts < 1 or n_best < 1:
+            raise ValueError, "n_starts and n_best have to be positive"
+        if max_subsample and max_subsample <= k:
+            raise ValueError, "max_subsample has to be larger than k"
+
+class LTS(_HighBreakdownModel):
+    """
+    Least trimmed squares regression.
+
+    The parameters minimize the sum of the `h` smallest squared residuals.
+    The estimator has a breakdown point of up to 50 percent, also for
+    outliers in exog.
+
+    Parameters
+    ----------
+    endog : array-like
+        1d endogenous response variable
+    exog : array-like
+        n x p exogenous design matrix
+
+    See also
+    --------
+    SEstimator, MMEstimator
+
+    Notes
+    -----
+    The fit uses FAST-LTS, which improves the exact fits to random subsets of
+    p observations by concentration steps.  A concentration step fits least
+    squares to the `h` observations with the smallest squared residuals,
+    which never increases the objective.
+
+    References
+    ----------
+    PJ Rousseeuw, K Van Driessen. 2006, 'Computing LTS regression for large
+        data sets.'  Data Mining and Knowledge Discovery, 12, 29-45.
+
+    Examples
+    --------
+    >>> import scikits.statsmodels as sm
+    >>> data = sm.datasets.stackloss.load()
+    >>> data.exog = sm.add_constant(data.exog)
+    >>> lts_results = sm.LTS(data.endog, data.exog).fit(seed=1234)
+    >>> lts_results.params
+    >>> lts_results.weights
+    """
+
+    def _improve(self, exog, endog, params, maxiter, tol):
+        """
+        Concentration steps for each column of params.
+
+        Returns the params and the sums of the h smallest squared residuals.
+        The steps stop for a column once the relative decrease of its
+        objective is at most tol.
+        """
+        nobs, k = exog.shape
+        # h is scaled for a subsample
+        h = max(int(round(self.h * nobs / self.nobs)), k + 1)
+        params = params.copy()
+        objective = np.empty(params.shape[1])
+        objective.fill(np.inf)
+        active = np.arange(params.shape[1])
+        for i in range(maxiter + 1):
+            # the observations are along the rows for a fast partition
+            resid2 = endog - np.dot(params[:,active].T, exog.T)
+            resid2 **= 2
+            idx = np.argpartition(resid2, h - 1, axis=1)[:,:h]
+            new_objective = resid2[np.arange(len(active))[:,None],
+                    idx].sum(1)
+            decreased = objective[active] - new_objective > \
+                    tol * new_objective
+            objective[active] = new_objective
+            if i == maxiter or not decreased.any():
+                break
+            active, idx = active[decreased], idx[decreased]
+            xtx = np.empty((len(active), k, k))
+            xty = np.empty((len(active), k))
+            for j in range(len(active)):
+                exog_h = exog[idx[j]]
+                xtx[j] = np.dot(exog_h.T, exog_h)
+                xty[j] = np.dot(endog[idx[j]], exog_h)
+            params[:,active] = _solve_many(xtx, xty).T
+        return params, objective
+
+    def fit(self, h=None, n_starts=500, n_best=10, max_subsample=1500,
+            maxiter=100, tol=1e-8, reweight=True, seed=None, n_jobs=1,
+            keep_data=True):
+        """
+        Fits the model with FAST-LTS.
+
+        Parameters
+        ----------
+        h : int, optional
+            The number of observations whose squared residuals are summed.
+            The default is (n + p + 1)//2, which gives the highest breakdown
+            point.
+        n_starts : int
+            The number of random starts.  Default is 500.
+        n_best : int
+            The number of starts that are iterated to convergence.  Default
+            is 10.
+        max_subsample : int or None
+            If there are more observations, the starts are compared on a
+            random subsample of `max_subsample` observations.  Default is
+            1500.  None uses all observations.
+        maxiter : int
+            The maximum number of concentration steps for the best starts.
+            Default is 100.
+        tol : float
+            The concentration steps stop once the objective decreases by a
+            relative amount of at most `tol`.  Default is 1e-8.
+        reweight : bool
+            If True, the default, the parameters are the least squares fit
+            to the observations whose absolute standardized LTS residuals are
+            at most 2.5.  Otherwise they are the LTS estimates.
+        seed : int or None
+            The seed of the random starts.  The same seed gives the same
+            results, also for different `n_jobs`.
+        n_jobs : int
+            The number of threads that improve the starts.  Default is 1.
+            None uses all cores.  Most of the time is spent in numpy and
+            LAPACK code that releases the GIL.
+        keep_data : bool
+            If False, remove_data is called on the results.
+
+        Returns
+        -------
+        results : HighBreakdownResults
+            Its `objective` is the sum of the h smallest squared residuals of
+            the LTS estimates.
+        """
+        nobs, k = self.exog.shape
+        if h is None:
+            h = (nobs + k + 1) // 2
+        if not k < h <= nobs:
+            raise ValueError, "h has to be larger than p and at most n"
+        self._fit_args(n_starts, n_best, max_subsample)
+        self.h = h
+        params, objective = self._search(n_starts, n_best, max_subsample,
+                maxiter, tol, seed, n_jobs)
+        resid = self.endog - np.dot(self.exog, params)
+        # consistency factor for the trimmed normal distribution
+        q = stats.norm.ppf(.5 + .5 * h / float(nobs))
+        lts_scale = np.sqrt(objective / h / (1 - 2 * nobs * q *
+                stats.norm.pdf(q) / h))
+        if reweight:
+            # a zero lts_scale is an exact fit to the inliers, which are
+            # then the residuals that are 0 up to rounding
+            inliers = np.fabs(resid) <= max(_CUTOFF * lts_scale,
+                    self._exact_tol)
+            params, normalized_cov_params, _ = _ls_solve(self.exog[inliers],
+                    self.endog[inliers])
+            resid = self.endog - np.dot(self.exog, params)
+            n_in = inliers.sum()
+            q = _CUTOFF
+            frac = 2 * stats.norm.cdf(q) - 1
+            scale_ = np.sqrt(np.dot(resid[inliers], resid[inliers]) /
+                    (n_in - k) / (1 - 2 * q * stats.norm.pdf(q) / frac))
+        else:
+            normalized_cov_params = np.linalg.pinv(np.dot(self.exog.T,
+                    self.exog))
+            scale_ = lts_scale
+        if scale_ <= self._exact_tol: # exact fit
+            scale_ = 0.
+        results = HighBreakdownResults(self, params, normalized_cov_params,
+                scale_)
+        results.objective = objective
+        results.lts_scale = lts_scale
+        if not keep_data:
+            results.remove_data()
+        return results
+
+    def _weights(self, sresid):
+        return (np.fabs(sresid) <= _CUTOFF).astype(np.float64)
+
+class SEstimator(_HighBreakdownModel):
+    """
+    S-estimator of a linear model.
+
+    The parameters minimize the M-estimate of scale of the residuals.
+
+    Parameters
+    ----------
+    endog : array-like
+        1d endogenous response variable
+    exog : array-like
+        n x p exogenous design matrix
+    norm : TukeyBiweight, optional
+        The norm of the M-estimate of scale.  The default tuning constant
+        c = 1.54764 gives a breakdown point of 50 percent.
+
+    See also
+    --------
+    LTS, MMEstimator
+
+    Notes
+    -----
+    The scale s solves sum(rho(resid/s))/(n - p) = b, where rho is the rho
+    of `norm` shifted to rho(0) = 0, and b is half of the maximum of rho.
+
+    The fit uses the fast-S algorithm.  The exact fits to random subsets of
+    p observations are improved by iteratively reweighted least squares
+    steps with the weights of `norm`, and one fixed point step for the
+    scale each.
+
+    The normalized covariance of the parameters is
+    mean(psi**2)/mean(psi_deriv)**2 * inv(dot(exog.T, exog)), evaluated at
+    the standardized residuals.
+
+    References
+    ----------
+    M Salibian-Barrera, VJ Yohai. 2006, 'A fast algorithm for S-regression
+        estimates.'  Journal of Computational and Graphical Statistics, 15,
+        414-427.
+    """
+    _init_keys = ['norm']
+
+    def __init__(self, endog, exog, norm=norms.TukeyBiweight(c=1.54764)):
+        self.norm = norm
+        super(SEstimator, self).__init__(endog, exog)
+
+    def _improve(self, exog, endog, params, maxiter, tol):
+        """
+        IRLS steps for each column of params.
+
+        Returns the params and their M-estimates of scale.  The steps stop
+        for a column once the relative change of its params is at most tol.
+        A column whose scale is 0 is an exact fit and is kept.
+        """
+        nobs, k = exog.shape
+        b = self.norm.c**2 / 12. * (nobs - k) / nobs
+        params = params.copy()
+        s = None
+        active = np.arange(params.shape[1])
+        for i in range(maxiter):
+            resid = endog[:,None] - np.dot(exog, params[:,active])
+            if s is None:
+                s = s_active = _m_scale(resid, self.norm, b, maxiter=1,
+                        zero=self._exact_tol)
+            else:
+                s_active = _m_scale(resid, self.norm, b, s[active], maxiter=1,
+                        zero=self._exact_tol)
+                s[active] = s_active
+            exact = s_active == 0
+            if exact.any():
+                s_active = np.where(exact, 1., s_active)
+            weights = self.norm.evaluate(resid / s_active, ('weights',))[0]
+            if exact.any():
+                weights[:,exact] = 1.
+            new_params = _wls_many(exog, endog, weights)
+            new_params[:,exact] = params[:,active[exact]]
+            converged = np.all(np.fabs(new_params - params[:,active]) <=
+                    tol * (np.fabs(params[:,active]) + tol), 0)
+            params[:,active] = new_params
+            active = active[~converged]
+            if not len(active):
+                break
+        resid = endog[:,None] - np.dot(exog, params)
+        return params, _m_scale(resid, self.norm, b, s, zero=self._exact_tol)
+
+    def fit(self, n_starts=500, n_best=10, max_subsample=1500, maxiter=100,
+            tol=1e-8, seed=None, n_jobs=1, keep_data=True):
+        """
+        Fits the model with the fast-S algorithm.
+
+        Parameters
+        ----------
+        n_starts : int
+            The number of random starts.  Default is 500.
+        n_best : int
+            The number of starts that are iterated to convergence.  Default
+            is 10.
+        max_subsample : int or None
+            If there are more observations, the starts are compared on a
+            random subsample of `max_subsample` observations.  Default is
+            1500.  None uses all observations.
+        maxiter : int
+            The maximum number of IRLS steps for the best starts.  Default is
+            100.
+        tol : float
+            The IRLS steps stop once the parameters change by a relative
+            amount of at most `tol`.  Default is 1e-8.
+        seed : int or None
+            The seed of the random starts.  The same seed gives the same
+            results, also for different `n_jobs`.
+        n_jobs : int
+            The number of threads that improve the starts.  Default is 1.
+            None uses all cores.
+        keep_data : bool
+            If False, remove_data is called on the results.
+
+        Returns
+        -------
+        results : HighBreakdownResults
+            Its `scale` and `objective` are the M-estimate of scale.
+
+        Notes
+        -----
+        If more than about half of the observations lie exactly on a
+        hyperplane, the scale is 0.  The parameters are then the exact fit,
+        the normalized covariance is 0, and a warning is issued.
+        """
+        self._fit_args(n_starts, n_best, max_subsample)
+        params, s = self._search(n_starts, n_best, max_subsample, maxiter,
+                tol, seed, n_jobs)
+        k = self.exog.shape[1]
+        if s == 0:
+            warnings.warn("The S-estimate of scale is 0, the data have an "
+                    "exact fit")
+            normalized_cov_params = np.zeros((k, k))
+        else:
+            sresid = (self.endog - np.dot(self.exog, params)) / s
+            psi, psi_deriv = self.norm.evaluate(sresid, ('psi',
+                'psi_deriv'))
+            normalized_cov_params = np.mean(psi**2) / \
+                    np.mean(psi_deriv)**2 * \
+                    np.linalg.pinv(np.dot(self.exog.T, self.exog))
+        results = HighBreakdownResults(self, params, normalized_cov_params,
+                s)
+        results.objective = s
+        if not keep_data:
+            results.remove_data()
+        return results
+
+    def _weights(self, sresid):
+        return self.norm.weights(sresid)
+
+class MMEstimator(RLM):
+    """
+    MM-estimator of a linear model.
+
+    An M-estimate with a redescending norm that starts from an S-estimate
+    and keeps its scale fixed.  It has the breakdown point of the
+    S-estimate and the efficiency of the M-estimate.
+
+    Parameters
+    ----------
+    endog : array-like
+        1d endogenous response variable
+    exog : array-like
+        n x p exogenous design matrix
+    M : TukeyBiweight, optional
+        The norm of the M-estimate.  The default c = 4.685 gives an
+        efficiency of 95 percent for normal errors.
+    s_norm : TukeyBiweight, optional
+        The norm of the S-estimate.  The default c = 1.547 gives a
+        breakdown point of 50 percent.
+
+    See also
+    --------
+    RLM, SEstimator
+
+    References
+    ----------
+    VJ Yohai. 1987, 'High breakdown-point and high efficiency robust
+        estimates for regression.'  The Annals of Statistics, 15, 642-656.
+
+    Examples
+    --------
+    >>> import scikits.statsmodels as sm
+    >>> data = sm.datasets.stackloss.load()
+    >>> data.exog = sm.add_constant(data.exog)
+    >>> mm_results = sm.MMEstimator(data.endog, data.exog).fit(seed=1234)
+    >>> mm_results.params
+    >>> mm_results.s_results.scale
+    """
+    _init_keys = ['M', 's_norm']
+
+    def __init__(self, endog, exog, M=norms.TukeyBiweight(),
+            s_norm=norms.TukeyBiweight(c=1.54764)):
+        self.s_norm = s_norm
+        super(MMEstimator, self).__init__(endog, exog, M)
+
+    def fit(self, maxiter=50, tol=1e-8, cov='H1', conv='dev', n_starts=500,
+            n_best=10, max_subsample=1500, seed=None, n_jobs=1,
+            keep_data=True):
+        """
+        Fits the S-estimate and then the M-estimate by IRLS.
+
+        Parameters
+        ----------
+        maxiter, tol, cov, conv, keep_data
+            See RLM.fit.
+        n_starts, n_best, max_subsample, seed, n_jobs
+            See SEstimator.fit.
+
+        Returns
+        -------
+        results : RLMResults
+            Its `s_results` are the HighBreakdownResults of the S-estimate.
+            Its `scale` is the scale of the S-estimate.
+
+        Notes
+        -----
+        If the scale of the S-estimate is 0, the data have an exact fit.  The
+        M-step is then skipped, the parameters are those of the S-estimate,
+        the weights are 1 for the observations with a zero residual and 0
+        otherwise, and the covariance is 0.
+        """
+        s_results = SEstimator(self.endog, self.exog, self.s_norm).fit(
+                n_starts=n_starts, n_best=n_best,
+                max_subsample=max_subsample, seed=seed, n_jobs=n_jobs)
+        exact = s_results.scale == 0
+        if exact:
+            maxiter = 1 # no IRLS iterations
+        results = super(MMEstimator, self).fit(maxiter=maxiter, tol=tol,
+                scale_est=s_results.scale, cov=cov, update_scale=False,
+                conv=conv, keep_data=True, start_params=s_results.params)
+        if exact:
+            self.weights = s_results.weights
+        if not keep_data:
+            s_results.remove_data()
+            results.remove_data()
+        results.s_results = s_results
+        return results
+
+class HighBreakdownResults(LikelihoodModelResults):
+    """
+    Class to contain LTS and SEstimator results
+
+    **Attributes**
+
+    bcov_scaled : array
+        p x p covariance matrix of the parameters, scale**2 *
+        normalized_cov_params
+    bse : array
+        The standard errors of the parameters.
+    fittedvalues : array
+        The linear predicted values.  dot(exog, params)
+    lts_scale : float
+        LTS only.  The consistency corrected scale of the LTS residuals.
+    model : LTS or SEstimator instance
+        A reference to the model instance
+    objective : float
+        The minimized objective.  The sum of the h smallest squared residuals
+        for LTS, the M-estimate of scale for SEstimator.
+    params : array
+        The coefficients of the fitted model
+    resid : array
+        The residuals of the fitted model.  endog - fittedvalues
+    scale : float
+        The robust estimate of the standard deviation of the errors.
+    sresid : array
+        The scaled residuals.
+    weights : array
+        The weights of the observations.  For LTS, 1 if the absolute scaled
+        residual is at most 2.5 and 0 otherwise.  For SEstimator, the
+        weights of its norm.  If the scale is 0, 1 for the observations with
+        a zero residual and 0 otherwise.  Residuals of at most 1e-12 times
+        the largest absolute endog count as 0.
+
+    See also
+    --------
+    scikits.statsmodels.model.LikelihoodModelResults
+    """
+
+    def __init__(self, model, params, normalized_cov_params, scale):
+        super(HighBreakdownResults, self).__init__(model, params,
+                normalized_cov_params, scale)
+        self.model = model
+        self.df_model = model.df_model
+        self.df_resid = model.df_resid
+        self.nobs = model.nobs
+        self._cache = resettable_cache()
+
+    _data_attr = ['fittedvalues', 'resid', 'sresid', 'weights']
+    _keep_attr = ['bcov_scaled', 'bse']
+
+    @cache_readonly
+    def fittedvalues(self):
+        return np.dot(self.model.exog, self.params)
+
+    @cache_readonly
+    def resid(self):
+        return self.model.endog - self.fittedvalues
+
+    @cache_readonly
+    def sresid(self):
+        return self.resid/self.scale
+
+    @cache_readonly
+    def weights(self):
+        if self.scale == 0:
+            return (np.fabs(self.resid) <=
+                    self.model._exact_tol).astype(np.float64)
+        return self.model._weights(self.sresid)
+
+    @cache_readonly
+    def bcov_scaled(self):
+        return self.cov_params(scale=self.scale**2)
+
+    @cache_readonly
+    def bse(self):
+        return np.sqrt(np.diag(self.bcov_scaled))
+
 if __name__=="__main__":
 #NOTE: This is to be removed
 #Delivery Time Data is taken from Montgomery and Peck
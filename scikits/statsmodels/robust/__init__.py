@@ -7,4 +7,5 @@ import numpy.linalg as L
 #from scikits.statsmodels.robust import norms
 #from scikits.statsmodels.robust.scale import MAD, stand_MAD, Huber
 import norms
-from scale import mad, stand_mad, Huber, HuberScale, hubers_scale
+from scale import mad, stand_mad, Huber, HuberScale, hubers_scale, \
+        QuantileSketch
@@ -18,6 +18,8 @@ class RobustNorm(object):
     -------
     call
         Returns the value of estimator rho applied to an input
+    evaluate
+        Returns several of rho, psi, psi_deriv and weights at once.
     psi
         Returns the derivative of rho.  Sometimes referred to as the influence
         function.
@@ -85,6 +87,63 @@ class RobustNorm(object):
     def __call__(self, z):
         return self.rho(z)
 
+    _functions = ('rho', 'psi', 'psi_deriv', 'weights')
+
+    def evaluate(self, z, what=('psi', 'psi_deriv', 'weights'), out=None):
+        """
+        Evaluates several functions of the norm at once.
+
+        Parameters
+        ----------
+        z : array-like
+            1d array
+        what : sequence of str
+            The names of the functions, any of 'rho', 'psi', 'psi_deriv' and
+            'weights'.  The default is ('psi', 'psi_deriv', 'weights').
+        out : sequence of arrays, optional
+            One float64 array with the shape of `z` for each name in `what`,
+            which the values are written into.  If `out` or an entry is None,
+            a new array is allocated.
+
+        Returns
+        -------
+        tuple of arrays
+            The values of the functions in the order of `what`.
+
+        Notes
+        -----
+        The absolute values of `z` and the masks of the pieces of the norm are
+        computed only once for all the functions.  Passing the same `out`
+        arrays in an iteration avoids allocating n-length arrays.
+        """
+        z = np.asarray(z, dtype=np.float64)
+        if isinstance(what, str):
+            what = (what,)
+        if out is None:
+            out = [None] * len(what)
+        if len(out) != len(what):
+            raise ValueError, "out needs one array for each name in what"
+        buffers = {}
+        for name, buf in zip(what, out):
+            if name not in self._functions:
+                raise ValueError, "%s is not a function of the norm" % name
+            if buf is None:
+                buf = np.empty(z.shape, np.float64)
+            elif buf.shape != z.shape:
+                raise ValueError, "out arrays need the shape of z"
+            buffers[name] = buf
+        self._evaluate(z, buffers)
+        return tuple([buffers[name] for name in what])
+
+    def _evaluate(self, z, out):
+        """
+        Writes the functions at z into the arrays of the dict out.
+
+        Subclasses share intermediate results between the functions.
+        """
+        for name, buf in out.iteritems():
+            buf[...] = getattr(self, name)(z)
+
 class LeastSquares(RobustNorm):
 
     """
@@ -162,6 +221,16 @@ class LeastSquares(RobustNorm):
 
         return np.ones(z.shape, np.float64)
 
+    def _evaluate(self, z, out):
+        if 'rho' in out:
+            np.multiply(z, z, out['rho'])
+            out['rho'] *= 0.5
+        if 'psi' in out:
+            out['psi'][...] = z
+        for name in ['psi_deriv', 'weights']:
+            if name in out:
+                out[name].fill(1.)
+
 class HuberT(RobustNorm):
     """
     Huber's T for M estimation.
@@ -259,6 +328,25 @@ class HuberT(RobustNorm):
         """
         return np.less_equal(np.fabs(z), self.t)
 
+    def _evaluate(self, z, out):
+        t = self.t
+        absz = np.fabs(z)
+        test = np.less_equal(absz, t)
+        if 'rho' in out:
+            rho = out['rho']
+            np.multiply(absz, t, rho)
+            rho -= 0.5 * t**2
+            rho[test] = 0.5 * z[test]**2
+        if 'psi' in out:
+            np.clip(z, -t, t, out['psi'])
+        if 'weights' in out:
+            weights = out['weights']
+            weights.fill(1.)
+            outside = ~test
+            weights[outside] = t / absz[outside]
+        if 'psi_deriv' in out:
+            out['psi_deriv'][...] = test
+
 #TODO: untested, but looks right.  RamsayE not available in R or SAS?
 class RamsayE(RobustNorm):
     """
@@ -347,6 +435,20 @@ class RamsayE(RobustNorm):
         return np.exp(-self.a * np.fabs(z)) + z**2*\
                 np.exp(-self.a*np.fabs(z))*-self.a/np.fabs(z)
 
+    def _evaluate(self, z, out):
+        a = self.a
+        absz = np.fabs(z)
+        expz = np.exp(-a * absz)
+        if 'rho' in out:
+            out['rho'][...] = (1 - expz * (1 + a * absz)) / a**2
+        if 'psi' in out:
+            np.multiply(z, expz, out['psi'])
+        if 'weights' in out:
+            out['weights'][...] = expz
+        if 'psi_deriv' in out:
+            # z**2/|z| = |z|
+            out['psi_deriv'][...] = expz * (1 - a * absz)
+
 class AndrewWave(RobustNorm):
 
     """
@@ -457,6 +559,25 @@ class AndrewWave(RobustNorm):
         test = self._subset(z)
         return test*np.cos(z / self.a)/self.a
 
+    def _evaluate(self, z, out):
+        a = self.a
+        test = np.less_equal(np.fabs(z), a * np.pi)
+        zin = z[test] / a
+        if 'rho' in out:
+            out['rho'].fill(2 * a)
+            out['rho'][test] = a * (1 - np.cos(zin))
+        if 'psi' in out or 'weights' in out:
+            sinz = np.sin(zin)
+        if 'psi' in out:
+            out['psi'].fill(0.)
+            out['psi'][test] = sinz
+        if 'weights' in out:
+            out['weights'].fill(0.)
+            out['weights'][test] = sinz / zin
+        if 'psi_deriv' in out:
+            out['psi_deriv'].fill(0.)
+            out['psi_deriv'][test] = np.cos(zin) / a
+
 #TODO: this is untested
 class TrimmedMean(RobustNorm):
     """
@@ -548,7 +669,7 @@ class TrimmedMean(RobustNorm):
         test = self._subset(z)
         return test
 
-    def psi_derive(self, z):
+    def psi_deriv(self, z):
         """
         The derivative of least trimmed mean psi function
 
@@ -556,9 +677,20 @@ class TrimmedMean(RobustNorm):
         -----
         Used to estimate the robust covariance matrix.
         """
-        test = self.subzet(z)
+        test = self._subset(z)
         return test
 
+    def _evaluate(self, z, out):
+        test = self._subset(z)
+        if 'rho' in out:
+            np.multiply(z, z, out['rho'])
+            out['rho'] *= 0.5 * test
+        if 'psi' in out:
+            np.multiply(z, test, out['psi'])
+        for name in ['psi_deriv', 'weights']:
+            if name in out:
+                out[name][...] = test
+
 class Hampel(RobustNorm):
     """
 
@@ -681,6 +813,31 @@ class Hampel(RobustNorm):
         t1, t2, t3 = self._subset(z)
         return t1 + t3 * (self.a*np.sign(z)*z)/(np.fabs(z)*(self.c-self.b))
 
+    def _evaluate(self, z, out):
+        a = self.a; b = self.b; c = self.c
+        absz = np.fabs(z)
+        t1 = np.less_equal(absz, a)
+        t2 = np.less_equal(absz, b) * ~t1
+        t3 = np.less_equal(absz, c) * np.greater(absz, b)
+        if 'rho' in out:
+            out['rho'][...] = (t1 * absz**2 * 0.5 +
+                    t2 * (a * absz - a**2 * 0.5) +
+                    t3 * (a * (c * absz - absz**2 * 0.5) / (c - b) -
+                        7 * a**2 / 6.) +
+                    (1 - t1 + t2 + t3) * a * (b + c - a))
+        if 'psi' in out or 'psi_deriv' in out:
+            s = np.sign(z)
+        if 'psi' in out:
+            out['psi'][...] = s * (t1 * absz + t2 * a*s +
+                    t3 * a*s * (c - absz) / (c - b))
+        if 'weights' in out:
+            weights = out['weights']
+            weights[...] = (t1 + t2 * a/absz +
+                    t3 * a*(c-absz)/(absz*(c-b)))
+            weights[np.isnan(weights)] = 1.
+        if 'psi_deriv' in out:
+            out['psi_deriv'][...] = t1 + t3 * (a*s*z)/(absz*(c-b))
+
 class TukeyBiweight(RobustNorm):
     """
 
@@ -781,6 +938,28 @@ class TukeyBiweight(RobustNorm):
         return subset*((1 - (z/self.c)**2)**2 - (4*z**2/self.c**2) *\
                     (1-(z/self.c)**2))
 
+    def _evaluate(self, z, out):
+        c = self.c
+        # u = 1 - (z/c)**2 inside the subset and 0 outside, where all the
+        # functions are 0
+        u = z / c
+        u *= u
+        np.subtract(1, u, u)
+        np.maximum(u, 0, u)
+        u2 = u * u
+        if 'rho' in out:
+            np.multiply(u2, u, out['rho'])
+            out['rho'] *= -c**2 / 6.
+        if 'psi' in out:
+            np.multiply(z, u2, out['psi'])
+        if 'psi_deriv' in out:
+            # u**2 - 4*(z/c)**2*u with (z/c)**2 = 1 - u
+            np.multiply(u, 5, out['psi_deriv'])
+            out['psi_deriv'] -= 4
+            out['psi_deriv'] *= u
+        if 'weights' in out:
+            out['weights'][...] = u2
+
 def estimate_location(a, scale, norm=HuberT(), axis=0, initial=None,
                       maxiter=30, tol=1.0e-06):
     """
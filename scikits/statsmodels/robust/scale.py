@@ -7,6 +7,9 @@ PJ Huber.  'Robust Statistics' John Wiley and Sons, Inc., New York, 1981.
 
 R Venables, B Ripley. 'Modern Applied Statistics in S'
     Springer, New York, 2002.
+
+T Dunning, O Ertl. 'Computing extremely accurate quantiles using
+    t-digests.'  arXiv:1902.04023, 2019.
 """
 
 import numpy as np
@@ -14,7 +17,59 @@ from scipy.stats import norm as Gaussian
 import norms
 from scikits.statsmodels import tools
 
-def mad(a, c=Gaussian.ppf(3/4.), axis=0):  # c \approx .6745
+def _median_inplace(a, axis=0):
+    """
+    The median of a along axis.  a is partially sorted in place.
+
+    np.partition selects the middle order statistics in linear time instead
+    of sorting a.
+    """
+    n = a.shape[axis]
+    half = n // 2
+    if n % 2:
+        a.partition(half, axis=axis)
+        return a.take(half, axis=axis)
+    a.partition([half - 1, half], axis=axis)
+    return a.take([half - 1, half], axis=axis).mean(axis=axis)
+
+def _weighted_median(a, weights, axis=0):
+    """
+    The weighted median of a along axis.
+
+    weights is 1d with the length of axis.  The weighted median is the
+    smallest value at which the cumulative weight reaches half of the total
+    weight.  If it is half up to rounding, the value is averaged with the
+    next one, so that equal weights give the median.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.ndim != 1 or len(weights) != a.shape[axis]:
+        raise ValueError, "weights have to be 1d with the length of axis"
+    if np.any(weights < 0):
+        raise ValueError, "weights have to be nonnegative"
+    if not np.any(weights > 0):
+        raise ValueError, "at least one weight has to be positive"
+    positive = weights > 0
+    a = np.rollaxis(a.compress(positive, axis=axis), axis, a.ndim)
+    weights = weights[positive]
+    shape = a.shape[:-1]
+    a = a.reshape(-1, a.shape[-1])
+    order = a.argsort(axis=-1)
+    rows = np.arange(a.shape[0])[:,None]
+    sorted_a = a[rows, order]
+    cumweights = weights[order].cumsum(-1)
+    half = cumweights[:,-1:] / 2.
+    # the cumulative weights are only accurate up to rounding
+    tol = 1e-12 * cumweights[:,-1:]
+    idx = (cumweights < half - tol).sum(-1)
+    rows = rows[:,0]
+    median = sorted_a[rows, idx]
+    at_half = (np.abs(cumweights[rows, idx] - half[:,0]) <= tol[:,0]) & \
+            (idx + 1 < a.shape[1])
+    median[at_half] = (median[at_half] + sorted_a[rows[at_half],
+        idx[at_half] + 1]) / 2.
+    return median.reshape(shape)
+
+def mad(a, c=Gaussian.ppf(3/4.), axis=0, weights=None):  # c \approx .6745
     """
     The Median Absolute Deviation along given axis of an array
 
@@ -27,16 +82,25 @@ def mad(a, c=Gaussian.ppf(3/4.), axis=0):  # c \approx .6745
         which is approximately .6745.
     axis : int, optional
         The defaul is 0.
+    weights : array-like, optional
+        Nonnegative weights of the observations along `axis`.  If given, the
+        median is the weighted median.
 
     Returns
     -------
     mad : float
         `mad` = median(abs(`a`))/`c`
+
+    See also
+    --------
+    QuantileSketch : streaming and mergeable estimates of mad
     """
     a = np.asarray(a)
-    return np.median((np.fabs(a))/c, axis=axis)
+    if weights is not None:
+        return _weighted_median(np.fabs(a), weights, axis=axis)/c
+    return _median_inplace(np.fabs(a), axis=axis)/c
 
-def stand_mad(a, c=Gaussian.ppf(3/4.), axis=0):
+def stand_mad(a, c=Gaussian.ppf(3/4.), axis=0, weights=None):
     """
     The standardized Median Absolute Deviation along given axis of an array.
 
@@ -49,17 +113,238 @@ def stand_mad(a, c=Gaussian.ppf(3/4.), axis=0):
         which is approximately .6745.
     axis : int, optional
         The defaul is 0.
+    weights : array-like, optional
+        Nonnegative weights of the observations along `axis`.  If given, the
+        medians are weighted medians.
 
     Returns
     -------
     mad : float
         `mad` = median(abs(`a`-median(`a`))/`c`
+
+    See also
+    --------
+    QuantileSketch : streaming and mergeable estimates of stand_mad
     """
 
     a = np.asarray(a)
-    d = np.median(a, axis = axis)
+    if weights is not None:
+        d = _weighted_median(a, weights, axis=axis)
+        d = tools.unsqueeze(d, axis, a.shape)
+        return _weighted_median(np.fabs(a - d), weights, axis=axis)/c
+    d = _median_inplace(a.copy(), axis=axis)
     d = tools.unsqueeze(d, axis, a.shape)
-    return np.median(np.fabs(a - d)/c, axis = axis)
+    return _median_inplace(np.fabs(a - d), axis=axis)/c
+
+class QuantileSketch(object):
+    """
+    A mergeable sketch of a distribution for streaming quantiles and mad.
+
+    The sketch is a t-digest.  It summarizes the observations by a few
+    hundred centroids, ie., means and weights of groups of neighboring
+    observations.  The groups are small in the tails and large near the
+    median, so that quantiles are accurate relative to min(q, 1-q).
+
+    Parameters
+    ----------
+    compression : float, optional
+        The number of centroids is about compression/2.  Larger values are
+        more accurate.  The default is 200.
+    buffer_size : int, optional
+        The number of observations that are collected before they are
+        merged into the centroids.  The default is 10*compression.
+
+    Methods
+    -------
+    update
+        Adds observations with optional weights.
+    merge
+        Adds the observations of another sketch, ie., of another shard.
+    quantile
+        Returns estimates of quantiles.
+    cdf
+        Returns estimates of the cumulative distribution function.
+    mad
+        Returns an estimate of `mad` of the observations.
+    stand_mad
+        Returns an estimate of `stand_mad` of the observations.
+
+    Notes
+    -----
+    mad and stand_mad are the half widths d of the intervals around 0 or
+    the median with cdf(center + d) - cdf(center - d) = 1/2 under the
+    piecewise linear cdf of the sketch.  They need only one pass over the
+    data.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import scikits.statsmodels as sm
+    >>> shards = [np.random.standard_normal(100000) for i in range(4)]
+    >>> sketches = []
+    >>> for shard in shards:
+    ...     sketch = sm.robust.scale.QuantileSketch()
+    ...     for chunk in np.split(shard, 100):
+    ...         sketch.update(chunk)
+    ...     sketches.append(sketch)
+    >>> total = sketches[0]
+    >>> for sketch in sketches[1:]:
+    ...     total.merge(sketch)
+    >>> total.stand_mad()
+    """
+    def __init__(self, compression=200, buffer_size=None):
+        self.compression = compression
+        if buffer_size is None:
+            buffer_size = int(10 * compression)
+        self.buffer_size = buffer_size
+        self._means = np.zeros(0)
+        self._weights = np.zeros(0)
+        self._buffer = []
+        self._buffer_weights = []
+        self._n_buffer = 0
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def total_weight(self):
+        """
+        The sum of the weights of the observations.
+        """
+        self._compress()
+        return self._weights.sum()
+
+    def update(self, a, weights=None):
+        """
+        Adds observations.
+
+        Parameters
+        ----------
+        a : array-like
+            The observations.  nan are ignored.
+        weights : array-like, optional
+            Nonnegative weights with the shape of `a`.  The default is 1 for
+            all observations.
+        """
+        a = np.asarray(a, dtype=np.float64).ravel()
+        if weights is None:
+            weights = np.ones(a.shape)
+        else:
+            weights = np.asarray(weights, dtype=np.float64).ravel()
+            if weights.shape != a.shape:
+                raise ValueError, "weights have to have the shape of a"
+            if np.any(weights < 0):
+                raise ValueError, "weights have to be nonnegative"
+        keep = (weights > 0) & ~np.isnan(a)
+        if not keep.all():
+            a, weights = a[keep], weights[keep]
+        if not len(a):
+            return
+        self.min = min(self.min, a.min())
+        self.max = max(self.max, a.max())
+        self._buffer.append(a)
+        self._buffer_weights.append(weights)
+        self._n_buffer += len(a)
+        if self._n_buffer >= self.buffer_size:
+            self._compress()
+
+    def merge(self, other):
+        """
+        Adds the observations of the sketch `other`.
+
+        Returns self, so that sketches of shards can be combined with
+        reduce.
+        """
+        other._compress()
+        if len(other._means):
+            self._buffer.append(other._means)
+            self._buffer_weights.append(other._weights)
+            self._n_buffer += len(other._means)
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress()
+        return self
+
+    def _compress(self):
+        """
+        Merges the buffer into the centroids.
+        """
+        if not self._n_buffer:
+            return
+        means = np.concatenate([self._means] + self._buffer)
+        weights = np.concatenate([self._weights] + self._buffer_weights)
+        self._buffer = []
+        self._buffer_weights = []
+        self._n_buffer = 0
+        order = means.argsort(kind='mergesort')
+        means, weights = means[order], weights[order]
+        cumweights = weights.cumsum()
+        q = (cumweights - weights / 2.) / cumweights[-1]
+        # the scale function k1 of the t-digest, a centroid spans at most
+        # about one unit of k
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        k = np.floor(k)
+        starts = np.r_[0, np.flatnonzero(np.diff(k)) + 1]
+        self._weights = np.add.reduceat(weights, starts)
+        self._means = np.add.reduceat(weights * means, starts) / \
+                self._weights
+
+    def _knots(self):
+        """
+        The knots (cumulative weight, value) of the piecewise linear cdf.
+        """
+        self._compress()
+        if not len(self._means):
+            raise ValueError, "the sketch has no observations"
+        cumweights = self._weights.cumsum() - self._weights / 2.
+        total = self._weights.sum()
+        positions = np.r_[0, cumweights, total] / total
+        values = np.r_[self.min, self._means, self.max]
+        return positions, values
+
+    def quantile(self, q):
+        """
+        Returns estimates of the quantiles `q`, which are in [0, 1].
+        """
+        positions, values = self._knots()
+        return np.interp(q, positions, values)
+
+    def cdf(self, x):
+        """
+        Returns estimates of the cumulative distribution function at `x`.
+        """
+        positions, values = self._knots()
+        return np.interp(x, values, positions)
+
+    def median(self):
+        """
+        Returns an estimate of the median.
+        """
+        return self.quantile(.5)
+
+    def _half_width(self, center):
+        """
+        The d with cdf(center + d) - cdf(center - d) = 1/2.
+
+        The difference of the cdfs is linear between the distances of the
+        knots from center, so d is interpolated between them.
+        """
+        positions, values = self._knots()
+        d = np.unique(np.fabs(values - center))
+        mass = np.interp(center + d, values, positions) - \
+                np.interp(center - d, values, positions)
+        return np.interp(.5, mass, d)
+
+    def mad(self, c=Gaussian.ppf(3/4.)):
+        """
+        Returns an estimate of median(abs(a))/c, see mad.
+        """
+        return self._half_width(0.) / c
+
+    def stand_mad(self, c=Gaussian.ppf(3/4.)):
+        """
+        Returns an estimate of median(abs(a - median(a)))/c, see stand_mad.
+        """
+        return self._half_width(self.median()) / c
 
 class Huber(object):
     """
@@ -0,0 +1,68 @@
+"""
+Test functions for models.robust.norms
+"""
+
+import numpy as np
+from numpy.testing import *
+
+import scikits.statsmodels.robust.norms as norms
+
+DECIMAL = 12
+
+class CheckEvaluate(object):
+    functions = ['rho', 'psi', 'psi_deriv', 'weights']
+
+    def __init__(self):
+        np.random.seed(54321)
+        # no zeros, where some of the weights are nan
+        self.z = np.random.standard_normal(200) * 5 + 1e-3
+
+    def test_evaluate(self):
+        values = self.norm.evaluate(self.z, self.functions)
+        for name, value in zip(self.functions, values):
+            assert_almost_equal(value, getattr(self.norm, name)(self.z),
+                    DECIMAL)
+
+    def test_default(self):
+        psi, psi_deriv, weights = self.norm.evaluate(self.z)
+        assert_almost_equal(psi, self.norm.psi(self.z), DECIMAL)
+        assert_almost_equal(weights, self.norm.weights(self.z), DECIMAL)
+
+    def test_out(self):
+        out = [np.empty(self.z.shape) for name in self.functions[::-1]]
+        values = self.norm.evaluate(self.z, self.functions[::-1], out=out)
+        for name, value, buf in zip(self.functions[::-1], values, out):
+            assert_(value is buf)
+            assert_almost_equal(buf, getattr(self.norm, name)(self.z),
+                    DECIMAL)
+
+class TestLeastSquares(CheckEvaluate):
+    norm = norms.LeastSquares()
+
+class TestHuberT(CheckEvaluate):
+    norm = norms.HuberT()
+
+class TestRamsayE(CheckEvaluate):
+    norm = norms.RamsayE()
+
+class TestAndrewWave(CheckEvaluate):
+    norm = norms.AndrewWave()
+
+class TestTrimmedMean(CheckEvaluate):
+    norm = norms.TrimmedMean()
+
+class TestHampel(CheckEvaluate):
+    norm = norms.Hampel()
+
+class TestTukeyBiweight(CheckEvaluate):
+    norm = norms.TukeyBiweight()
+
+def test_evaluate_errors():
+    z = np.arange(5.)
+    assert_raises(ValueError, norms.HuberT().evaluate, z, ('psi', 'chi'))
+    assert_raises(ValueError, norms.HuberT().evaluate, z, ('psi',),
+            out=(np.empty(4),))
+
+if __name__ == "__main__":
+    import nose
+    nose.runmodule(argv=[__file__, '-vvs', '-x', '--pdb'], exit=False)
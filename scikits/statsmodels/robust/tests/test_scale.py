@@ -80,6 +80,16 @@ class TestMadAxes():
         m = scale.stand_mad(self.X, axis=-1)
         assert_equal(m.shape, (40,10))
 
+    def test_median(self):
+        # partial sorts for odd and even lengths agree with np.median
+        for axis in range(3):
+            X = self.X[:-1] if axis == 0 else self.X
+            assert_almost_equal(scale.mad(X, c=1, axis=axis),
+                    np.median(np.fabs(X), axis=axis), 12)
+            assert_almost_equal(scale.stand_mad(X, c=1, axis=axis),
+                    np.median(np.fabs(X - np.expand_dims(np.median(X,
+                    axis=axis), axis)), axis=axis), 12)
+
 class TestHuber():
     def __init__(self):
         np.random.seed(54321)
@@ -112,5 +122,74 @@ class TestHuberAxes(object):
         m, s = self.h(self.X, axis=-1)
         assert_equal(m.shape, (40,10))
 
+class TestWeightedMad(object):
+    def __init__(self):
+        np.random.seed(54321)
+        self.X = standard_normal((40,10))
+        self.weights = np.random.randint(0, 4, 40)
+
+    def test_unit_weights(self):
+        w = np.ones(40)
+        assert_equal(scale.mad(self.X, weights=w), scale.mad(self.X))
+        assert_equal(scale.stand_mad(self.X, weights=w),
+                scale.stand_mad(self.X))
+
+    def test_equal_weights(self):
+        # the cumulative sums of these weights are not exact
+        for n in [6, 10, 20, 40]:
+            for w in [.1, .3, 1/3., .7, 1./n]:
+                weights = w * np.ones(n)
+                assert_almost_equal(scale.mad(self.X[:n], weights=weights),
+                        scale.mad(self.X[:n]), 12)
+                assert_almost_equal(scale.stand_mad(self.X[:n],
+                    weights=weights), scale.stand_mad(self.X[:n]), 12)
+
+    def test_zero_weights(self):
+        assert_raises(ValueError, scale.mad, self.X, weights=np.zeros(40))
+
+    def test_repeated(self):
+        X = np.repeat(self.X, self.weights, axis=0)
+        assert_almost_equal(scale.stand_mad(self.X, weights=self.weights),
+                scale.stand_mad(X), DECIMAL)
+        assert_almost_equal(scale.mad(self.X.T, axis=1,
+                weights=self.weights), scale.mad(X), DECIMAL)
+
+class TestQuantileSketch(object):
+    def __init__(self):
+        np.random.seed(54321)
+        self.x = 2 * standard_normal(100000) + 1
+        self.sketch = scale.QuantileSketch()
+        for chunk in np.split(self.x, 100):
+            self.sketch.update(chunk)
+
+    def test_quantile(self):
+        assert_almost_equal(self.sketch.median(), np.median(self.x), 2)
+        assert_almost_equal(self.sketch.quantile([.01, .99]),
+                [np.percentile(self.x, 1), np.percentile(self.x, 99)], 1)
+        assert_equal(self.sketch.quantile([0, 1]),
+                [self.x.min(), self.x.max()])
+        assert_almost_equal(self.sketch.cdf(np.median(self.x)), .5, 3)
+
+    def test_mad(self):
+        assert_almost_equal(self.sketch.mad(), scale.mad(self.x), 2)
+        assert_almost_equal(self.sketch.stand_mad(), scale.stand_mad(self.x),
+                2)
+
+    def test_merge(self):
+        shards = [scale.QuantileSketch() for i in range(4)]
+        for shard, chunk in zip(shards, np.split(self.x, 4)):
+            shard.update(chunk)
+        merged = reduce(lambda a, b: a.merge(b), shards)
+        assert_almost_equal(merged.total_weight, len(self.x), DECIMAL)
+        assert_almost_equal(merged.stand_mad(), self.sketch.stand_mad(), 2)
+
+    def test_weights(self):
+        weights = np.random.randint(0, 4, 1000)
+        x = self.x[:1000]
+        sketch = scale.QuantileSketch()
+        sketch.update(x, weights)
+        assert_almost_equal(sketch.stand_mad(),
+                scale.stand_mad(np.repeat(x, weights)), 1)
+
 if __name__=="__main__":
     run_module_suite()
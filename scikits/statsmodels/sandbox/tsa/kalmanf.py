@@ -13,9 +13,8 @@ Notes
 This file follows Hamilton's notation pretty closely.
 """
 
-from scipy import optimize
+from scipy import optimize, linalg, signal
 import numpy as np
-from var import chain_dot #TODO: move this to tools
 
 #TODO: See Koopman and Durbin (2000)
 #Fast filtering and smoothing for multivariate state space models
@@ -26,7 +25,33 @@ from var import chain_dot #TODO: move this to tools
 def kalmansmooth(F, A, H, Q, R, y, X, xi10):
     pass
 
-def kalmanfilter(F, A, H, Q, R, y, X, xi10, ntrain, history=False):
+def _steady_state_innovations(e, L, G, H, xi):
+    """
+    Innovations of the steady state filter of a univariate series.
+
+    With a constant gain the predicted state follows the time invariant
+    system xi_{t+1} = L xi_t + G e_t, and the innovations are
+    v_t = e_t - H' xi_t, where e is the observed data net of A'X.  The
+    response to e is computed with lfilter.  The response to the initial
+    state xi solves the recursion given by the characteristic polynomial
+    of L, see Cayley-Hamilton, again with lfilter.
+    """
+    nobs = len(e)
+    r = len(xi)
+    num, den = signal.ss2tf(L, G[:,None], H.T, np.zeros((1,1)))
+    v = e - signal.lfilter(num[0], den, e)
+    free = np.zeros(min(r, nobs))
+    for j in range(len(free)):
+        free[j] = np.dot(H[:,0], xi)
+        xi = np.dot(L, xi)
+    if nobs > r:
+        zi = signal.lfiltic([1.], den, free[::-1])
+        free = np.r_[free, signal.lfilter([1.], den, np.zeros(nobs - r),
+            zi=zi)[0]]
+    return v - free
+
+def kalmanfilter(F, A, H, Q, R, y, X, xi10, ntrain, history=False,
+        tol=1e-12):
     """
     Returns the negative log-likelihood of y conditional on the information set
 
@@ -58,7 +83,12 @@ def kalmanfilter(F, A, H, Q, R, y, X, xi10, ntrain, history=False):
     ntrain : int
         The number of training periods for the filter.  This is the number of
         observations that do not affect the likelihood.
-
+    history : bool, optional
+        If True, the predicted states are returned.
+    tol : float or None, optional
+        The filter switches to the steady state filter when the largest
+        change of the MSE of the predicted state is not larger than tol
+        times its largest element.  If None, it never switches.
 
     Returns
     -------
@@ -70,59 +100,112 @@ def kalmanfilter(F, A, H, Q, R, y, X, xi10, ntrain, history=False):
     Notes
     -----
     No input checking is done.
+
+    If R is diagonal, the elements of the observations are filtered one at
+    a time as in Durbin and Koopman (2001, 6.4), so that no matrix has to
+    be inverted.  Elements with a zero variance of the prediction error are
+    skipped.  Otherwise the Cholesky factor of the variance of the
+    prediction errors is used.
+
+    Once the MSE of the state converges, the gain is constant.  The
+    remaining innovations are then computed with one pass of
+    scipy.signal.lfilter for univariate series without history, and with
+    a loop of two dot products per period otherwise.
     """
 # uses log of Hamilton 13.4.1
-    F = np.asarray(F)
-    H = np.asarray(H)
+    F = np.asarray(F, dtype=np.float64)
+    H = np.asarray(H, dtype=np.float64)
     n = H.shape[1]  # remember that H gets transposed
-    y = np.asarray(y)
+    y = np.asarray(y, dtype=np.float64)
     A = np.asarray(A)
     if y.ndim == 1: # note that Y is in rows for now
         y = y[:,None]
     nobs = y.shape[0]
-    xi10 = np.asarray(xi10)
-    if xi10.ndim == 1:
-        xi10[:,None]
+    xi10 = np.asarray(xi10, dtype=np.float64)
+    shape = xi10.shape
+    xi = xi10.ravel().copy()
+    r = len(xi)
     if history:
-        state_vector = [xi10]
-    Q = np.asarray(Q)
-    r = xi10.shape[0]
+        state_vector = np.zeros((nobs, r))
+    Q = np.asarray(Q, dtype=np.float64)
+    R = np.zeros((n,n)) + R
+    e = y - np.dot(A.T,X)
 # Eq. 12.2.21, other version says P0 = Q
 #    p10 = np.dot(np.linalg.inv(np.eye(r**2)-np.kron(F,F)),Q.ravel('F'))
 #    p10 = np.reshape(P0, (r,r), order='F')
 # Assume a fixed, known intial point and set P0 = Q
-    p10 = Q
+    p10 = Q.copy()
+    univariate = not np.any(R - np.diag(np.diag(R)))
+    rdiag = np.diag(R)
+    log2pi = np.log(2*np.pi)
 
     loglikelihood = 0
+    steady = False
     for i in range(nobs):
-        HTPHR = chain_dot(H.T,p10,H)+R
-        if HTPHR.ndim == 1:
-            HTPHRinv = 1./HTPHR
+        if history:
+            state_vector[i] = xi
+        p11 = p10
+        if univariate:
+            # Durbin and Koopman 6.4, one element of y at a time
+            for j in range(n):
+                h = H[:,j]
+                ph = np.dot(p11, h)
+                f = np.dot(h, ph) + rdiag[j]
+                if f <= 0:
+                    continue
+                v = e[i,j] - np.dot(h, xi)
+                xi = xi + ph * (v / f)
+                p11 = p11 - np.outer(ph, ph / f)
+                if i >= ntrain: # zero-index, but ntrain isn't
+                    loglikelihood -= .5 * (log2pi + np.log(f) + v * v / f)
         else:
-            HTPHRinv = np.linalg.inv(HTPHR) # correct
-        part1 = y[i] - np.dot(A.T,X) - np.dot(H.T,xi10) # correct
-        if i >= ntrain: # zero-index, but ntrain isn't
-            HTPHRdet = np.linalg.det(HTPHR) # correct
-            part2 = -.5*chain_dot(part1.T,HTPHRinv,part1) # correct
-#TODO: Need to test with ill-conditioned problem.
-            loglike_interm = (-n/2.) * np.log(2*np.pi) - .5*\
-                        np.log(HTPHRdet) + part2
-            loglikelihood += loglike_interm
-
-        # 13.2.15 Update current state xi_t based on y
-        xi11 = xi10 + chain_dot(p10, H, HTPHRinv, part1)
-        # 13.2.16 MSE of that state
-        p11 = p10 - chain_dot(p10, H, HTPHRinv, H.T, p10)
+            PH = np.dot(p11, H)
+            HTPHR = linalg.cho_factor(np.dot(H.T, PH) + R)
+            v = e[i] - np.dot(H.T, xi)
+            # 13.2.15 and 13.2.16 with the Cholesky factor of HTPHR
+            xi = xi + np.dot(PH, linalg.cho_solve(HTPHR, v))
+            p11 = p11 - np.dot(PH, linalg.cho_solve(HTPHR, PH.T))
+            if i >= ntrain:
+                loglikelihood -= .5 * (n * log2pi +
+                    2 * np.log(np.diag(HTPHR[0])).sum() +
+                    np.dot(v, linalg.cho_solve(HTPHR, v)))
         # 13.2.17 Update forecast about xi_{t+1} based on our F
-        xi10 = np.dot(F,xi11)
-        if history:
-            state_vector.append(xi10)
+        xi = np.dot(F,xi)
         # 13.2.21 Update the MSE of the forecast
-        p10 = chain_dot(F,p11,F.T) + Q
+        p10_new = np.dot(np.dot(F,p11),F.T) + Q
+        if tol is not None and (np.abs(p10_new - p10).max() <=
+                tol * np.abs(p10_new).max()):
+            steady = True
+            p10 = p10_new
+            break
+        p10 = p10_new
+
+    start = i + 1
+    if steady and start < nobs:
+        # constant gain K, 13.2.19 with P_{t|t-1} = p10
+        PH = np.dot(p10, H)
+        HTPHR = linalg.cho_factor(np.dot(H.T, PH) + R)
+        G = np.dot(F, linalg.cho_solve(HTPHR, PH.T).T)
+        L = F - np.dot(G, H.T)
+        if n == 1 and not history:
+            innovations = _steady_state_innovations(e[start:,0], L, G[:,0],
+                    H, xi)[:,None]
+        else:
+            innovations = np.zeros((nobs - start, n))
+            for i in range(start, nobs):
+                if history:
+                    state_vector[i] = xi
+                innovations[i - start] = e[i] - np.dot(H.T, xi)
+                xi = np.dot(L, xi) + np.dot(G, e[i])
+        innovations = innovations[max(ntrain - start, 0):]
+        resid = linalg.solve_triangular(HTPHR[0], innovations.T,
+                trans='T', lower=HTPHR[1])
+        loglikelihood -= .5 * (len(innovations) * (n * log2pi +
+            2 * np.log(np.diag(HTPHR[0])).sum()) + (resid**2).sum())
     if not history:
         return -loglikelihood
     else:
-        return -loglikelihood, np.asarray(state_vector[:-1])
+        return -loglikelihood, state_vector.reshape((nobs,) + shape)
 
 class StateSpaceModel(object):
     def __init__(self, endog, exog=None, ARMA=(0,0)):
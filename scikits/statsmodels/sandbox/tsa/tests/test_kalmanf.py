@@ -0,0 +1,92 @@
+"""
+Test the Kalman filter against the Gaussian likelihood of the observations
+"""
+
+import numpy as np
+from numpy.testing import assert_almost_equal, assert_equal
+from scipy import linalg, signal
+from scikits.statsmodels.sandbox.tsa.kalmanf import kalmanfilter
+
+DECIMAL_8 = 8
+
+def gaussian_loglike(F, H, Q, R, y, xi10, ntrain):
+    """
+    Log-likelihood of y[ntrain:] given y[:ntrain] with the joint covariance.
+
+    The initial state has mean xi10 and covariance Q.
+    """
+    nobs, n = y.shape
+    r = len(xi10)
+    # T holds F**t for the mean and P the covariance of the state at t
+    T, P = [np.eye(r)], [Q]
+    for t in range(1, nobs):
+        T.append(np.dot(F, T[-1]))
+        P.append(np.dot(np.dot(F, P[-1]), F.T) + Q)
+    mean = np.array([np.dot(H.T, np.dot(T[t], xi10)) for t in range(nobs)])
+    cov = np.zeros((nobs, n, nobs, n))
+    for t in range(nobs):
+        for s in range(t + 1):
+            cov[t,:,s] = np.dot(np.dot(H.T, np.dot(T[t - s], P[s])), H)
+            cov[s,:,t] = cov[t,:,s].T
+        cov[t,:,t] += R
+    cov = cov.reshape(nobs * n, nobs * n)
+    dev = (y - mean).ravel()
+
+    def logpdf(m):
+        c = linalg.cho_factor(cov[:m,:m])
+        return -.5 * (m * np.log(2 * np.pi) +
+                2 * np.log(np.diag(c[0])).sum() +
+                np.dot(dev[:m], linalg.cho_solve(c, dev[:m])))
+    return logpdf(nobs * n) - logpdf(ntrain * n)
+
+class CheckKalman(object):
+    def test_loglike(self):
+        llf = gaussian_loglike(self.F, self.H, self.Q, self.R, self.y,
+                self.xi10, self.ntrain)
+        assert_almost_equal(-kalmanfilter(self.F, 0, self.H, self.Q, self.R,
+            self.y, 0, self.xi10, self.ntrain), llf, DECIMAL_8)
+
+    def test_steady_state(self):
+        args = (self.F, 0, self.H, self.Q, self.R, self.y, 0, self.xi10,
+                self.ntrain)
+        assert_almost_equal(kalmanfilter(*args),
+                kalmanfilter(*args, **dict(tol=None)), DECIMAL_8)
+
+    def test_history(self):
+        args = (self.F, 0, self.H, self.Q, self.R, self.y, 0, self.xi10,
+                self.ntrain)
+        llf, states = kalmanfilter(*args, **dict(history=True))
+        assert_almost_equal(llf, kalmanfilter(*args), DECIMAL_8)
+        llf2, states2 = kalmanfilter(*args, **dict(history=True, tol=None))
+        assert_equal(states.shape, (len(self.y), len(self.xi10)))
+        assert_almost_equal(states, states2, DECIMAL_8)
+        assert_almost_equal(states[0], self.xi10, DECIMAL_8)
+
+class TestARMA(CheckKalman):
+    def __init__(self):
+        np.random.seed(12345)
+        phi, theta = [.5, -.3], .6
+        self.F = np.array([[phi[0], 1], [phi[1], 0]])
+        self.H = np.array([[1.], [0]])
+        self.Q = np.outer([1, theta], [1, theta])
+        self.R = 0
+        self.y = signal.lfilter([1, theta], [1, -phi[0], -phi[1]],
+                np.random.randn(120))[:,None]
+        self.xi10 = np.array([.5, -.2])
+        self.ntrain = 3
+
+class TestBivariateDiagonal(CheckKalman):
+    def __init__(self):
+        np.random.seed(12345)
+        self.F = np.array([[.8, .1], [0, .4]])
+        self.H = np.array([[1., .5], [0, 1]])
+        self.Q = np.array([[1., .2], [.2, .5]])
+        self.R = np.diag([1., 2.])
+        self.y = np.random.randn(60, 2)
+        self.xi10 = np.zeros(2)
+        self.ntrain = 1
+
+class TestBivariateFull(TestBivariateDiagonal):
+    def __init__(self):
+        super(TestBivariateFull, self).__init__()
+        self.R = np.array([[1., .3], [.3, 2.]])
@@ -227,6 +227,256 @@ class TestPoissonNewton(CheckModelResults):
         res2.poisson()
         self.res2 = res2
 
+class TestPoissonNewtonStart(CheckModelResults):
+    def __init__(self):
+        from results.results_discrete import RandHIE
+        data = sm.datasets.randhie.load()
+        nobs = len(data.endog)
+        exog = sm.add_constant(data.exog.view(float).reshape(nobs,-1))
+        start_params = .2 * np.ones(exog.shape[1])
+        self.res1 = Poisson(data.endog, exog).fit(start_params=start_params,
+                method='newton', disp=0)
+        res2 = RandHIE()
+        res2.poisson()
+        self.res2 = res2
+
+    def test_converged(self):
+        assert_(self.res1.mle_retvals['converged'])
+
+    def test_hessian(self):
+        # the retvals and the covariance are at the optimum
+        res1 = self.res1
+        hessian = res1.model.hessian(res1.params)
+        assert_almost_equal(res1.mle_retvals['Hessian'], hessian, 8)
+        assert_almost_equal(res1.mle_retvals['score'],
+                res1.model.score(res1.params), 6)
+        assert_almost_equal(res1.normalized_cov_params,
+                np.linalg.inv(-hessian), 12)
+
+def test_evaluation_cache():
+    data = sm.datasets.spector.load()
+    exog = sm.add_constant(data.exog)
+    model = Logit(data.endog, exog)
+    params = np.array([2.8, .1, 2.4, -13.])
+    llf = model.loglike(params)
+    score = model.score(params)
+    # changing params in place must not return the cached values
+    params2 = params.copy()
+    params[:] = 0
+    assert_almost_equal(model.loglike(params), 32*np.log(.5), 12)
+    assert_almost_equal(model.score(params),
+            np.dot(data.endog - .5, exog), 12)
+    assert_equal(model.loglike(params2), llf)
+    assert_equal(model.score(params2), score)
+    for i in range(2*model._cache_size):
+        model.loglike(params + i)
+    assert_(len(model._evals) == model._cache_size)
+    assert_almost_equal(model.hessian(params2),
+            Logit(data.endog, exog).hessian(params2), 12)
+    # assigning new data must not return the cached values
+    model.exog = exog[::-1].copy()
+    model.endog = data.endog[::-1].copy()
+    assert_almost_equal(model.loglike(params2), llf, 12)
+    model.exog = exog * 2
+    assert_almost_equal(model.loglike(params2),
+            Logit(data.endog[::-1], exog * 2).loglike(params2), 12)
+
+def _num_deriv(func, params, eps=1e-6):
+    return np.array([(func(params + eps*e) - func(params - eps*e))/(2*eps)
+        for e in np.eye(len(params))])
+
+def test_loglike_and_derivatives():
+    data = sm.datasets.spector.load()
+    exog = sm.add_constant(data.exog)
+    params = np.array([2.8, .1, 2.4, -13.])
+    for model in [Logit(data.endog, exog), Probit(data.endog, exog),
+            Poisson(data.endog, exog)]:
+        llf, score, hessian = model.loglike_and_derivatives(params)
+        assert_almost_equal(llf, model.loglike(params), 12)
+        assert_almost_equal(score, model.score(params), 12)
+        assert_almost_equal(hessian, model.hessian(params), 12)
+        assert_equal(len(model.loglike_and_derivatives(params, order=0)), 1)
+        assert_equal(len(model.loglike_and_derivatives(params, order=1)), 2)
+        assert_raises(ValueError, model.loglike_and_derivatives, params, 3)
+
+def test_score_obs():
+    from scipy import sparse
+    data = sm.datasets.spector.load()
+    exog = sm.add_constant(data.exog)
+    params = np.array([2.8, .1, 2.4, -13.])
+    for model in [Logit(data.endog, exog), Probit(data.endog, exog),
+            Poisson(data.endog, exog),
+            Logit(data.endog, sparse.csr_matrix(exog))]:
+        score_obs = model.score_obs(params)
+        assert_equal(score_obs.shape, exog.shape)
+        assert_almost_equal(score_obs.sum(0), model.score(params), 12)
+        assert_almost_equal(model.loglikeobs(params).sum(),
+                model.loglike(params), 12)
+    # the score of observation i is the derivative of its loglikelihood
+    model = Probit(data.endog, exog)
+    assert_almost_equal(model.score_obs(params)[3],
+            _num_deriv(lambda b: model.loglikeobs(b)[3], params), 6)
+
+def test_bhhh():
+    from scikits.statsmodels.model import GenericLikelihoodModel
+    data = sm.datasets.spector.load()
+    exog = sm.add_constant(data.exog)
+    model = Probit(data.endog, exog)
+    res1 = model.fit(method='bhhh', maxiter=500, disp=0)
+    res2 = model.fit(method='newton', disp=0)
+    assert_(res1.mle_retvals['converged'])
+    assert_almost_equal(res1.params, res2.params, 6)
+    score_obs = model.score_obs(res1.params)
+    opg = np.dot(score_obs.T, score_obs)
+    assert_almost_equal(res1.mle_retvals['Hessian'], -opg, 10)
+    assert_almost_equal(res1.cov_params(), np.linalg.inv(opg), 10)
+    # numerical scores of the observations from loglikeobs
+    generic = GenericLikelihoodModel(data.endog, exog,
+            loglikeobs=model.loglikeobs)
+    res3 = generic.fit(method='bhhh', maxiter=500, disp=0)
+    assert_almost_equal(res3.params, res2.params, 6)
+    assert_almost_equal(res3.cov_params(), res1.cov_params(), 6)
+
+def test_score_obs_mnlogit():
+    data = sm.datasets.anes96.load()
+    exog = sm.add_constant(data.exog[:,[2,5,6]])
+    model = MNLogit(data.endog, exog)
+    params = model.fit(disp=0).params.ravel()
+    score_obs = model.score_obs(params)
+    assert_equal(score_obs.shape, (model.nobs, len(params)))
+    assert_almost_equal(score_obs.sum(0), model.score(params), 10)
+    assert_almost_equal(model.loglikeobs(params).sum(),
+            model.loglike(params), 10)
+    assert_almost_equal(score_obs[7],
+            _num_deriv(lambda b: model.loglikeobs(b)[7], params), 6)
+    # the rows are flattened (J-1) x K
+    resid = model.wendog[7,1:] - model._prob(params)[1:,7]
+    assert_almost_equal(score_obs[7].reshape(int(model.J) - 1, int(model.K)),
+            np.outer(resid, exog[7]), 12)
+
+def test_negbin_derivatives():
+    from scikits.statsmodels.discretemod import NegBinTwo
+    np.random.seed(12345)
+    exog = sm.add_constant(np.random.randn(200, 2))
+    endog = np.random.negative_binomial(2, .4, 200).astype(float)
+    model = NegBinTwo(endog, exog)
+    params = np.array([.1, -.2, 1., .7])
+    llf, score, hessian = model.loglike_and_derivatives(params)
+    assert_almost_equal(llf, model.loglike(params), 10)
+    assert_almost_equal(score, _num_deriv(model.loglike, params), 5)
+    assert_almost_equal(hessian, _num_deriv(model.score, params), 5)
+    assert_almost_equal(model.loglikeobs(params).sum(), llf, 10)
+    assert_almost_equal(model.score_obs(params).sum(0), score, 10)
+
+def test_sparse_exog():
+    from scipy import sparse
+    from scikits.statsmodels.discretemod import NegBinTwo
+    np.random.seed(12345)
+    exog = sm.add_constant(np.random.randn(200, 2))
+    endog = np.random.negative_binomial(2, .4, 200).astype(float)
+    params = np.array([.1, -.2, 1., .7])
+    model = NegBinTwo(endog, sparse.csr_matrix(exog))
+    assert_almost_equal(model.loglike(params),
+            NegBinTwo(endog, exog).loglike(params), 10)
+    assert_raises(ValueError, MNLogit, endog, sparse.csr_matrix(exog))
+
+class TestStochastic(object):
+    def __init__(self):
+        np.random.seed(12345)
+        nobs = 5000
+        exog = sm.add_constant(np.random.randn(nobs, 2))
+        xb = np.dot(exog, [.5, -.3, .1])
+        self.logit = Logit((xb + np.random.logistic(size=nobs) > 0) * 1.,
+                exog)
+        self.poisson = Poisson(np.random.poisson(np.exp(xb)), exog)
+
+    def test_svrg(self):
+        for model in [self.logit, self.poisson]:
+            res1 = model.fit(method='svrg', batch_size=250, seed=0, disp=0)
+            res2 = model.fit(method='newton', disp=0)
+            assert_(res1.mle_retvals['converged'])
+            assert_almost_equal(res1.params, res2.params, 5)
+            assert_almost_equal(res1.bse, res2.bse, 6)
+            assert_almost_equal(res1.llf, res2.llf, 6)
+
+    def test_sgd_adam(self):
+        res2 = self.logit.fit(method='newton', disp=0)
+        for method in ['sgd', 'adam']:
+            res1 = self.logit.fit(method=method, batch_size=250, seed=0,
+                    disp=0)
+            assert_almost_equal(res1.params, res2.params, 1)
+            assert_equal(res1.mle_settings['optimizer'], method)
+
+    def test_batch_caches(self):
+        batch_models = []
+        class RecordingLogit(Logit):
+            def _subset(self, rows):
+                sub = super(RecordingLogit, self)._subset(rows)
+                batch_models.append(sub)
+                return sub
+        model = RecordingLogit(self.logit.endog, self.logit.exog)
+        res = model.fit(method='svrg', batch_size=1000, maxiter=2, seed=0,
+                disp=0, retall=1)
+        assert_equal(len(batch_models), 5)
+        for sub in batch_models:
+            assert_equal(sub._evals, [])
+        settings = res.mle_settings
+        assert_equal([settings['full_output'], settings['fargs'],
+            settings['retall']], [1, (), 1])
+        assert_equal(len(res.mle_retvals['allvecs']), 3)
+        assert_raises(ValueError, model.fit, method='sgd', fargs=(1,),
+                disp=0)
+
+    def test_seed(self):
+        res1 = self.logit.fit(method='sgd', maxiter=2, seed=1, disp=0)
+        res2 = self.logit.fit(method='sgd', maxiter=2, seed=1, disp=0)
+        assert_equal(res1.params, res2.params)
+
+def test_newton_failed_line_search():
+    # the steps go downhill, the line search cannot improve the start
+    class WrongScorePoisson(Poisson):
+        def loglike_and_derivatives(self, params, order=2):
+            values = super(WrongScorePoisson,
+                    self).loglike_and_derivatives(params, order)
+            if order > 0:
+                values = (values[0], -values[1]) + values[2:]
+            return values
+    data = sm.datasets.randhie.load()
+    nobs = len(data.endog)
+    exog = sm.add_constant(data.exog.view(float).reshape(nobs,-1))
+    start_params = .2 * np.ones(exog.shape[1])
+    model = WrongScorePoisson(data.endog, exog)
+    res = model.fit(start_params=start_params, method='newton', disp=0)
+    assert_equal(res.params, start_params)
+    assert_equal(res.mle_retvals['warnflag'], 2)
+    assert_(not res.mle_retvals['converged'])
+    assert_almost_equal(res.mle_retvals['fopt'],
+            -model.loglike(start_params), 8)
+
+class TestLogitSparse(CheckModelResults):
+    def __init__(self):
+        from scipy import sparse
+        from results.results_discrete import Spector
+        data = sm.datasets.spector.load()
+        exog = sparse.csr_matrix(sm.add_constant(data.exog))
+        self.res1 = Logit(data.endog, exog).fit(method="newton", disp=0)
+        res2 = Spector()
+        res2.logit()
+        self.res2 = res2
+
+class TestPoissonSparse(CheckModelResults):
+    def __init__(self):
+        from scipy import sparse
+        from results.results_discrete import RandHIE
+        data = sm.datasets.randhie.load()
+        nobs = len(data.endog)
+        exog = sm.add_constant(data.exog.view(float).reshape(nobs,-1))
+        self.res1 = Poisson(data.endog, sparse.csr_matrix(exog)).fit(
+                method='newton', disp=0)
+        res2 = RandHIE()
+        res2.poisson()
+        self.res2 = res2
+
 class TestMNLogitNewtonBaseZero(CheckModelResults):
     def __init__(self):
         from results.results_discrete import Anes
@@ -247,6 +497,21 @@ class TestMNLogitNewtonBaseZero(CheckModelResults):
     def test_k(self):
         assert_equal(self.res1.model.K, self.res2.K)
 
+    def test_hessian_blocks(self):
+        model = self.res1.model
+        params = self.res1.params.ravel()
+        H = model.hessian(params)
+        assert_equal(H, H.T)
+        blocks = model.hessian(params, blocks=True)
+        J, K = int(model.J) - 1, int(model.K)
+        assert_equal(blocks.shape, (J, J, K, K))
+        assert_almost_equal(blocks[1,3], H[K:2*K,3*K:4*K], 12)
+        # the diagonal block of the first equation
+        pr = model.cdf(model._eXB(params))[1]
+        X = model.exog
+        assert_almost_equal(blocks[0,0],
+                -np.dot(X.T*(pr*(1-pr)), X), 8)
+
 
 
 
@@ -8,6 +8,7 @@ from numpy.testing import *
 import scikits.statsmodels as sm
 from scikits.statsmodels.glm import GLM
 from scikits.statsmodels.tools import add_constant
+from scikits.statsmodels.numdiff import approx_fprime
 from nose import SkipTest
 
 # Test Precisions
@@ -340,6 +341,114 @@ class TestGlmPoisson(CheckModelResults):
                     family=sm.families.Poisson()).fit()
         self.res2 = Cpunish()
 
+def test_glm_history():
+    from scikits.statsmodels.datasets.cpunish import load
+    data = load()
+    data.exog = add_constant(data.exog)
+    model = GLM(data.endog, data.exog, family=sm.families.Poisson())
+    res1 = model.fit()
+    assert_equal(len(model.history['params']), 1)
+    assert_equal(len(model.history['deviance']), model.iteration + 1)
+    res2 = model.fit(keep_history=True)
+    assert_equal(len(model.history['params']), model.iteration)
+    assert_almost_equal(model.history['params'][-1], res1.params, DECIMAL_4)
+    assert_almost_equal(model.history['fittedvalues'][-1],
+            np.dot(data.exog, res2.params), DECIMAL_4)
+
+class TestGlmPoissonSparse(TestGlmPoisson):
+    def __init__(self):
+        from scipy import sparse
+        super(TestGlmPoissonSparse, self).__init__()
+        self.res1 = GLM(self.data.endog, sparse.csr_matrix(self.data.exog),
+                    family=sm.families.Poisson()).fit()
+
+class TestGlmPoissonAttachData(TestGlmPoisson):
+    def __init__(self):
+        super(TestGlmPoissonAttachData, self).__init__()
+        self.res1 = GLM(self.data.endog, self.data.exog,
+                    family=sm.families.Poisson()).fit(keep_data=False)
+        self.removed_model = self.res1.model
+        self.res1.attach_data(self.data.endog, self.data.exog)
+
+    def test_remove_data(self):
+        assert_(self.removed_model.exog is None)
+        assert_(self.removed_model.history is None)
+        assert_(isinstance(self.res1.model.family, sm.families.Poisson))
+
+class TestGlmPoissonWarmStart(TestGlmPoisson):
+    def __init__(self):
+        super(TestGlmPoissonWarmStart, self).__init__()
+        model = GLM(self.data.endog, self.data.exog,
+                    family=sm.families.Poisson())
+        self.res1 = model.fit(start_params=self.res1.params * 1.01)
+        self.iteration2 = model.iteration
+
+    def test_converged(self):
+        assert_equal(self.res1.converged, True)
+        assert_(self.iteration2 <= 4)
+
+def test_glm_conv():
+    from scikits.statsmodels.datasets.cpunish import load
+    data = load()
+    data.exog = add_constant(data.exog)
+    model = GLM(data.endog, data.exog, family=sm.families.Poisson())
+    res1 = model.fit()
+    res2 = model.fit(conv='coefs', tol=1e-10)
+    assert_almost_equal(res1.params, res2.params, DECIMAL_4)
+    res3 = model.fit(start_mu=res1.mu, conv='rel_dev')
+    assert_equal(res3.converged, True)
+    assert_equal(model.fit(maxiter=2).converged, False)
+    assert_raises(ValueError, model.fit, conv='resid')
+
+def test_glm_score_obs():
+    from scikits.statsmodels.datasets.star98 import load
+    data = load()
+    data.exog = add_constant(data.exog)
+    trials = data.endog.sum(1)
+    model = GLM(data.endog, data.exog, family=sm.families.Binomial())
+    res = model.fit(data_weights=trials)
+    score_obs = model.score_obs(res.params)
+    assert_equal(score_obs.shape, data.exog.shape)
+    assert_almost_equal(score_obs.sum(0), model.score(res.params), 8)
+    # the score is zero at the optimum
+    assert_almost_equal(model.score(res.params) / np.abs(score_obs).sum(0),
+            np.zeros(data.exog.shape[1]), 8)
+    assert_almost_equal(model.loglikeobs(res.params).sum(), res.llf, 8)
+    from scikits.statsmodels.datasets.scotland import load
+    data = load()
+    data.exog = add_constant(data.exog)
+    model = GLM(data.endog, data.exog, family=sm.families.Gamma())
+    res = model.fit()
+    assert_almost_equal(model.loglikeobs(res.params, res.scale).sum(),
+            res.llf, 8)
+    # the Gaussian llf of the identity link concentrates out the variance
+    model = GLM(data.endog, data.exog, family=sm.families.Gaussian())
+    res = model.fit()
+    scale = np.sum(res.resid_response**2) / res.nobs
+    assert_almost_equal(model.loglikeobs(res.params, scale).sum(),
+            res.llf, 8)
+    # loglikeobs is the loglikelihood whose derivative is score_obs
+    score_obs = model.score_obs(res.params, res.scale)
+    for i in [0, 10]:
+        loglike_i = lambda params: model.loglikeobs(params, res.scale)[i]
+        assert_almost_equal(approx_fprime(res.params, loglike_i,
+            centered=True) / score_obs[i], np.ones(data.exog.shape[1]), 5)
+    model = GLM(data.endog, data.exog,
+            family=sm.families.Gaussian(sm.families.links.log))
+    res = model.fit()
+    assert_almost_equal(model.loglikeobs(res.params, res.scale).sum(),
+            res.llf, 8)
+
+def test_glm_binomial_unweighted():
+    # without data_weights the IRLS steps can increase the deviance
+    from scikits.statsmodels.datasets.star98 import load
+    data = load()
+    data.exog = add_constant(data.exog)
+    model = GLM(data.endog, data.exog, family=sm.families.Binomial())
+    res = model.fit()
+    assert_equal(res.converged, True)
+    assert_almost_equal(res.deviance, 4850.31976081, 6)
+
 #class TestGlmPoissonIdentity(CheckModelResults):
 #    pass
 
@@ -0,0 +1,96 @@
+"""
+Test functions for models.numdiff
+"""
+
+import numpy as np
+from numpy.testing import *
+
+import scikits.statsmodels as sm
+from scikits.statsmodels import numdiff
+from scikits.statsmodels.model import GenericLikelihoodModel
+
+DECIMAL_6 = 6
+DECIMAL_4 = 4
+
+class CheckDerivative(object):
+
+    def test_fprime(self):
+        for centered in [False, True]:
+            for vectorized in [False, True]:
+                grad = numdiff.approx_fprime(self.params, self.f,
+                        centered=centered, vectorized=vectorized)
+                assert_almost_equal(grad, self.score, DECIMAL_4)
+
+    def test_fprime_centered(self):
+        grad = numdiff.approx_fprime(self.params, self.f, centered=True)
+        assert_almost_equal(grad, self.score, DECIMAL_6)
+
+    def test_fprime_cs(self):
+        for vectorized in [False, True]:
+            grad = numdiff.approx_fprime_cs(self.params, self.f,
+                    vectorized=vectorized)
+            assert_almost_equal(grad, self.score, 12)
+
+    def test_jacobian(self):
+        jac = numdiff.approx_fprime(self.params, self.fobs, centered=True)
+        assert_almost_equal(jac, self.score_obs, DECIMAL_6)
+        jac = numdiff.approx_fprime_cs(self.params, self.fobs)
+        assert_almost_equal(jac, self.score_obs, 12)
+
+    def test_hess(self):
+        for vectorized in [False, True]:
+            hess, grad = numdiff.approx_hess(self.params, self.f,
+                    vectorized=vectorized, return_grad=True)
+            assert_almost_equal(hess, self.hessian, DECIMAL_4)
+            assert_almost_equal(grad, self.score, DECIMAL_4)
+
+    def test_hess_richardson(self):
+        hess, grad = numdiff.approx_hess(self.params, self.f,
+                richardson=True, return_grad=True)
+        assert_almost_equal(hess, self.hessian, DECIMAL_6)
+        assert_almost_equal(grad, self.score, DECIMAL_6)
+
+class TestLogit(CheckDerivative):
+    def __init__(self):
+        data = sm.datasets.spector.load()
+        exog = sm.add_constant(data.exog)
+        model = sm.Logit(data.endog, exog)
+        self.params = model.fit(disp=0).params * 1.1
+        self.score = model.score(self.params)
+        self.hessian = model.hessian(self.params)
+        self.score_obs = model.score_obs(self.params)
+        endog = data.endog
+
+        # complex-safe loglikelihood that also accepts a 2d array of params
+        def fobs(params):
+            xb = np.dot(exog, params.T)
+            if xb.ndim == 2:
+                return (endog[:,None] * xb - np.log(1 + np.exp(xb))).T
+            return endog * xb - np.log(1 + np.exp(xb))
+        self.fobs = fobs
+        self.f = lambda params: fobs(params).sum(-1)
+
+def test_evaluations_batch():
+    calls = []
+    def f(params):
+        calls.append(params.shape)
+        return (params**2).sum(-1)
+    x = np.array([1., 2., 3.])
+    hess, grad = numdiff.approx_hess(x, f, vectorized=True,
+            return_grad=True)
+    assert_equal(calls, [(2 * 3**2 + 1, 3)])
+    assert_almost_equal(hess, 2 * np.eye(3), DECIMAL_6)
+    assert_almost_equal(grad, 2 * x, DECIMAL_6)
+
+def test_generic_numerical_derivatives():
+    data = sm.datasets.spector.load()
+    exog = sm.add_constant(data.exog)
+    res1 = sm.Logit(data.endog, exog).fit(disp=0)
+    generic = GenericLikelihoodModel(data.endog, exog, res1.model.loglike)
+    res2 = generic.fit(method='newton', disp=0)
+    assert_almost_equal(res2.params, res1.params, DECIMAL_6)
+    assert_almost_equal(np.sqrt(np.diag(res2.cov_params())), res1.bse,
+            DECIMAL_4)
+    llf, score, hessian = generic.loglike_and_derivatives(res1.params)
+    assert_almost_equal(llf, res1.llf, DECIMAL_6)
+    assert_almost_equal(hessian, res1.model.hessian(res1.params), DECIMAL_4)
@@ -0,0 +1,65 @@
+"""
+Tests for fitting many models in parallel
+"""
+import numpy as np
+from numpy.testing import *
+import scikits.statsmodels as sm
+from scikits.statsmodels.parallel import fit_many
+
+DECIMAL_7 = 7
+
+class CheckFitMany(object):
+    def test_params(self):
+        for res1, res2 in zip(self.res1, self.res2):
+            assert_almost_equal(res1.params, res2.params, DECIMAL_7)
+
+    def test_bse(self):
+        for res1, res2 in zip(self.res1, self.res2):
+            assert_almost_equal(res1.bse, res2.bse, DECIMAL_7)
+
+    def test_llf(self):
+        for res1, res2 in zip(self.res1, self.res2):
+            assert_almost_equal(res1.llf, res2.llf, DECIMAL_7)
+
+class TestOLSProcess(CheckFitMany):
+    def __init__(self):
+        np.random.seed(12345)
+        exog = sm.add_constant(np.random.randn(200,3))
+        datasets = [(np.random.randn(200), exog) for i in range(6)]
+        self.res1 = fit_many(sm.OLS, datasets, n_jobs=2)
+        self.res2 = [sm.OLS(*args).fit() for args in datasets]
+
+class TestGLMThread(CheckFitMany):
+    def __init__(self):
+        np.random.seed(12345)
+        exog = sm.add_constant(np.random.randn(200,2))
+        datasets = [(np.random.poisson(np.exp(np.dot(exog, [.1,.2,.5]))),
+            exog) for i in range(6)]
+        kwds = {'family' : sm.families.Poisson()}
+        self.res1 = fit_many(sm.GLM, datasets, n_jobs=2, backend="thread",
+                model_kwargs=kwds)
+        self.res2 = [sm.GLM(*args, **kwds).fit() for args in datasets]
+
+class TestLogitProcess(CheckFitMany):
+    def __init__(self):
+        from scikits.statsmodels.datasets.spector import load
+        data = load()
+        data.exog = sm.add_constant(data.exog)
+        datasets = [(data.endog, data.exog), (1 - data.endog, data.exog)]
+        kwds = {'disp' : 0}
+        self.res1 = fit_many(sm.Logit, datasets, kwds, n_jobs=2)
+        self.res2 = [sm.Logit(*args).fit(**kwds) for args in datasets]
+
+    def test_converged(self):
+        for res1 in self.res1:
+            assert_equal(res1.converged, True)
+
+def test_serial():
+    from scikits.statsmodels.datasets.longley import load
+    data = load()
+    data.exog = sm.add_constant(data.exog)
+    res = fit_many(sm.OLS, [(data.endog, data.exog)], n_jobs=1)
+    assert_almost_equal(res[0].params,
+            sm.OLS(data.endog, data.exog).fit().params, DECIMAL_7)
+    assert_raises(ValueError, fit_many, sm.OLS, [(data.endog, data.exog)],
+            backend="mpi")
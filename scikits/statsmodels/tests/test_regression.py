@@ -5,7 +5,8 @@ import numpy as np
 from numpy.testing import *
 from scipy.linalg import toeplitz
 from scikits.statsmodels.tools import add_constant
-from scikits.statsmodels.regression import OLS, GLSAR, WLS, GLS, yule_walker
+from scikits.statsmodels.regression import OLS, GLSAR, WLS, GLS, yule_walker, \
+        IncrementalOLS
 #from check_for_rpy import skip_rpy
 from nose import SkipTest
 from scipy.stats import t as student_t
@@ -181,6 +182,62 @@ class TestOLS(CheckRegressionResults):
                 self.res2.HC3_se[:-1], DECIMAL_4)
         assert_approx_equal(self.res1.HC3_se[-1], self.res2.HC3_se[-1])
 
+def test_scale_reset():
+    from scikits.statsmodels.datasets.longley import load
+    data = load()
+    data.exog = add_constant(data.exog)
+    res = OLS(data.endog, data.exog).fit()
+    bse, pvalues = res.bse, res.pvalues
+    assert_(res.bse is bse)
+    res.scale = 4 * res.scale
+    assert_almost_equal(res.bse, 2 * bse, DECIMAL_7)
+    assert_almost_equal(res.t(), res.params / (2 * bse), DECIMAL_7)
+    assert_almost_equal(res.pvalues, student_t.sf(np.abs(res.t()),
+            res.df_resid) * 2, DECIMAL_7)
+    assert_(np.all(res.pvalues > pvalues))
+
+class TestOLSAttachData(TestOLS):
+    def __init__(self):
+        super(TestOLSAttachData, self).__init__()
+        from scikits.statsmodels.datasets.longley import load
+        data = load()
+        data.exog = add_constant(data.exog)
+        res1 = OLS(data.endog, data.exog).fit()
+        bse = res1.bse
+        res1.remove_data()
+        self.removed_model = res1.model
+        self.removed_bse = res1.bse
+        res1.attach_data(data.endog, data.exog)
+        self.res1 = res1
+        self.bse = bse
+
+    def test_remove_data(self):
+        model = self.removed_model
+        assert_(model.exog is None and model.wexog is None)
+        assert_(model.pinv_wexog is None)
+        assert_(self.removed_bse is self.bse)
+
+class TestGLSAttachData(object):
+    def __init__(self):
+        from scikits.statsmodels.datasets.longley import load
+        data = load()
+        data.exog = add_constant(data.exog)
+        self.data = data
+        self.sigma = np.arange(1, 17.)
+        self.res2 = GLS(data.endog, data.exog, sigma=self.sigma).fit()
+        self.res1 = GLS(data.endog, data.exog, sigma=self.sigma).fit()
+        self.res1.remove_data()
+
+    def test_missing_sigma(self):
+        assert_raises(ValueError, self.res1.attach_data, self.data.endog,
+                self.data.exog)
+
+    def test_sigma(self):
+        res1, res2 = self.res1, self.res2
+        res1.attach_data(self.data.endog, self.data.exog, sigma=self.sigma)
+        assert_almost_equal(res1.wresid, res2.wresid, DECIMAL_7)
+        assert_almost_equal(res1.resid, res2.resid, DECIMAL_7)
+
 class TestFtest(object):
     """
     Tests f_test vs. RegressionResults
@@ -400,6 +457,50 @@ class TestGLS(object):
     def test_pvalues(self):
         assert_almost_equal(self.res1.pvalues, self.res2.pvalues, DECIMAL_4)
 
+class TestGLS_banded(CheckRegressionResults):
+    """
+    Test that a banded scipy.sparse sigma gives the same results as dense.
+    """
+    def __init__(self):
+        from scipy import sparse
+        from scikits.statsmodels.datasets.longley import load
+        data = load()
+        data.exog = add_constant(data.exog)
+        sigma = toeplitz([1., .4, .15] + [0]*13)
+        self.res1 = GLS(data.endog, data.exog,
+                sigma=sparse.csr_matrix(sigma)).fit()
+        self.res2 = GLS(data.endog, data.exog, sigma=sigma).fit()
+
+class TestGLS_block(CheckRegressionResults):
+    """
+    Test that a block diagonal sigma gives the same results as dense.
+    """
+    def __init__(self):
+        from scipy.linalg import block_diag
+        from scikits.statsmodels.datasets.longley import load
+        data = load()
+        data.exog = add_constant(data.exog)
+        blocks = [.5**toeplitz(np.arange(4)) for i in range(4)]
+        self.res1 = GLS(data.endog, data.exog, sigma=blocks).fit()
+        self.res2 = GLS(data.endog, data.exog,
+                sigma=block_diag(*blocks)).fit()
+
+def test_gls_sigma_structure():
+    from scipy import sparse
+    np.random.seed(54321)
+    nobs = 30
+    exog = add_constant(np.random.uniform(0,20,size=(nobs,2)))
+    endog = np.random.uniform(0,20,size=nobs)
+    sigma = np.random.uniform(1,2,size=nobs)
+    res1 = GLS(endog, exog, sigma=sparse.spdiags(sigma, 0, nobs, nobs)).fit()
+    res2 = GLS(endog, exog, sigma=np.diag(sigma)).fit()
+    res3 = GLS(endog, exog, sigma=sigma).fit()
+    assert_almost_equal(res1.params, res2.params, DECIMAL_7)
+    assert_almost_equal(res1.llf, res2.llf, DECIMAL_7)
+    assert_almost_equal(res3.params, res2.params, DECIMAL_7)
+    assert_almost_equal(res3.llf, res2.llf, DECIMAL_7)
+    assert_raises(ValueError, GLS, endog, exog, [np.eye(3)])
+
 class TestGLS_nosigma(CheckRegressionResults):
     '''
     Test that GLS with no argument is equivalent to OLS.
@@ -446,6 +547,52 @@ class TestGLS_nosigma(CheckRegressionResults):
 #        assert_almost_equal(conf1, conf2, DECIMAL_4)
 
 
+class TestOLS_qr(TestOLS):
+    def __init__(self):
+        from scikits.statsmodels.datasets.longley import load
+        from results.results_regression import Longley
+        data = load()
+        data.exog = add_constant(data.exog)
+        res1 = OLS(data.endog, data.exog).fit(method="qr")
+        res2 = Longley()
+        res2.wresid = res1.wresid # workaround hack
+        self.res1 = res1
+        self.res2 = res2
+
+    def test_no_pinv(self):
+        assert_equal(self.res1.model.pinv_wexog, None)
+
+class TestOLS_lstsq(TestOLS):
+    def __init__(self):
+        from scikits.statsmodels.datasets.longley import load
+        from results.results_regression import Longley
+        data = load()
+        data.exog = add_constant(data.exog)
+        res1 = OLS(data.endog, data.exog).fit(method="lstsq")
+        res2 = Longley()
+        res2.wresid = res1.wresid # workaround hack
+        self.res1 = res1
+        self.res2 = res2
+
+class TestWLS_cholesky(CheckRegressionResults):
+    def __init__(self):
+        from scikits.statsmodels.datasets.ccard import load
+        data = load()
+        model = WLS(data.endog, data.exog, weights = 1/data.exog[:,2])
+        self.res1 = model.fit(method="cholesky")
+        self.res2 = WLS(data.endog, data.exog,
+                weights = 1/data.exog[:,2]).fit(method="pinv")
+
+    def test_HC_errors(self):
+        self.res1.model.pinv_wexog = None # uses the sandwich form
+        assert_almost_equal(self.res1.HC0_se, self.res2.HC0_se, DECIMAL_4)
+        assert_almost_equal(self.res1.HC1_se, self.res2.HC1_se, DECIMAL_4)
+
+def test_fit_method():
+    from scikits.statsmodels.datasets.longley import load
+    data = load()
+    assert_raises(ValueError, OLS(data.endog, data.exog).fit, method="svd")
+
 class TestWLS_GLS(CheckRegressionResults):
     def __init__(self):
         from scikits.statsmodels.datasets.ccard import load
@@ -478,6 +625,157 @@ class TestGLS_OLS(CheckRegressionResults):
     def check_confidenceintervals(self, conf1, conf2):
         assert_almost_equal(conf1, conf2(), DECIMAL_4)
 
+class TestOLS_sparse(CheckRegressionResults):
+    def __init__(self):
+        from scipy import sparse
+        np.random.seed(12345)
+        nobs, nlevels = 500, 25
+        levels = np.random.randint(nlevels, size=nobs)
+        exog = np.zeros((nobs, nlevels))
+        exog[np.arange(nobs), levels] = 1
+        exog[:,0] = np.random.randn(nobs) # replaces the first level
+        exog = add_constant(exog)
+        endog = np.dot(exog, np.random.randn(nlevels+1)) + \
+                np.random.randn(nobs)
+        self.res1 = OLS(endog, sparse.csr_matrix(exog)).fit()
+        self.res2 = OLS(endog, exog).fit()
+
+    def test_HC0_errors(self):
+        assert_almost_equal(self.res1.HC0_se, self.res2.HC0_se, DECIMAL_4)
+
+    def test_HC3_errors(self):
+        assert_almost_equal(self.res1.HC3_se, self.res2.HC3_se, DECIMAL_4)
+
+class TestOLS_sparse_singular(CheckRegressionResults):
+    """
+    Dummies for all levels and a constant, the design is rank deficient.
+    """
+    def __init__(self):
+        from scipy import sparse
+        np.random.seed(12345)
+        nobs, nlevels = 200, 5
+        levels = np.random.randint(nlevels, size=nobs)
+        exog = np.zeros((nobs, nlevels))
+        exog[np.arange(nobs), levels] = 1
+        exog = add_constant(exog)
+        endog = .5 * levels + np.random.randn(nobs)
+        self.res1 = OLS(endog, sparse.csr_matrix(exog)).fit()
+        self.res2 = OLS(endog, exog).fit()
+
+    def test_rank(self):
+        assert_equal(self.res1.df_model, 4)
+        assert_equal(self.res1.df_resid, 195)
+        assert_almost_equal(self.res1.bse, self.res2.bse, DECIMAL_4)
+
+class TestWLS_sparse(CheckRegressionResults):
+    def __init__(self):
+        from scipy import sparse
+        from scikits.statsmodels.datasets.ccard import load
+        data = load()
+        weights = 1/data.exog[:,2]
+        self.res1 = WLS(data.endog, sparse.csr_matrix(data.exog),
+                weights=weights).fit()
+        self.res2 = WLS(data.endog, data.exog, weights=weights).fit()
+
+class TestIncrementalOLS(CheckRegressionResults):
+    def __init__(self):
+        from scikits.statsmodels.datasets.longley import load
+        data = load()
+        data.exog = add_constant(data.exog)
+        chunks = [(data.endog[i:i+3], data.exog[i:i+3]) for i in
+                range(0,16,3)]
+        self.res1 = IncrementalOLS(chunks).fit()
+        self.res2 = OLS(data.endog, data.exog).fit()
+
+    def test_wresid(self):
+        assert_raises(AttributeError, getattr, self.res1, 'wresid')
+
+    def test_resids(self):
+        assert_raises(AttributeError, getattr, self.res1, 'resid')
+
+    def test_uncentered_tss(self):
+        assert_almost_equal(self.res1.uncentered_tss,
+                self.res2.uncentered_tss, DECIMAL_4)
+
+class TestIncrementalWLS(TestIncrementalOLS):
+    def __init__(self):
+        from scikits.statsmodels.datasets.ccard import load
+        data = load()
+        weights = 1/data.exog[:,2]
+        model = IncrementalOLS()
+        for i in range(0, len(data.endog), 10):
+            model.update(data.endog[i:i+10], data.exog[i:i+10],
+                    weights[i:i+10])
+        self.res1 = model.fit()
+        self.res2 = WLS(data.endog, data.exog, weights=weights).fit()
+
+def test_incremental_wls_mixed():
+    # chunks with and without weights, the loglikelihood has the
+    # .5*sum(log(weights)) of the weighted chunks
+    from scikits.statsmodels.datasets.ccard import load
+    data = load()
+    weights = 1/data.exog[:,2]
+    model = IncrementalOLS()
+    for i in range(0, len(data.endog), 10):
+        if i % 20:
+            model.update(data.endog[i:i+10], data.exog[i:i+10])
+            weights[i:i+10] = 1
+        else:
+            model.update(data.endog[i:i+10], data.exog[i:i+10],
+                    weights[i:i+10])
+    res1 = model.fit()
+    sqrtw = np.sqrt(weights)
+    res2 = OLS(sqrtw * data.endog, sqrtw[:,None] * data.exog).fit()
+    assert_almost_equal(res1.params, res2.params, DECIMAL_4)
+    assert_almost_equal(res1.llf, res2.llf + .5*np.log(weights).sum(),
+            DECIMAL_4)
+
+class TestBatchedOLS(object):
+    def __init__(self):
+        from scikits.statsmodels.datasets.longley import load
+        data = load()
+        data.exog = add_constant(data.exog)
+        endog = np.column_stack((data.endog, data.endog[::-1],
+                np.log(data.endog)))
+        self.res1 = OLS(endog, data.exog).fit(method="qr")
+        self.res2 = [OLS(endog[:,i], data.exog).fit() for i in range(3)]
+
+    def check_attr(self, attr, decimal=DECIMAL_4):
+        for i, res2 in enumerate(self.res2):
+            assert_almost_equal(getattr(self.res1, attr)[...,i],
+                    getattr(res2, attr), decimal)
+
+    def test_params(self):
+        self.check_attr('params')
+
+    def test_standarderrors(self):
+        self.check_attr('bse')
+
+    def test_scale(self):
+        self.check_attr('scale')
+
+    def test_rsquared(self):
+        self.check_attr('rsquared')
+
+    def test_fvalue(self):
+        self.check_attr('fvalue')
+
+    def test_loglike(self):
+        self.check_attr('llf')
+
+    def test_pvalues(self):
+        self.check_attr('pvalues')
+
+    def test_resids(self):
+        self.check_attr('resid')
+
+    def test_t(self):
+        for i, res2 in enumerate(self.res2):
+            assert_almost_equal(self.res1.t()[:,i], res2.t(), DECIMAL_4)
+
+    def test_HC_errors(self):
+        assert_raises(ValueError, getattr, self.res1, 'HC0_se')
+
 #TODO: test AR
 # why the two-stage in AR?
 #class test_ar(object):
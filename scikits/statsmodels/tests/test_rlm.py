@@ -2,6 +2,7 @@
 Test functions for sm.rlm
 """
 
+import numpy as np
 from numpy.testing import *
 import scikits.statsmodels as sm
 from scikits.statsmodels.rlm import RLM
@@ -256,5 +257,82 @@ class TestRlmAndrewsHuber(TestRlm):
         from results.results_rlm import AndrewsHuber
         self.res2 = AndrewsHuber()
 
+def test_history():
+    data = sm.datasets.stackloss.load()
+    exog = sm.add_constant(data.exog)
+    res1 = RLM(data.endog, exog).fit(conv='dev')
+    model = RLM(data.endog, exog)
+    res2 = model.fit(conv='resid')
+    # n-length arrays are only kept if they are the convergence criterion
+    assert_equal(len(res1.model.history['sresid']), 1)
+    assert_equal(len(model.history['sresid']), model.iteration + 1)
+    assert_equal(len(model.history['params']), model.iteration + 1)
+    assert_almost_equal(res2.params, res1.params, DECIMAL_4)
+
+class TestHighBreakdown(object):
+    def __init__(self):
+        data = sm.datasets.stackloss.load()
+        self.endog = data.endog
+        self.exog = sm.add_constant(data.exog)
+
+    def test_lts(self):
+        res1 = sm.LTS(self.endog, self.exog).fit(reweight=False, seed=1234)
+        # raw coefficients of ltsReg in R package robustbase
+        assert_almost_equal(res1.params, [0.7409211, 0.3915267, 0.0111345,
+            -37.3233265], DECIMAL_4)
+        assert_equal(res1.scale, res1.lts_scale)
+
+    def test_mm(self):
+        res1 = sm.MMEstimator(self.endog, self.exog).fit(seed=1234)
+        # lmrob in R package robustbase
+        assert_almost_equal(res1.params, [0.9388, 0.5796, -0.1129,
+            -41.5246], DECIMAL_3)
+        assert_almost_equal(res1.s_results.scale, 1.912, DECIMAL_3)
+        assert_equal(res1.scale, res1.s_results.scale)
+
+    def test_seed(self):
+        for cls in [sm.LTS, sm.SEstimator]:
+            res1 = cls(self.endog, self.exog).fit(n_starts=120, seed=5)
+            res2 = cls(self.endog, self.exog).fit(n_starts=120, seed=5,
+                    n_jobs=3)
+            assert_equal(res1.params, res2.params)
+            assert_equal(res1.scale, res2.scale)
+
+    def test_exact_fit(self):
+        # 25 of 40 residuals of the plane endog = 3 are exactly 0, the
+        # S-estimate of scale is 0
+        np.random.seed(12345)
+        exog = sm.add_constant(np.random.randint(0, 2, (40, 1)) * 1.)
+        endog = 3 * np.ones(40)
+        endog[:15] += 5 * np.random.standard_normal(15)
+        import warnings
+        for cls in [sm.LTS, sm.SEstimator, sm.MMEstimator]:
+            warn = warnings.catch_warnings()
+            warn.__enter__()
+            try:
+                warnings.simplefilter('ignore', UserWarning)
+                res1 = cls(endog, exog).fit(seed=1234)
+            finally:
+                warn.__exit__()
+            assert_almost_equal(res1.params, [0, 3], DECIMAL_4)
+            assert_equal(res1.scale, 0)
+            assert_equal(res1.bse, 0)
+            assert_equal(res1.weights, np.arange(40) >= 15)
+
+def test_leverage_outliers():
+    np.random.seed(12345)
+    nobs = 3000
+    exog = sm.add_constant(np.random.standard_normal((nobs, 2)))
+    endog = np.dot(exog, [1., 2., 3.]) + np.random.standard_normal(nobs)
+    # 20 percent bad leverage points
+    exog[:600,0] += 10
+    endog[:600] = -20
+    for cls in [sm.LTS, sm.SEstimator, sm.MMEstimator]:
+        res1 = cls(endog, exog).fit(n_starts=100, max_subsample=1000,
+                seed=1)
+        assert_almost_equal(res1.params, [1., 2., 3.], DECIMAL_1)
+        assert_almost_equal(res1.weights[:600], 0)
+    assert_(np.fabs(RLM(endog, exog).fit().params[0] - 1) > .5)
+
 if __name__=="__main__":
     run_module_suite()
@@ -81,6 +81,26 @@ class TestCategoricalNumerical(object):
         self.structdes = structdes
         self.recdes = structdes.view(np.recarray)
 
+    def test_array1d_sparse(self):
+        codes, des = tools.categorical(self.instr, sparse=True)
+        assert_array_equal(des.toarray(), self.dummy)
+        assert_array_equal(codes, np.repeat(np.arange(5), 5))
+
+    def test_array2d_sparse(self):
+        des = np.column_stack((self.des, self.instr, self.des))
+        codes, dum, col_map = tools.categorical(des, col=2, sparse=True,
+                dictnames=True)
+        assert_array_equal(dum.toarray(), self.dummy)
+        assert_equal(col_map, dict(zip(range(5), np.unique(self.instr))))
+
+    def test_structarray2d_sparse(self):
+        codes, des = tools.categorical(self.structdes, col='instrument',
+                sparse=True)
+        assert_array_equal(des.toarray(), self.dummy)
+        codes, des = tools.categorical(self.recdes, col='str_instr',
+                sparse=True)
+        assert_array_equal(des.toarray(), self.dummy)
+
     def test_array2d(self):
         des = np.column_stack((self.des, self.instr, self.des))
         des = tools.categorical(des, col=2)
@@ -297,6 +317,19 @@ class TestCategoricalString(TestCategoricalNumerical):
         pass
 
 
+def test_spdot():
+    from scipy import sparse
+    np.random.seed(12345)
+    X = standard_normal((100, 3))
+    for b in [standard_normal(3), standard_normal((3, 2))]:
+        assert_almost_equal(tools.spdot(X, b), np.dot(X, b))
+        assert_almost_equal(tools.spdot(sparse.csr_matrix(X), b),
+                np.dot(X, b))
+    for b in [standard_normal(100), standard_normal((100, 2))]:
+        assert_almost_equal(tools.sptdot(X, b), np.dot(X.T, b))
+        assert_almost_equal(tools.sptdot(sparse.csr_matrix(X), b),
+                np.dot(X.T, b))
+
 def test_chain_dot():
     A = np.arange(1,13).reshape(3,4)
     B = np.arange(3,15).reshape(4,3)
@@ -7,6 +7,7 @@ import numpy.lib.recfunctions as nprf
 import numpy.linalg as L
 import scipy.interpolate
 import scipy.linalg
+import scipy.sparse
 
 def _make_dictnames(tmp_arr, offset=0):
     """
@@ -24,7 +25,7 @@ def _make_dictnames(tmp_arr, offset=0):
 # ie., if you still have a string variable in your array you don't
 # want to cast it to float
 #TODO: add name validator (ie., bad names for datasets.grunfeld)
-def categorical(data, col=None, dictnames=False, drop=False):
+def categorical(data, col=None, dictnames=False, drop=False, sparse=False):
     '''
     Returns a dummy matrix given an array of categorical variables.
 
@@ -45,6 +46,10 @@ def categorical(data, col=None, dictnames=False, drop=False):
         name is returned.  Used to have information about plain arrays.
     drop : bool
         Whether or not keep the categorical variable in the returned matrix.
+    sparse : bool, optional
+        If True, only the categorical variable is encoded, see Returns.  The
+        other columns of `data` are not copied and `drop` is ignored.  The
+        default is False.
 
     Returns
     --------
@@ -52,6 +57,12 @@ def categorical(data, col=None, dictnames=False, drop=False):
         A matrix of dummy (indicator/binary) float variables for the
         categorical data.  If dictnames is True, then the dictionary
         is returned as well.
+    codes, dummy_matrix, [dictnames, optional]
+        If `sparse` is True.  `codes` is an integer array with the index of
+        the level of each observation in the sorted unique levels, and
+        `dummy_matrix` is the n x nlevels indicator matrix as a
+        scipy.sparse CSR matrix.  If dictnames is True, the dictionary
+        mapping the column number to the level is returned as well.
 
     Notes
     -----
@@ -96,7 +107,14 @@ def categorical(data, col=None, dictnames=False, drop=False):
     Or
 
     >>> design2 = sm.tools.categorical(struct_ar, col='str_instr', drop=True)
+
+    Or only the level codes and a sparse indicator matrix
+
+    >>> codes, dummies = sm.tools.categorical(struct_ar, col='str_instr',
+    ...                                       sparse=True)
     '''
+    if sparse:
+        return _sparse_categorical(data, col, dictnames)
 
 #TODO: add a NameValidator function
     # catch recarrays and structured arrays
@@ -188,6 +206,37 @@ def categorical(data, col=None, dictnames=False, drop=False):
         else:
             raise IndexError, "The index %s is not understood" % col
 
+def _sparse_categorical(data, col, dictnames):
+    """
+    Returns the level codes and a CSR indicator matrix, see categorical.
+    """
+    if data.dtype.names:
+        if col is None:
+            if len(data.dtype.names) > 1:
+                raise IndexError, "col is None and the input array is not 1d"
+            col = data.dtype.names[0]
+        elif isinstance(col, int):
+            col = data.dtype.names[col]
+        var = data[col]
+    elif col is None:
+        var = data
+    elif isinstance(col, int):
+        var = data[:,col]
+    else:
+        raise IndexError, "The index %s is not understood" % col
+    var = np.asarray(var)
+    if var.ndim > 1:
+        var = np.squeeze(var)
+    if var.ndim != 1:
+        raise IndexError, "col is None and the input array is not 1d"
+    levels, codes = np.unique(var, return_inverse=True)
+    nobs = len(codes)
+    dummies = scipy.sparse.csr_matrix((np.ones(nobs), codes,
+            np.arange(nobs+1)), shape=(nobs, len(levels)))
+    if dictnames:
+        return codes, dummies, _make_dictnames(levels)
+    return codes, dummies
+
 #TODO: add an axis argument to this for sysreg
 def add_constant(data, prepend=False):
     '''
@@ -279,6 +328,12 @@ def rank(X, cond=1.0e-12):
     Return the rank of a matrix X based on its generalized inverse,
     not the SVD.
     """
+    if scipy.sparse.issparse(X):
+        # eigenvalues of the p x p cross-product, ie., the squared singular
+        # values of X, are only accurate to about eps relative to the largest
+        D = scipy.linalg.svdvals((X.T * X).toarray())
+        tol = max(cond**2, max(X.shape) * np.finfo(np.float64).eps)
+        return int(np.add.reduce(np.greater(D / D.max(), tol).astype(np.int32)))
     X = np.asarray(X)
     if len(X.shape) == 2:
         D = scipy.linalg.svdvals(X)
@@ -449,3 +504,59 @@ def chain_dot(*arrs):
     """
     return reduce(lambda x, y: np.dot(y, x), arrs[::-1])
 
+
+def spdot(X, b):
+    """
+    Returns dot(X, b), where X can also be a scipy.sparse matrix.
+
+    The result is an ndarray if b is an ndarray.
+    """
+    if scipy.sparse.issparse(X):
+        return X * b
+    return np.dot(X, b)
+
+def sptdot(X, b):
+    """
+    Returns dot(X.T, b), where X can also be a scipy.sparse matrix.
+    """
+    if scipy.sparse.issparse(X):
+        return X.T * b
+    return np.dot(X.T, b)
+
+def spxtwx(X, w=None):
+    """
+    Returns the p x p array dot(X.T * w, X) as a dense array.
+
+    Parameters
+    ----------
+    X : array or scipy.sparse matrix
+        n x p array
+    w : array, optional
+        n-length weights.  The default is None for no weights.
+    """
+    if scipy.sparse.issparse(X):
+        if w is None:
+            xtwx = X.T * X
+        else:
+            n = X.shape[0]
+            xtwx = X.T * (scipy.sparse.spdiags(w, 0, n, n) * X)
+        return xtwx.toarray()
+    if w is None:
+        return np.dot(X.T, X)
+    return np.dot(X.T * w, X)
+
+def spwx(w, X):
+    """
+    Returns the n x p array w[:,None] * X as a dense array.
+
+    Parameters
+    ----------
+    w : array
+        n-length weights for the rows of X.
+    X : array or scipy.sparse matrix
+        n x p array
+    """
+    if scipy.sparse.issparse(X):
+        n = X.shape[0]
+        return (scipy.sparse.spdiags(w, 0, n, n) * X).toarray()
+    return w[:,None] * X